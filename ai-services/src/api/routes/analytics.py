@@ -1,11 +1,30 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, FrozenSet, AsyncIterator, Iterator, Tuple
+import asyncio
+import csv
+import inspect
+import io
+import itertools
 import logging
+import uuid
+import numpy as np
+import orjson
+from functools import lru_cache
 from datetime import datetime, timedelta
 import json
+from fastapi_cache.decorator import cache
 
 from ..auth import get_current_user
+from ...config.settings import settings
+from ...utils.cache import (
+    build_cache_key,
+    get_cached_json,
+    set_cached_json,
+    user_scoped_key_builder,
+)
+from ...utils.redis_client import get_redis_client
 from ...analytics.property_analytics import PropertyAnalytics
 from ...analytics.tenant_analytics import TenantAnalytics
 from ...analytics.financial_analytics import FinancialAnalytics
@@ -32,50 +51,91 @@ class TenantAnalyticsRequest(BaseModel):
     date_range: str = Field("30d", description="Date range for analysis")
     segment_by: Optional[str] = Field(None, description="Segmentation criteria")
 
+class _NonBlockingService:
+    """Proxy that runs a service's synchronous methods in a worker thread
+    
+    Async methods are passed through untouched; blocking ones (sync DB
+    drivers, requests) are awaited via asyncio.to_thread so they never stall
+    the event loop or serialize the concurrent section fan-out.
+    """
+    
+    def __init__(self, service: Any):
+        self._service = service
+    
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._service, name)
+        if not callable(attr) or inspect.iscoroutinefunction(attr):
+            return attr
+        
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(attr, *args, **kwargs)
+        
+        return call
+
+# Analytics services hold no per-request state, so one instance of each is shared
+@lru_cache(maxsize=1)
+def get_property_analytics_service() -> PropertyAnalytics:
+    return _NonBlockingService(PropertyAnalytics())
+
+@lru_cache(maxsize=1)
+def get_tenant_analytics_service() -> TenantAnalytics:
+    return _NonBlockingService(TenantAnalytics())
+
+@lru_cache(maxsize=1)
+def get_financial_analytics_service() -> FinancialAnalytics:
+    return _NonBlockingService(FinancialAnalytics())
+
+@lru_cache(maxsize=1)
+def get_maintenance_analytics_service() -> MaintenanceAnalytics:
+    return _NonBlockingService(MaintenanceAnalytics())
+
+@lru_cache(maxsize=1)
+def get_analytics_services() -> Dict[str, Any]:
+    return {
+        "property": get_property_analytics_service(),
+        "tenant": get_tenant_analytics_service(),
+        "financial": get_financial_analytics_service(),
+        "maintenance": get_maintenance_analytics_service()
+    }
+
+async def get_accessible_properties(
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> List[str]:
+    """Resolve the caller's accessible properties once per request"""
+    return await _get_user_properties(current_user["id"])
+
+async def get_accessible_property_set(
+    accessible_properties: List[str] = Depends(get_accessible_properties)
+) -> FrozenSet[str]:
+    """Set view of the caller's properties for O(1) access checks"""
+    return frozenset(accessible_properties)
+
+async def get_validated_property_id(
+    property_id: Optional[str] = Query(None),
+    accessible_property_set: FrozenSet[str] = Depends(get_accessible_property_set)
+) -> Optional[str]:
+    """Check the optional ``property_id`` query parameter against the caller's properties
+    
+    Dependencies are resolved before ``@cache`` looks up a stored response,
+    so a user who lost access to a property gets a 403 rather than its
+    cached analytics.
+    """
+    if property_id:
+        _validate_property_access(property_id, accessible_property_set)
+    return property_id
+
 @router.get("/dashboard")
+@cache(expire=settings.ANALYTICS_CACHE_TTL, key_builder=user_scoped_key_builder)
 async def get_dashboard_analytics(
     date_range: str = Query("30d", description="Date range for dashboard"),
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    accessible_properties: List[str] = Depends(get_accessible_properties)
 ):
     """Get comprehensive dashboard analytics"""
     try:
-        # Initialize analytics services
-        property_analytics = PropertyAnalytics()
-        tenant_analytics = TenantAnalytics() 
-        financial_analytics = FinancialAnalytics()
-        maintenance_analytics = MaintenanceAnalytics()
-        
-        # Get user's accessible properties
-        user_properties = await _get_user_properties(current_user["id"])
-        
-        # Collect all analytics data
-        dashboard_data = {
-            "summary": await _get_summary_metrics(
-                user_properties, date_range, current_user["id"]
-            ),
-            "property_performance": await property_analytics.get_property_performance(
-                property_ids=user_properties,
-                date_range=date_range
-            ),
-            "financial_overview": await financial_analytics.get_financial_overview(
-                property_ids=user_properties,
-                date_range=date_range
-            ),
-            "tenant_insights": await tenant_analytics.get_tenant_insights(
-                property_ids=user_properties,
-                date_range=date_range
-            ),
-            "maintenance_summary": await maintenance_analytics.get_maintenance_summary(
-                property_ids=user_properties,
-                date_range=date_range
-            ),
-            "trends": await _get_trend_analysis(
-                user_properties, date_range, current_user["id"]
-            ),
-            "alerts": await _get_analytics_alerts(
-                user_properties, current_user["id"]
-            )
-        }
+        dashboard_data = await _collect_dashboard_data(
+            accessible_properties, date_range, current_user["id"]
+        )
         
         return {
             "dashboard": dashboard_data,
@@ -94,45 +154,55 @@ async def get_dashboard_analytics(
 @router.post("/property")
 async def get_property_analytics(
     request: PropertyAnalyticsRequest,
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    accessible_property_set: FrozenSet[str] = Depends(get_accessible_property_set),
+    property_analytics: PropertyAnalytics = Depends(get_property_analytics_service)
 ):
     """Get detailed property analytics"""
     try:
-        property_analytics = PropertyAnalytics()
-        
         # Validate property access
         if request.property_id:
-            await _validate_property_access(request.property_id, current_user["id"])
+            _validate_property_access(request.property_id, accessible_property_set)
         
-        analytics_data = {
-            "occupancy_analytics": await property_analytics.get_occupancy_analytics(
+        cache_key = build_cache_key("analytics:property", current_user["id"], request.model_dump())
+        cached = await get_cached_json(cache_key)
+        if cached is not None:
+            return cached
+        
+        sections = {
+            "occupancy_analytics": property_analytics.get_occupancy_analytics(
                 property_id=request.property_id,
                 date_range=request.date_range
             ),
-            "revenue_analytics": await property_analytics.get_revenue_analytics(
+            "revenue_analytics": property_analytics.get_revenue_analytics(
                 property_id=request.property_id,
                 date_range=request.date_range
             ),
-            "market_comparison": await property_analytics.get_market_comparison(
+            "market_comparison": property_analytics.get_market_comparison(
                 property_id=request.property_id
             ),
-            "performance_metrics": await property_analytics.get_performance_metrics(
+            "performance_metrics": property_analytics.get_performance_metrics(
                 property_id=request.property_id,
                 date_range=request.date_range
             )
         }
         
         if request.include_predictions:
-            analytics_data["predictions"] = await property_analytics.get_predictions(
+            sections["predictions"] = property_analytics.get_predictions(
                 property_id=request.property_id
             )
         
-        return {
+        analytics_data = await _gather_sections(sections)
+        
+        result = {
             "property_analytics": analytics_data,
             "property_id": request.property_id,
             "date_range": request.date_range,
             "timestamp": datetime.utcnow().isoformat()
         }
+        await set_cached_json(cache_key, result, settings.ANALYTICS_CACHE_TTL)
+        
+        return result
         
     except Exception as e:
         logger.error(f"Error getting property analytics: {e}")
@@ -144,32 +214,37 @@ async def get_property_analytics(
 @router.post("/tenant")
 async def get_tenant_analytics(
     request: TenantAnalyticsRequest,
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    accessible_property_set: FrozenSet[str] = Depends(get_accessible_property_set),
+    tenant_analytics: TenantAnalytics = Depends(get_tenant_analytics_service)
 ):
     """Get detailed tenant analytics"""
     try:
-        tenant_analytics = TenantAnalytics()
-        
         # Validate access
         if request.property_id:
-            await _validate_property_access(request.property_id, current_user["id"])
+            _validate_property_access(request.property_id, accessible_property_set)
         
-        analytics_data = {
-            "tenant_satisfaction": await tenant_analytics.get_satisfaction_metrics(
+        cache_key = build_cache_key("analytics:tenant", current_user["id"], request.model_dump())
+        cached = await get_cached_json(cache_key)
+        if cached is not None:
+            return cached
+        
+        sections = {
+            "tenant_satisfaction": tenant_analytics.get_satisfaction_metrics(
                 property_id=request.property_id,
                 tenant_id=request.tenant_id,
                 date_range=request.date_range
             ),
-            "retention_analysis": await tenant_analytics.get_retention_analysis(
+            "retention_analysis": tenant_analytics.get_retention_analysis(
                 property_id=request.property_id,
                 date_range=request.date_range
             ),
-            "payment_behavior": await tenant_analytics.get_payment_behavior(
+            "payment_behavior": tenant_analytics.get_payment_behavior(
                 property_id=request.property_id,
                 tenant_id=request.tenant_id,
                 date_range=request.date_range
             ),
-            "maintenance_requests": await tenant_analytics.get_maintenance_patterns(
+            "maintenance_requests": tenant_analytics.get_maintenance_patterns(
                 property_id=request.property_id,
                 tenant_id=request.tenant_id,
                 date_range=request.date_range
@@ -177,18 +252,23 @@ async def get_tenant_analytics(
         }
         
         if request.segment_by:
-            analytics_data["segmentation"] = await tenant_analytics.get_tenant_segmentation(
+            sections["segmentation"] = tenant_analytics.get_tenant_segmentation(
                 property_id=request.property_id,
                 segment_by=request.segment_by
             )
         
-        return {
+        analytics_data = await _gather_sections(sections)
+        
+        result = {
             "tenant_analytics": analytics_data,
             "property_id": request.property_id,
             "tenant_id": request.tenant_id,
             "date_range": request.date_range,
             "timestamp": datetime.utcnow().isoformat()
         }
+        await set_cached_json(cache_key, result, settings.ANALYTICS_CACHE_TTL)
+        
+        return result
         
     except Exception as e:
         logger.error(f"Error getting tenant analytics: {e}")
@@ -198,51 +278,50 @@ async def get_tenant_analytics(
         )
 
 @router.get("/financial")
+@cache(expire=settings.ANALYTICS_CACHE_TTL, key_builder=user_scoped_key_builder)
 async def get_financial_analytics(
     date_range: str = Query("30d"),
-    property_id: Optional[str] = Query(None),
+    property_id: Optional[str] = Depends(get_validated_property_id),
     include_projections: bool = Query(False),
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    accessible_properties: List[str] = Depends(get_accessible_properties),
+    financial_analytics: FinancialAnalytics = Depends(get_financial_analytics_service)
 ):
     """Get financial analytics and reporting"""
     try:
-        financial_analytics = FinancialAnalytics()
-        
-        # Validate property access if specified
-        if property_id:
-            await _validate_property_access(property_id, current_user["id"])
-        
         # Get user's accessible properties
-        user_properties = [property_id] if property_id else await _get_user_properties(current_user["id"])
+        user_properties = [property_id] if property_id else accessible_properties
         
-        financial_data = {
-            "revenue_analysis": await financial_analytics.get_revenue_analysis(
+        sections = {
+            "revenue_analysis": financial_analytics.get_revenue_analysis(
                 property_ids=user_properties,
                 date_range=date_range
             ),
-            "expense_analysis": await financial_analytics.get_expense_analysis(
+            "expense_analysis": financial_analytics.get_expense_analysis(
                 property_ids=user_properties,
                 date_range=date_range
             ),
-            "cash_flow": await financial_analytics.get_cash_flow_analysis(
+            "cash_flow": financial_analytics.get_cash_flow_analysis(
                 property_ids=user_properties,
                 date_range=date_range
             ),
-            "roi_analysis": await financial_analytics.get_roi_analysis(
+            "roi_analysis": financial_analytics.get_roi_analysis(
                 property_ids=user_properties,
                 date_range=date_range
             ),
-            "budget_variance": await financial_analytics.get_budget_variance(
+            "budget_variance": financial_analytics.get_budget_variance(
                 property_ids=user_properties,
                 date_range=date_range
             )
         }
         
         if include_projections:
-            financial_data["projections"] = await financial_analytics.get_financial_projections(
+            sections["projections"] = financial_analytics.get_financial_projections(
                 property_ids=user_properties
             )
         
+        financial_data = await _gather_sections(sections)
+        
         return {
             "financial_analytics": financial_data,
             "property_ids": user_properties,
@@ -258,45 +337,42 @@ async def get_financial_analytics(
         )
 
 @router.get("/maintenance")
+@cache(expire=settings.ANALYTICS_CACHE_TTL, key_builder=user_scoped_key_builder)
 async def get_maintenance_analytics(
     date_range: str = Query("30d"),
-    property_id: Optional[str] = Query(None),
+    property_id: Optional[str] = Depends(get_validated_property_id),
     category: Optional[str] = Query(None),
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    accessible_properties: List[str] = Depends(get_accessible_properties),
+    maintenance_analytics: MaintenanceAnalytics = Depends(get_maintenance_analytics_service)
 ):
     """Get maintenance analytics and insights"""
     try:
-        maintenance_analytics = MaintenanceAnalytics()
-        
-        # Validate property access if specified
-        if property_id:
-            await _validate_property_access(property_id, current_user["id"])
-        
         # Get user's accessible properties
-        user_properties = [property_id] if property_id else await _get_user_properties(current_user["id"])
+        user_properties = [property_id] if property_id else accessible_properties
         
-        maintenance_data = {
-            "request_analytics": await maintenance_analytics.get_request_analytics(
+        maintenance_data = await _gather_sections({
+            "request_analytics": maintenance_analytics.get_request_analytics(
                 property_ids=user_properties,
                 date_range=date_range,
                 category=category
             ),
-            "cost_analysis": await maintenance_analytics.get_cost_analysis(
+            "cost_analysis": maintenance_analytics.get_cost_analysis(
                 property_ids=user_properties,
                 date_range=date_range
             ),
-            "response_times": await maintenance_analytics.get_response_time_analysis(
+            "response_times": maintenance_analytics.get_response_time_analysis(
                 property_ids=user_properties,
                 date_range=date_range
             ),
-            "vendor_performance": await maintenance_analytics.get_vendor_performance(
+            "vendor_performance": maintenance_analytics.get_vendor_performance(
                 property_ids=user_properties,
                 date_range=date_range
             ),
-            "preventive_insights": await maintenance_analytics.get_preventive_insights(
+            "preventive_insights": maintenance_analytics.get_preventive_insights(
                 property_ids=user_properties
             )
-        }
+        })
         
         return {
             "maintenance_analytics": maintenance_data,
@@ -316,46 +392,61 @@ async def get_maintenance_analytics(
 @router.post("/custom")
 async def get_custom_analytics(
     request: AnalyticsRequest,
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    accessible_properties: List[str] = Depends(get_accessible_properties),
+    accessible_property_set: FrozenSet[str] = Depends(get_accessible_property_set),
+    analytics_services: Dict[str, Any] = Depends(get_analytics_services)
 ):
     """Get custom analytics based on specific metrics and filters"""
     try:
         # Validate property access
-        user_properties = request.property_ids or await _get_user_properties(current_user["id"])
-        for property_id in user_properties:
-            await _validate_property_access(property_id, current_user["id"])
-        
-        # Initialize analytics services
-        analytics_services = {
-            "property": PropertyAnalytics(),
-            "tenant": TenantAnalytics(),
-            "financial": FinancialAnalytics(),
-            "maintenance": MaintenanceAnalytics()
-        }
+        user_properties = request.property_ids or accessible_properties
+        _validate_property_access_bulk(user_properties, accessible_property_set)
         
-        custom_results = {}
+        cache_key = build_cache_key(
+            "analytics:custom",
+            current_user["id"],
+            _canonical_custom_request(request, user_properties)
+        )
+        cached = await get_cached_json(cache_key)
+        if cached is not None:
+            return cached
         
-        # Process each requested metric
+        # Group metrics by service so each service is called once
+        metrics_by_service: Dict[str, Dict[str, str]] = {}
         for metric in request.metrics:
             metric_parts = metric.split(".")
             service_name = metric_parts[0]
             metric_name = metric_parts[1] if len(metric_parts) > 1 else metric
             
             if service_name in analytics_services:
-                service = analytics_services[service_name]
-                result = await service.calculate_custom_metric(
-                    metric_name=metric_name,
-                    property_ids=user_properties,
-                    date_range=request.date_range,
-                    filters=request.filters or {}
-                )
-                custom_results[metric] = result
+                metrics_by_service.setdefault(service_name, {})[metric] = metric_name
+        
+        service_results = await _gather_sections({
+            service_name: _calculate_service_metrics(
+                analytics_services[service_name],
+                list(metrics.values()),
+                user_properties,
+                request.date_range,
+                request.filters or {}
+            )
+            for service_name, metrics in metrics_by_service.items()
+        })
         
-        return {
+        custom_results = {
+            metric: service_results[service_name][metric_name]
+            for service_name, metrics in metrics_by_service.items()
+            for metric, metric_name in metrics.items()
+        }
+        
+        result = {
             "custom_analytics": custom_results,
-            "request": request.dict(),
+            "request_hash": cache_key.rsplit(":", 1)[-1],
             "timestamp": datetime.utcnow().isoformat()
         }
+        await set_cached_json(cache_key, result, settings.ANALYTICS_CACHE_TTL)
+        
+        return result
         
     except Exception as e:
         logger.error(f"Error getting custom analytics: {e}")
@@ -364,34 +455,56 @@ async def get_custom_analytics(
             detail="Failed to retrieve custom analytics"
         )
 
-@router.get("/export")
+@router.get("/export", status_code=202)
 async def export_analytics(
+    background_tasks: BackgroundTasks,
     format: str = Query("csv", description="Export format (csv, xlsx, pdf)"),
     report_type: str = Query("dashboard", description="Type of report to export"),
     date_range: str = Query("30d"),
     property_id: Optional[str] = Query(None),
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    accessible_properties: List[str] = Depends(get_accessible_properties),
+    accessible_property_set: FrozenSet[str] = Depends(get_accessible_property_set)
 ):
-    """Export analytics data in various formats"""
+    """Queue an analytics export; the report is built in the background"""
+    if report_type not in EXPORT_REPORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported report type. Available types: {', '.join(EXPORT_REPORTS)}"
+        )
+    
+    if property_id:
+        _validate_property_access(property_id, accessible_property_set)
+    
     try:
-        # This would integrate with a reporting service
-        # For now, return a placeholder response
-        
+        now = datetime.utcnow()
         export_data = {
-            "export_id": f"export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
+            "export_id": f"export_{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}",
             "format": format,
             "report_type": report_type,
             "date_range": date_range,
             "property_id": property_id,
             "status": "processing",
             "download_url": None,  # Will be populated when ready
-            "estimated_completion": (datetime.utcnow() + timedelta(minutes=5)).isoformat()
+            "estimated_completion": (now + timedelta(minutes=5)).isoformat()
         }
         
+        await set_cached_json(
+            _export_key(current_user["id"], export_data["export_id"]),
+            export_data,
+            settings.REDIS_EXPIRE_TIME
+        )
+        background_tasks.add_task(
+            _run_export,
+            current_user["id"],
+            export_data,
+            [property_id] if property_id else accessible_properties
+        )
+        
         return {
             "export": export_data,
             "message": "Export request submitted successfully",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": now.isoformat()
         }
         
     except Exception as e:
@@ -401,16 +514,225 @@ async def export_analytics(
             detail="Failed to export analytics"
         )
 
+@router.get("/export/{export_id}")
+async def get_export_status(
+    export_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Get the status of a queued analytics export"""
+    export_data = await get_cached_json(_export_key(current_user["id"], export_id))
+    if not export_data:
+        raise HTTPException(status_code=404, detail="Export not found")
+    
+    return {
+        "export": export_data,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.get("/export/{export_id}/download")
+async def download_export(
+    export_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Stream a completed analytics export as CSV"""
+    export_data = await get_cached_json(_export_key(current_user["id"], export_id))
+    if not export_data:
+        raise HTTPException(status_code=404, detail="Export not found")
+    
+    if export_data["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Export is {export_data['status']}")
+    
+    if export_data["format"] != "csv":
+        raise HTTPException(status_code=400, detail="Only CSV downloads are currently supported")
+    
+    redis_client = get_redis_client()
+    if not redis_client:
+        raise HTTPException(status_code=503, detail="Export storage unavailable")
+    
+    return StreamingResponse(
+        _csv_stream(_read_export_rows(redis_client, _export_rows_key(current_user["id"], export_id))),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{export_id}.csv"'}
+    )
+
 # Helper functions
+async def _collect_dashboard_data(property_ids: List[str], date_range: str, user_id: str) -> Dict[str, Any]:
+    """Collect every dashboard section; the sections are independent so run them concurrently"""
+    return await _gather_sections({
+        "summary": _get_summary_metrics(property_ids, date_range, user_id),
+        "property_performance": get_property_analytics_service().get_property_performance(
+            property_ids=property_ids,
+            date_range=date_range
+        ),
+        "financial_overview": get_financial_analytics_service().get_financial_overview(
+            property_ids=property_ids,
+            date_range=date_range
+        ),
+        "tenant_insights": get_tenant_analytics_service().get_tenant_insights(
+            property_ids=property_ids,
+            date_range=date_range
+        ),
+        "maintenance_summary": get_maintenance_analytics_service().get_maintenance_summary(
+            property_ids=property_ids,
+            date_range=date_range
+        ),
+        "trends": _get_trend_analysis(property_ids, date_range, user_id),
+        "alerts": _get_analytics_alerts(property_ids, user_id)
+    })
+
+EXPORT_REPORTS = {
+    "dashboard": _collect_dashboard_data,
+}
+
+# Rows moved per Redis command when writing or reading an export's rows
+EXPORT_ROWS_CHUNK = 1000
+
+def _export_key(user_id: str, export_id: str) -> str:
+    """Redis key holding an export's status"""
+    return f"analytics:export:{user_id}:{export_id}"
+
+def _export_rows_key(user_id: str, export_id: str) -> str:
+    """Redis list holding an export's rows, one JSON-encoded row per item"""
+    return f"analytics:export:{user_id}:{export_id}:rows"
+
+async def _write_export_rows(redis_client: Any, key: str, rows: Iterator[Tuple[str, Any]]) -> None:
+    """Append rows to an export's list a chunk at a time, so they are never all encoded at once"""
+    await redis_client.delete(key)
+    while chunk := list(itertools.islice(rows, EXPORT_ROWS_CHUNK)):
+        await redis_client.rpush(key, *(orjson.dumps(row, default=str) for row in chunk))
+    await redis_client.expire(key, settings.REDIS_EXPIRE_TIME)
+
+async def _read_export_rows(redis_client: Any, key: str) -> AsyncIterator[List[Any]]:
+    """Read an export's rows back one LRANGE chunk at a time"""
+    start = 0
+    while True:
+        chunk = await redis_client.lrange(key, start, start + EXPORT_ROWS_CHUNK - 1)
+        if chunk:
+            yield [orjson.loads(raw) for raw in chunk]
+        if len(chunk) < EXPORT_ROWS_CHUNK:
+            return
+        start += EXPORT_ROWS_CHUNK
+
+async def _run_export(user_id: str, export_data: Dict[str, Any], property_ids: List[str]) -> None:
+    """Build an export off the request path and record the outcome"""
+    try:
+        redis_client = get_redis_client()
+        if not redis_client:
+            raise RuntimeError("Redis is not available to store the export")
+        
+        report = await EXPORT_REPORTS[export_data["report_type"]](
+            property_ids, export_data["date_range"], user_id
+        )
+        await _write_export_rows(
+            redis_client,
+            _export_rows_key(user_id, export_data["export_id"]),
+            _flatten_report(report)
+        )
+        export_data = {
+            **export_data,
+            "status": "completed",
+            "download_url": f"/api/v1/analytics/export/{export_data['export_id']}/download"
+        }
+    except Exception as e:
+        logger.error(f"Error generating export {export_data['export_id']}: {e}")
+        export_data = {**export_data, "status": "failed"}
+    
+    await set_cached_json(
+        _export_key(user_id, export_data["export_id"]),
+        export_data,
+        settings.REDIS_EXPIRE_TIME
+    )
+
+def _flatten_report(data: Any, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """Flatten nested report sections into (metric path, value) rows"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _flatten_report(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(data, list):
+        for index, value in enumerate(data):
+            yield from _flatten_report(value, f"{prefix}[{index}]")
+    else:
+        yield prefix, data
+
+async def _csv_stream(row_chunks: AsyncIterator[List[Any]]) -> AsyncIterator[str]:
+    """Yield CSV output one chunk of rows at a time, so only one chunk is held in memory"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(("metric", "value"))
+    async for rows in row_chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    yield buffer.getvalue()
+
+# Caps in-flight analytics calls across all requests handled by this worker,
+# so concurrent dashboards can't exhaust the DB pool or downstream APIs
+_ANALYTICS_SEM = asyncio.Semaphore(settings.ANALYTICS_MAX_CONCURRENCY)
+
+async def _bounded(coro: Any) -> Any:
+    """Await a downstream analytics call once a concurrency slot is free"""
+    async with _ANALYTICS_SEM:
+        return await coro
+
+async def _gather_sections(sections: Dict[str, Any]) -> Dict[str, Any]:
+    """Await independent analytics coroutines concurrently, keyed by section name"""
+    results = await asyncio.gather(*(_bounded(coro) for coro in sections.values()))
+    return dict(zip(sections.keys(), results))
+
+async def _calculate_service_metrics(
+    service: Any,
+    metric_names: List[str],
+    property_ids: List[str],
+    date_range: str,
+    filters: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Calculate several custom metrics from one analytics service
+    
+    Uses the service's batched calculate_custom_metrics when it has one and
+    otherwise runs the single-metric calls concurrently.
+    """
+    metric_names = list(dict.fromkeys(metric_names))
+    if hasattr(service, "calculate_custom_metrics"):
+        return await service.calculate_custom_metrics(
+            metric_names=metric_names,
+            property_ids=property_ids,
+            date_range=date_range,
+            filters=filters
+        )
+    
+    results = await asyncio.gather(*(
+        service.calculate_custom_metric(
+            metric_name=metric_name,
+            property_ids=property_ids,
+            date_range=date_range,
+            filters=filters
+        )
+        for metric_name in metric_names
+    ))
+    return dict(zip(metric_names, results))
+
+def _canonical_custom_request(request: AnalyticsRequest, property_ids: List[str]) -> Dict[str, Any]:
+    """Normalize a custom analytics request so equivalent bodies share a cache key
+    
+    Metric and property order carries no meaning, so both are de-duplicated
+    and sorted; filters are canonicalized by the sorted-key JSON encoding in
+    build_cache_key.
+    """
+    return {
+        "metrics": sorted(set(request.metrics)),
+        "date_range": request.date_range,
+        "property_ids": sorted(set(property_ids)),
+        "filters": request.filters or {}
+    }
+
 async def _get_user_properties(user_id: str) -> List[str]:
     """Get list of properties accessible to user"""
     # Mock implementation - replace with actual property service call
     return ["property_1", "property_2", "property_3"]
 
-async def _validate_property_access(property_id: str, user_id: str) -> bool:
+def _validate_property_access(property_id: str, user_properties: FrozenSet[str]) -> bool:
     """Validate user has access to property"""
-    # Mock implementation - replace with actual access control
-    user_properties = await _get_user_properties(user_id)
     if property_id not in user_properties:
         raise HTTPException(
             status_code=403,
@@ -418,28 +740,76 @@ async def _validate_property_access(property_id: str, user_id: str) -> bool:
         )
     return True
 
+def _validate_property_access_bulk(property_ids: List[str], user_properties: FrozenSet[str]) -> bool:
+    """Validate user has access to every property in the list"""
+    denied = [property_id for property_id in property_ids if property_id not in user_properties]
+    if denied:
+        raise HTTPException(
+            status_code=403,
+            detail=f"Access denied to specified properties: {', '.join(denied)}"
+        )
+    return True
+
 async def _get_summary_metrics(property_ids: List[str], date_range: str, user_id: str) -> Dict[str, Any]:
     """Get high-level summary metrics"""
-    # Mock implementation - replace with actual calculations
-    return {
-        "total_properties": len(property_ids),
-        "total_units": 45,
-        "occupancy_rate": 92.5,
-        "monthly_revenue": 125000,
-        "pending_maintenance": 8,
-        "active_tenants": 42
-    }
+    # Mock implementation - replace with per-property rows from the database
+    property_count = len(property_ids)
+    return _summarize_portfolio(
+        units=np.full(property_count, 15),
+        occupied_units=np.full(property_count, 14),
+        monthly_revenue=np.full(property_count, 125000 / max(property_count, 1)),
+        pending_maintenance=np.resize([3, 3, 2], property_count)
+    )
 
 async def _get_trend_analysis(property_ids: List[str], date_range: str, user_id: str) -> Dict[str, Any]:
     """Get trend analysis data"""
-    # Mock implementation - replace with actual trend calculations
+    # Mock implementation - replace with monthly series from the database
+    series = {
+        "occupancy_trend": [88.0, 89.5, 90.1, 91.0, 92.2, 92.5],
+        "revenue_trend": [124000, 125500, 124800, 125200, 124900, 125000],
+        "maintenance_trend": [14, 13, 11, 10, 9, 8],
+        "tenant_satisfaction_trend": [3.9, 4.0, 4.0, 4.1, 4.2, 4.3]
+    }
+    return dict(zip(series.keys(), _trend_directions(np.array(list(series.values()), dtype=float))))
+
+def _summarize_portfolio(
+    units: np.ndarray,
+    occupied_units: np.ndarray,
+    monthly_revenue: np.ndarray,
+    pending_maintenance: np.ndarray
+) -> Dict[str, Any]:
+    """Aggregate per-property columns into portfolio summary metrics"""
+    total_units = int(np.sum(units))
+    occupied = int(np.sum(occupied_units))
     return {
-        "occupancy_trend": "increasing",
-        "revenue_trend": "stable", 
-        "maintenance_trend": "decreasing",
-        "tenant_satisfaction_trend": "increasing"
+        "total_properties": int(np.size(units)),
+        "total_units": total_units,
+        "occupancy_rate": round(occupied / total_units * 100, 1) if total_units else 0.0,
+        "monthly_revenue": round(float(np.sum(monthly_revenue)), 2),
+        "pending_maintenance": int(np.sum(pending_maintenance)),
+        "active_tenants": occupied
     }
 
+# Relative change per period below which a series is reported as stable
+TREND_STABLE_THRESHOLD = 0.005
+
+def _trend_directions(series: np.ndarray) -> List[str]:
+    """Classify each row of a (metrics x periods) array as increasing, stable or decreasing
+    
+    Fits a least-squares slope to every row in one call and compares it to
+    the row mean, so series on different scales share one threshold.
+    """
+    if series.shape[1] < 2:
+        return ["stable"] * series.shape[0]
+    
+    slopes = np.polyfit(np.arange(series.shape[1]), series.T, 1)[0]
+    means = np.abs(series.mean(axis=1))
+    relative = np.divide(slopes, means, out=np.zeros_like(slopes), where=means > 0)
+    
+    directions = np.where(relative > TREND_STABLE_THRESHOLD, "increasing", "stable")
+    directions = np.where(relative < -TREND_STABLE_THRESHOLD, "decreasing", directions)
+    return directions.tolist()
+
 async def _get_analytics_alerts(property_ids: List[str], user_id: str) -> List[Dict[str, Any]]:
     """Get analytics-based alerts and recommendations"""
     # Mock implementation - replace with actual alert logic
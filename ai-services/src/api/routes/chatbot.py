@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List
 import logging
+import orjson
 from datetime import datetime
 
 from ..auth import get_current_user
-from ...chatbot.intelligent_agent import chatbot_service
+from ...chatbot.intelligent_agent import chatbot_service, DEFAULT_HISTORY_PAGE_SIZE
 from ...models.conversation import Conversation
 from ...utils.database import get_db_session
 
@@ -27,12 +29,14 @@ class ChatResponse(BaseModel):
 
 class ConversationHistoryResponse(BaseModel):
     messages: List[Dict[str, Any]]
-    total_count: int
     conversation_id: str
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 @router.post("/chat", response_model=ChatResponse)
 async def send_message(
     message_data: ChatMessage,
+    background_tasks: BackgroundTasks,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Send a message to the AI chatbot"""
@@ -48,14 +52,22 @@ async def send_message(
         # Get suggested actions if this is a new conversation
         suggestions = None
         if not message_data.conversation_id:
-            suggestions = await chatbot_service.agent.get_suggested_actions(
+            suggestions = await chatbot_service.get_suggested_actions(
                 current_user["id"]
             )
         
+        # Warm suggestions and the first history page while the user reads the reply
+        if result["status"] == "success":
+            background_tasks.add_task(
+                chatbot_service.prewarm_caches,
+                current_user["id"],
+                result.get("conversation_id")
+            )
+        
         return ChatResponse(
             response=result["response"],
             conversation_id=result.get("conversation_id"),
-            timestamp=result.get("timestamp", datetime.utcnow().isoformat()),
+            timestamp=result.get("timestamp") or datetime.utcnow().isoformat(),
             status=result["status"],
             suggestions=[s.get("title") for s in suggestions[:3]] if suggestions else None
         )
@@ -67,24 +79,72 @@ async def send_message(
             detail="Failed to process message"
         )
 
+@router.post("/chat/stream")
+async def stream_message(
+    message_data: ChatMessage,
+    background_tasks: BackgroundTasks,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Send a message and receive the reply as server-sent events
+    
+    Each event's data is a JSON object: ``{"type": "token", "content": ...}``
+    for every answer token as the LLM generates it, then one
+    ``{"type": "result", ...}`` with the same fields as /chat. Clients should
+    send ``Accept: text/event-stream`` so the response skips gzip, which
+    would otherwise hold tokens back until its buffer fills.
+    """
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            async for event in chatbot_service.stream_message(
+                user_id=current_user["id"],
+                message=message_data.message,
+                conversation_id=message_data.conversation_id,
+                context=message_data.context
+            ):
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+        except Exception as e:
+            logger.error(f"Error in chat stream endpoint: {e}")
+            yield b"data: " + orjson.dumps({"type": "error", "detail": "Failed to process message"}) + b"\n\n"
+            return
+        
+        # Warm suggestions and the first history page while the user reads the reply
+        # (runs once the stream has closed)
+        if event.get("status") == "success":
+            background_tasks.add_task(
+                chatbot_service.prewarm_caches,
+                current_user["id"],
+                event.get("conversation_id")
+            )
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/conversations/{conversation_id}/history", response_model=ConversationHistoryResponse)
 async def get_conversation_history(
     conversation_id: str,
-    limit: int = 50,
+    limit: int = Query(DEFAULT_HISTORY_PAGE_SIZE, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="ID of the last message from the previous page"),
+    no_cache: bool = Query(False, description="Bypass cached pages and read from the database"),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
-    """Get conversation history"""
+    """Get conversation history, newest first, one page at a time"""
     try:
-        messages = await chatbot_service.get_conversation_history(
+        page = await chatbot_service.get_conversation_history(
             user_id=current_user["id"],
             conversation_id=conversation_id,
-            limit=limit
+            limit=limit,
+            cursor=cursor,
+            no_cache=no_cache
         )
         
         return ConversationHistoryResponse(
-            messages=messages,
-            total_count=len(messages),
-            conversation_id=conversation_id
+            messages=page["messages"],
+            conversation_id=conversation_id,
+            next_cursor=page["next_cursor"],
+            has_more=page["has_more"]
         )
         
     except Exception as e:
@@ -100,7 +160,7 @@ async def get_suggested_actions(
 ):
     """Get suggested actions for the user"""
     try:
-        suggestions = await chatbot_service.agent.get_suggested_actions(
+        suggestions = await chatbot_service.get_suggested_actions(
             current_user["id"]
         )
         
@@ -154,29 +214,44 @@ async def chatbot_health():
 
 # WebSocket endpoint for real-time chat (optional enhancement)
 from fastapi import WebSocket, WebSocketDisconnect
-import json
 
 @router.websocket("/ws/{user_id}")
 async def websocket_chat(websocket: WebSocket, user_id: str):
     """WebSocket endpoint for real-time chat"""
     await websocket.accept()
     
+    # Conversation state kept for the life of the socket so clients only
+    # need to send conversation_id/context when they change
+    session_state: Dict[str, Any] = {"conversation_id": None, "context": None}
+    
     try:
         while True:
             # Receive message
             data = await websocket.receive_text()
-            message_data = json.loads(data)
+            message_data = orjson.loads(data)
             
-            # Process message
-            result = await chatbot_service.send_message(
-                user_id=user_id,
-                message=message_data.get("message", ""),
-                conversation_id=message_data.get("conversation_id"),
-                context=message_data.get("context")
-            )
+            for field in ("conversation_id", "context"):
+                if message_data.get(field) is not None:
+                    session_state[field] = message_data[field]
+            
+            message_kwargs = {
+                "user_id": user_id,
+                "message": message_data.get("message", ""),
+                "conversation_id": session_state["conversation_id"],
+                "context": session_state["context"]
+            }
+            
+            if message_data.get("stream"):
+                # Stream answer tokens as they are generated, then the final result
+                async for event in chatbot_service.stream_message(**message_kwargs):
+                    await websocket.send_text(orjson.dumps(event).decode())
+                result = event
+            else:
+                result = await chatbot_service.send_message(**message_kwargs)
+                await websocket.send_text(orjson.dumps(result).decode())
             
-            # Send response
-            await websocket.send_text(json.dumps(result))
+            if result.get("conversation_id"):
+                session_state["conversation_id"] = result["conversation_id"]
             
     except WebSocketDisconnect:
         logger.info(f"WebSocket connection closed for user {user_id}")
@@ -0,0 +1,73 @@
+from langchain.embeddings.base import Embeddings
+from typing import List, Optional, Set, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingBatcher:
+    """Coalesces embedding requests from concurrent callers into shared batches
+
+    ``embed`` queues a text and waits on a future. A background task takes
+    whatever is queued, waiting up to ``max_wait`` seconds after the first
+    text or until ``max_batch_size`` texts are in hand, and sends them in a
+    single ``aembed_documents`` request, so users asking at the same moment
+    share one round trip. Flushes run as their own tasks, so a slow provider
+    call doesn't hold up the next batch.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = 64, max_wait: float = 0.02):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed one text as part of the next batch"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts, all joining the same batches as other callers"""
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            flush = asyncio.create_task(self._flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Send one batch and resolve its callers' futures"""
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = dict(zip(texts, await self.embeddings.aembed_documents(texts)))
+        except Exception as e:
+            logger.error(f"Error embedding a batch of {len(texts)} texts: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, future in batch:
+            if not future.done():
+                future.set_result(vectors[text])
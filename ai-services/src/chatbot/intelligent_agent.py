@@ -1,82 +1,48 @@
 from langchain.agents import Tool, AgentExecutor, create_react_agent
-from langchain.memory import ConversationBufferWindowMemory
-from langchain.prompts import PromptTemplate
+from langchain.agents.openai_functions_multi_agent.base import OpenAIMultiFunctionsAgent
+from langchain.prompts import PromptTemplate, MessagesPlaceholder
+from langchain.schema import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain.chat_models import ChatOpenAI, ChatAnthropic
 from langchain.embeddings import OpenAIEmbeddings
-from langchain.vectorstores import Pinecone
 from langchain.tools import BaseTool
-from typing import Dict, List, Any, Optional
-import json
+from langchain.callbacks.base import BaseCallbackHandler
+from typing import AsyncIterator, Dict, List, Any, Optional
+import asyncio
 import logging
+import orjson
 from datetime import datetime, timedelta
+from functools import lru_cache
+from cachetools import TTLCache
 
-from ..utils.database import get_db_session
+from ..utils.database import get_db_session, execute_query_ro, RECENT_TURNS_QUERY, HISTORY_PAGE_QUERY
 from ..utils.redis_client import get_redis_client
+from ..utils.cache import get_cached_json, set_cached_json, delete_cached
+from ..config.settings import settings
 from ..models.conversation import Conversation
+from .memory import AsyncSummaryBufferMemory, ConversationMemoryStore
+from .semantic_cache import SemanticCache, is_read_only_turn
+from .intent_router import route_intent
+from .streaming import AgentTokenStream
 from .tools.property_tools import PropertySearchTool, PropertyBookingTool
 from .tools.payment_tools import PaymentProcessingTool, PaymentStatusTool
 from .tools.maintenance_tools import MaintenanceRequestTool, MaintenanceStatusTool
-from .tools.lease_tools import LeaseManagementTool, LeaseDocumentTool
+from .tools.lease_tools import (
+    LeaseViewTool,
+    LeaseRenewTool,
+    LeaseTerminateTool,
+    LeaseModifyTool,
+    LeaseStatusTool,
+    LeaseDocumentTool,
+)
 
 logger = logging.getLogger(__name__)
 
-class PropertyManagementAgent:
-    """Intelligent AI agent for property management tasks"""
-    
-    def __init__(self):
-        self.llm = self._initialize_llm()
-        self.memory = ConversationBufferWindowMemory(
-            memory_key="chat_history",
-            k=10,
-            return_messages=True
-        )
-        self.tools = self._initialize_tools()
-        self.agent = self._create_agent()
-        self.agent_executor = AgentExecutor.from_agent_and_tools(
-            agent=self.agent,
-            tools=self.tools,
-            memory=self.memory,
-            verbose=True,
-            max_iterations=5
-        )
-        
-    def _initialize_llm(self):
-        """Initialize the language model"""
-        model_provider = os.getenv("LLM_PROVIDER", "openai")
-        
-        if model_provider == "openai":
-            return ChatOpenAI(
-                model="gpt-4",
-                temperature=0.3,
-                max_tokens=1000
-            )
-        elif model_provider == "anthropic":
-            return ChatAnthropic(
-                model="claude-3-sonnet-20240229",
-                temperature=0.3,
-                max_tokens=1000
-            )
-        else:
-            raise ValueError(f"Unsupported LLM provider: {model_provider}")
-    
-    def _initialize_tools(self) -> List[BaseTool]:
-        """Initialize all available tools for the agent"""
-        return [
-            PropertySearchTool(),
-            PropertyBookingTool(),
-            PaymentProcessingTool(),
-            PaymentStatusTool(),
-            MaintenanceRequestTool(),
-            MaintenanceStatusTool(),
-            LeaseManagementTool(),
-            LeaseDocumentTool(),
-        ]
-    
-    def _create_agent(self):
-        """Create the React agent with custom prompt"""
-        prompt = PromptTemplate(
-            input_variables=["tools", "tool_names", "input", "agent_scratchpad", "chat_history"],
-            template="""
+def encode_context(context: Dict[str, Any]) -> str:
+    """Serialize request context as compact JSON for the agent prompt and conversation log"""
+    return orjson.dumps(context, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+# System prompt shared by the function-calling and ReAct agents
+AGENT_SYSTEM_PROMPT = """
 You are PropFlow AI, an intelligent property management assistant. You help with:
 
 1. Property search and booking
@@ -85,14 +51,6 @@ You are PropFlow AI, an intelligent property management assistant. You help with
 4. Lease management and documentation
 5. General property management questions
 
-You have access to the following tools:
-{tools}
-
-Tool names: {tool_names}
-
-Previous conversation:
-{chat_history}
-
 Guidelines:
 - Be helpful, professional, and friendly
 - Always verify user identity when handling sensitive operations
@@ -100,6 +58,21 @@ Guidelines:
 - Ask for clarification when needed
 - Use tools when appropriate to complete tasks
 - Handle errors gracefully and suggest alternatives
+- When a request needs several independent tool calls, make them all in one step
+""".strip()
+
+# ReAct prompt for providers without function calling; tools are bound once per agent
+REACT_PROMPT = PromptTemplate(
+    input_variables=["tools", "tool_names", "input", "agent_scratchpad", "chat_history"],
+    template=AGENT_SYSTEM_PROMPT + """
+
+You have access to the following tools:
+{tools}
+
+Tool names: {tool_names}
+
+Previous conversation:
+{chat_history}
 
 Current conversation:
 Human: {input}
@@ -107,6 +80,139 @@ Human: {input}
 Thought: I need to understand what the human is asking for and determine if I need to use any tools.
 {agent_scratchpad}
 """
+)
+
+# Chat rate limit: messages per fixed window, per user
+RATE_LIMIT_MESSAGES = 30
+RATE_LIMIT_WINDOW_SECONDS = 60
+RATE_LIMIT_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+# Page size clients load when a conversation is opened; only this page is cached in Redis
+DEFAULT_HISTORY_PAGE_SIZE = 50
+
+# LLM and embedding clients are stateless and thread-safe, so each worker builds
+# them once, on first use, and every agent and cache shares the same clients
+@lru_cache(maxsize=1)
+def get_chat_llm():
+    """Get the chat model that drives the agent
+    
+    Both chat models have native async clients (openai ``acreate`` over
+    aiohttp, ``AsyncAnthropic``), which the agent executor uses, so an
+    in-flight completion never holds the event loop. The timeout and retry
+    cap keep a slow provider from pinning a request for minutes. Streaming is
+    on so callers that attach a token callback see the answer as it is
+    generated; callers that don't still get the aggregated message.
+    """
+    model_provider = settings.LLM_PROVIDER
+    
+    if model_provider == "openai":
+        return ChatOpenAI(
+            model=settings.LLM_MODEL,
+            temperature=settings.LLM_TEMPERATURE,
+            max_tokens=settings.LLM_MAX_TOKENS,
+            request_timeout=settings.LLM_REQUEST_TIMEOUT,
+            max_retries=settings.LLM_MAX_RETRIES,
+            streaming=True
+        )
+    elif model_provider == "anthropic":
+        return ChatAnthropic(
+            model="claude-3-sonnet-20240229",
+            temperature=settings.LLM_TEMPERATURE,
+            max_tokens=settings.LLM_MAX_TOKENS,
+            default_request_timeout=settings.LLM_REQUEST_TIMEOUT,
+            streaming=True
+        )
+    else:
+        raise ValueError(f"Unsupported LLM provider: {model_provider}")
+
+@lru_cache(maxsize=1)
+def get_summary_llm():
+    """Get the small, cheap model used to summarize older turns"""
+    if settings.LLM_PROVIDER == "anthropic":
+        return ChatAnthropic(
+            model="claude-instant-1",
+            temperature=0,
+            max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+            default_request_timeout=settings.LLM_REQUEST_TIMEOUT
+        )
+    return ChatOpenAI(
+        model=settings.LLM_SUMMARY_MODEL,
+        temperature=0,
+        max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+        request_timeout=settings.LLM_REQUEST_TIMEOUT,
+        max_retries=settings.LLM_MAX_RETRIES
+    )
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> Optional[OpenAIEmbeddings]:
+    """Get the embeddings client, or None when no OpenAI key is configured"""
+    if not settings.OPENAI_API_KEY:
+        return None
+    return OpenAIEmbeddings(openai_api_key=settings.OPENAI_API_KEY)
+
+class PropertyManagementAgent:
+    """Intelligent AI agent for property management tasks"""
+    
+    def __init__(self):
+        self.llm = get_chat_llm()
+        # The agent is shared by every conversation in the worker, so memory is
+        # loaded per request from Redis and passed in as chat_history
+        self.memory_store = ConversationMemoryStore(ttl=settings.CHAT_MEMORY_TTL)
+        self.tools = self._initialize_tools()
+        self.agent = self._create_agent()
+        self.agent_executor = AgentExecutor.from_agent_and_tools(
+            agent=self.agent,
+            tools=self.tools,
+            verbose=True,
+            max_iterations=5,
+            return_intermediate_steps=True
+        )
+        
+    def _initialize_tools(self) -> List[BaseTool]:
+        """Initialize all available tools for the agent
+        
+        Payment tools answer in compact JSON here: the agent's LLM reads
+        their output and writes the reply, so the markdown is never shown.
+        """
+        return [
+            PropertySearchTool(),
+            PropertyBookingTool(),
+            PaymentProcessingTool(output_mode="compact"),
+            PaymentStatusTool(output_mode="compact"),
+            MaintenanceRequestTool(),
+            MaintenanceStatusTool(),
+            LeaseViewTool(),
+            LeaseRenewTool(),
+            LeaseTerminateTool(),
+            LeaseModifyTool(),
+            LeaseStatusTool(),
+            LeaseDocumentTool(),
+        ]
+    
+    def _create_agent(self):
+        """Create the agent for the configured LLM
+        
+        OpenAI models get a multi-function agent, which can return several
+        tool calls per step; AgentExecutor runs those concurrently with
+        asyncio.gather. Other providers use the single-action ReAct agent.
+        """
+        if isinstance(self.llm, ChatOpenAI):
+            return OpenAIMultiFunctionsAgent.from_llm_and_tools(
+                llm=self.llm,
+                tools=self.tools,
+                system_message=SystemMessage(content=AGENT_SYSTEM_PROMPT),
+                extra_prompt_messages=[MessagesPlaceholder(variable_name="chat_history")]
+            )
+        
+        prompt = REACT_PROMPT.partial(
+            tools="\n".join(f"{tool.name}: {tool.description.strip()}" for tool in self.tools),
+            tool_names=", ".join(tool.name for tool in self.tools)
         )
         
         return create_react_agent(
@@ -120,39 +226,36 @@ Thought: I need to understand what the human is asking for and determine if I ne
         message: str,
         user_id: str,
         conversation_id: Optional[str] = None,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        callbacks: Optional[List[BaseCallbackHandler]] = None
     ) -> Dict[str, Any]:
         """Process a user message and return response"""
         try:
-            # Load conversation history if conversation_id is provided
-            if conversation_id:
-                await self._load_conversation_history(conversation_id)
+            memory = await self._load_memory(user_id, conversation_id)
             
             # Add context to the input if provided
             enhanced_input = message
             if context:
-                enhanced_input = f"Context: {json.dumps(context)}\nUser message: {message}"
+                enhanced_input = f"Context: {encode_context(context)}\nUser message: {message}"
             
             # Process the message
-            response = await self.agent_executor.arun(
-                input=enhanced_input,
-                user_id=user_id
+            outputs = await self.agent_executor.acall(
+                {"input": enhanced_input, "user_id": user_id, **memory.load_memory_variables({})},
+                callbacks=callbacks
             )
+            response = outputs["output"]
             
-            # Save conversation
-            await self._save_conversation(
-                user_id=user_id,
-                conversation_id=conversation_id,
-                user_message=message,
-                ai_response=response,
-                context=context
-            )
+            await self._remember_turn(memory, user_id, conversation_id, enhanced_input, message, response, context)
             
             return {
                 "response": response,
                 "conversation_id": conversation_id,
                 "timestamp": datetime.utcnow().isoformat(),
-                "status": "success"
+                "status": "success",
+                "tool_calls": [
+                    (action.tool, action.tool_input)
+                    for action, _ in outputs["intermediate_steps"]
+                ]
             }
             
         except Exception as e:
@@ -163,15 +266,98 @@ Thought: I need to understand what the human is asking for and determine if I ne
                 "status": "error"
             }
     
-    async def _load_conversation_history(self, conversation_id: str):
-        """Load previous conversation history"""
+    async def record_turn(
+        self,
+        user_id: str,
+        conversation_id: Optional[str],
+        message: str,
+        response: str
+    ):
+        """Record a turn answered without the agent, so follow-ups can refer to it"""
         try:
-            async with get_db_session() as session:
-                # Load recent messages from database
-                # Implementation depends on your database schema
-                pass
+            memory = await self._load_memory(user_id, conversation_id)
+            await self._remember_turn(memory, user_id, conversation_id, message, message, response)
+        except Exception as e:
+            logger.error(f"Error recording conversation turn: {e}")
+    
+    async def _remember_turn(
+        self,
+        memory: AsyncSummaryBufferMemory,
+        user_id: str,
+        conversation_id: Optional[str],
+        memory_input: str,
+        message: str,
+        response: str,
+        context: Optional[Dict[str, Any]] = None
+    ):
+        """Add a turn to the conversation's memory and save it"""
+        memory.save_context({"input": memory_input}, {"output": response})
+        try:
+            await memory.aprune()
+        except Exception as e:
+            logger.error(f"Error summarizing conversation memory: {e}")
+        
+        if conversation_id:
+            await self.memory_store.save(
+                user_id,
+                conversation_id,
+                memory.moving_summary_buffer,
+                memory.chat_memory.messages
+            )
+        
+        # Save conversation
+        await self._save_conversation(
+            user_id=user_id,
+            conversation_id=conversation_id,
+            user_message=message,
+            ai_response=response,
+            context=context
+        )
+    
+    def _new_memory(self) -> AsyncSummaryBufferMemory:
+        """Create empty memory for one conversation turn"""
+        # Recent turns stay verbatim; older ones are folded into a running summary
+        return AsyncSummaryBufferMemory(
+            llm=get_summary_llm(),
+            max_token_limit=settings.CHAT_MEMORY_MAX_TOKENS,
+            prune_target_tokens=settings.CHAT_MEMORY_PRUNE_TARGET_TOKENS,
+            memory_key="chat_history",
+            input_key="input",
+            output_key="output",
+            return_messages=True
+        )
+    
+    async def _load_memory(self, user_id: str, conversation_id: Optional[str]) -> AsyncSummaryBufferMemory:
+        """Load a conversation's memory from Redis, falling back to the database"""
+        memory = self._new_memory()
+        if not conversation_id:
+            return memory
+        
+        stored = await self.memory_store.load(user_id, conversation_id)
+        if stored is not None:
+            memory.moving_summary_buffer, memory.chat_memory.messages = stored
+        else:
+            memory.chat_memory.messages = await self._load_conversation_history(user_id, conversation_id)
+        return memory
+    
+    async def _load_conversation_history(self, user_id: str, conversation_id: str) -> List[BaseMessage]:
+        """Load the most recent turns of a conversation from the database"""
+        try:
+            rows = await execute_query_ro(
+                RECENT_TURNS_QUERY,
+                conversation_id,
+                user_id,
+                settings.CHAT_MEMORY_COLD_TURNS
+            )
         except Exception as e:
             logger.error(f"Error loading conversation history: {e}")
+            return []
+        
+        messages: List[BaseMessage] = []
+        for row in reversed(rows):
+            messages.append(HumanMessage(content=row["message"]))
+            messages.append(AIMessage(content=row["response"]))
+        return messages
     
     async def _save_conversation(
         self,
@@ -184,7 +370,9 @@ Thought: I need to understand what the human is asking for and determine if I ne
         """Save conversation to database"""
         try:
             async with get_db_session() as session:
-                # Save conversation to database
+                # Save conversation to database. Pass the context dict as is:
+                # the pool's jsonb codec encodes it, so a pre-serialized JSON
+                # string would be stored as a JSON string and never match @>
                 # Implementation depends on your database schema
                 pass
         except Exception as e:
@@ -231,15 +419,51 @@ class ChatbotService:
     """Service class for chatbot operations"""
     
     def __init__(self):
-        self.agent = PropertyManagementAgent()
-        self.redis_client = get_redis_client()
+        # Built on first use so importing this module stays cheap
+        self._agent: Optional[PropertyManagementAgent] = None
+        self._semantic_cache: Optional[SemanticCache] = None
+        # Per-worker history pages keyed on (user_id, conversation_id, limit, cursor)
+        self._history_pages = TTLCache(
+            maxsize=settings.HISTORY_LOCAL_CACHE_SIZE,
+            ttl=settings.HISTORY_CACHE_TTL
+        )
+        self._history_pages_lock = asyncio.Lock()
+    
+    @property
+    def agent(self) -> PropertyManagementAgent:
+        if self._agent is None:
+            self._agent = PropertyManagementAgent()
+        return self._agent
+    
+    @property
+    def redis_client(self):
+        # Redis is connected during app startup, after this module is imported
+        return get_redis_client()
+    
+    @property
+    def semantic_cache(self) -> Optional[SemanticCache]:
+        """Reply cache for repeated read-only questions, if enabled"""
+        if self._semantic_cache is None and settings.SEMANTIC_CACHE_ENABLED:
+            embeddings = get_embeddings()
+            if embeddings is not None:
+                self._semantic_cache = SemanticCache(
+                    embeddings=embeddings,
+                    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                    ttl=settings.SEMANTIC_CACHE_TTL,
+                    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+                    local_max_entries=settings.SEMANTIC_CACHE_LOCAL_ENTRIES,
+                    batch_max_size=settings.EMBED_BATCH_MAX_SIZE,
+                    batch_max_wait=settings.EMBED_BATCH_MAX_WAIT_MS / 1000
+                )
+        return self._semantic_cache
     
     async def send_message(
         self,
         user_id: str,
         message: str,
         conversation_id: Optional[str] = None,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        callbacks: Optional[List[BaseCallbackHandler]] = None
     ) -> Dict[str, Any]:
         """Send a message to the chatbot"""
         
@@ -250,56 +474,231 @@ class ChatbotService:
                 "status": "rate_limited"
             }
         
+        # Simple, unambiguous requests go straight to their tool without the LLM
+        routed_tool = None if context else route_intent(message)
+        if routed_tool is not None:
+            response = await routed_tool.arun({"user_id": user_id})
+            await self._record_direct_reply(user_id, conversation_id, message, response)
+            return {
+                "response": response,
+                "conversation_id": conversation_id,
+                "timestamp": datetime.utcnow().isoformat(),
+                "status": "success"
+            }
+        
+        # Replies to context-free questions can be reused while nothing has changed
+        use_semantic_cache = self.semantic_cache is not None and not context
+        if use_semantic_cache:
+            cached_response = await self.semantic_cache.lookup(user_id, message)
+            if cached_response is not None:
+                await self._record_direct_reply(user_id, conversation_id, message, cached_response)
+                return {
+                    "response": cached_response,
+                    "conversation_id": conversation_id,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "status": "success"
+                }
+        
         # Process the message
         result = await self.agent.process_message(
             message=message,
             user_id=user_id,
             conversation_id=conversation_id,
-            context=context
+            context=context,
+            callbacks=callbacks
         )
+        tool_calls = result.pop("tool_calls", [])
+        
+        if result["status"] == "success":
+            if not is_read_only_turn(tool_calls):
+                # The turn changed the user's state (a payment, a lease, a
+                # maintenance request), so replies and suggestions built on
+                # the old state are stale
+                await self.invalidate_suggested_actions(user_id)
+                if self.semantic_cache is not None:
+                    await self.semantic_cache.invalidate(user_id)
+            elif use_semantic_cache:
+                await self.semantic_cache.store(user_id, message, result["response"])
         
-        # Update rate limiting
-        await self._update_rate_limit(user_id)
+        # Cached history pages are stale once a new message lands
+        if conversation_id:
+            await self._invalidate_history(user_id, conversation_id)
         
         return result
     
+    async def _record_direct_reply(
+        self,
+        user_id: str,
+        conversation_id: Optional[str],
+        message: str,
+        response: str
+    ):
+        """Keep a turn the agent didn't run in memory and history, like an agent turn"""
+        await self.agent.record_turn(user_id, conversation_id, message, response)
+        if conversation_id:
+            await self._invalidate_history(user_id, conversation_id)
+    
+    async def stream_message(
+        self,
+        user_id: str,
+        message: str,
+        conversation_id: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Send a message, yielding answer tokens as the LLM generates them
+        
+        Yields ``{"type": "token", "content": ...}`` events followed by one
+        ``{"type": "result", ...}`` event carrying the same fields as
+        send_message. Routed and cached replies arrive as the result alone.
+        """
+        stream = AgentTokenStream()
+        task = asyncio.create_task(self.send_message(
+            user_id=user_id,
+            message=message,
+            conversation_id=conversation_id,
+            context=context,
+            callbacks=[stream]
+        ))
+        task.add_done_callback(lambda _: stream.close())
+        
+        async for token in stream:
+            yield {"type": "token", "content": token}
+        yield {"type": "result", **(await task)}
+    
+    async def prewarm_caches(self, user_id: str, conversation_id: Optional[str] = None):
+        """Populate the caches the client is likely to hit right after a chat turn"""
+        warmups = [self.get_suggested_actions(user_id)]
+        if conversation_id:
+            warmups.append(self.get_conversation_history(user_id, conversation_id))
+        await asyncio.gather(*warmups, return_exceptions=True)
+    
+    async def get_suggested_actions(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get suggested actions, cached per user for a short TTL"""
+        key = self._suggestions_key(user_id)
+        cached = await get_cached_json(key)
+        if cached is not None:
+            return cached
+        
+        suggestions = await self.agent.get_suggested_actions(user_id)
+        await set_cached_json(key, suggestions, settings.SUGGESTIONS_CACHE_TTL)
+        return suggestions
+    
+    async def invalidate_suggested_actions(self, user_id: str):
+        """Drop cached suggestions after an event that changes them"""
+        await delete_cached(self._suggestions_key(user_id))
+    
+    @staticmethod
+    def _suggestions_key(user_id: str) -> str:
+        return f"suggestions:{user_id}"
+    
     async def get_conversation_history(
         self,
         user_id: str,
         conversation_id: str,
-        limit: int = 50
-    ) -> List[Dict[str, Any]]:
-        """Get conversation history"""
+        limit: int = DEFAULT_HISTORY_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        no_cache: bool = False
+    ) -> Dict[str, Any]:
+        """Get one page of conversation history, newest first
+        
+        Pages are kept in a small per-worker TTL cache so refreshes and
+        scrollback don't hit the database. The opening page (no cursor,
+        default size) is also read through Redis so it can be prefetched by
+        ``prewarm_caches``. ``no_cache`` skips both caches and refreshes them.
+        """
+        local_key = (user_id, conversation_id, limit, cursor)
+        if not no_cache:
+            async with self._history_pages_lock:
+                page = self._history_pages.get(local_key)
+            if page is not None:
+                return page
+        
         try:
-            # Retrieve from database
-            return []
+            if cursor is None and limit == DEFAULT_HISTORY_PAGE_SIZE:
+                key = self._history_key(user_id, conversation_id)
+                page = None if no_cache else await get_cached_json(key)
+                if page is None:
+                    page = await self._fetch_conversation_history(user_id, conversation_id, limit, cursor)
+                    await set_cached_json(key, page, settings.HISTORY_CACHE_TTL)
+            else:
+                page = await self._fetch_conversation_history(user_id, conversation_id, limit, cursor)
         except Exception as e:
             logger.error(f"Error getting conversation history: {e}")
-            return []
+            return {"messages": [], "next_cursor": None, "has_more": False}
+        
+        async with self._history_pages_lock:
+            self._history_pages[local_key] = page
+        return page
     
-    async def _is_rate_limited(self, user_id: str) -> bool:
-        """Check if user is rate limited"""
-        if not self.redis_client:
-            return False
+    async def _invalidate_history(self, user_id: str, conversation_id: str):
+        """Drop every cached history page for a conversation"""
+        async with self._history_pages_lock:
+            for key in list(self._history_pages.keys()):
+                if key[:2] == (user_id, conversation_id):
+                    self._history_pages.pop(key, None)
+        await delete_cached(self._history_key(user_id, conversation_id))
+    
+    @staticmethod
+    def _history_key(user_id: str, conversation_id: str) -> str:
+        return f"history:{user_id}:{conversation_id}"
+    
+    async def _fetch_conversation_history(
+        self,
+        user_id: str,
+        conversation_id: str,
+        limit: int,
+        cursor: Optional[str]
+    ) -> Dict[str, Any]:
+        """Query one page of conversation history, newest first
         
-        try:
-            key = f"rate_limit:{user_id}"
-            count = await self.redis_client.get(key)
-            return int(count or 0) > 30  # 30 messages per minute
-        except Exception:
-            return False
+        Uses keyset pagination on (created_at, id): ``cursor`` is the ID of the
+        last message from the previous page, so each page costs O(limit)
+        regardless of how long the conversation is.
+        """
+        rows = await execute_query_ro(
+            HISTORY_PAGE_QUERY,
+            conversation_id,
+            user_id,
+            cursor,
+            limit + 1
+        )
+        
+        has_more = len(rows) > limit
+        messages = [
+            {
+                "id": str(row["id"]),
+                "message": row["message"],
+                "response": row["response"],
+                "context": row["context"],
+                "created_at": row["created_at"].isoformat()
+            }
+            for row in rows[:limit]
+        ]
+        
+        return {
+            "messages": messages,
+            "next_cursor": messages[-1]["id"] if has_more else None,
+            "has_more": has_more
+        }
     
-    async def _update_rate_limit(self, user_id: str):
-        """Update rate limiting counter"""
+    async def _is_rate_limited(self, user_id: str) -> bool:
+        """Count this message against the user's window and check the limit
+        
+        INCR and the window's EXPIRE run as one Lua script: a single round
+        trip, and the TTL is set exactly once when the window opens, so a
+        busy user's counter can't be kept alive or left without an expiry.
+        """
         if not self.redis_client:
-            return
+            return False
         
         try:
-            key = f"rate_limit:{user_id}"
-            await self.redis_client.incr(key)
-            await self.redis_client.expire(key, 60)  # 1 minute expiry
+            count = await self.redis_client.eval(
+                RATE_LIMIT_SCRIPT, 1, f"rate_limit:{user_id}", RATE_LIMIT_WINDOW_SECONDS
+            )
+            return int(count) > RATE_LIMIT_MESSAGES
         except Exception as e:
             logger.error(f"Error updating rate limit: {e}")
+            return False
 
 # Global chatbot service instance
 chatbot_service = ChatbotService()
\ No newline at end of file
@@ -0,0 +1,32 @@
+from langchain.tools import BaseTool
+from typing import List, Optional, Pattern, Tuple
+import re
+
+from .semantic_cache import normalize_query
+from .tools.lease_tools import LeaseViewTool, LeaseStatusTool
+
+# Messages that unambiguously map to one read-only tool call with no
+# arguments beyond the user. Patterns match the whole normalized message,
+# so anything with extra detail still goes to the agent.
+INTENT_ROUTES: List[Tuple[Pattern[str], BaseTool]] = [
+    (
+        re.compile(r"(please )?(show|list|view|see|get)( me)?( all)? my (current |active )?leases?( please)?"),
+        LeaseViewTool()
+    ),
+    (
+        re.compile(r"(when|what date) (does|do|will) my leases? (end|expire|run out)"),
+        LeaseStatusTool()
+    ),
+    (
+        re.compile(r"(what is |what s |whats )?(the )?(status of my leases?|my leases? status)"),
+        LeaseStatusTool()
+    ),
+]
+
+def route_intent(message: str) -> Optional[BaseTool]:
+    """Return the tool that fully answers a message, if it matches a known intent"""
+    normalized = normalize_query(message)
+    for pattern, tool in INTENT_ROUTES:
+        if pattern.fullmatch(normalized):
+            return tool
+    return None
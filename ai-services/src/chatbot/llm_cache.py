@@ -0,0 +1,46 @@
+from langchain.schema import BaseCache
+from langchain.schema.cache import RETURN_VAL_TYPE
+from typing import Any, Optional
+from cachetools import TTLCache
+import hashlib
+
+class PromptCache(BaseCache):
+    """Per-worker cache of LLM generations keyed on the exact prompt
+
+    Installed as ``langchain.llm_cache``, so every chat model call (agent
+    steps and summaries alike) checks it before going to the provider. The
+    key is a hash of the serialized prompt and the model's parameters, with
+    runs of whitespace collapsed, so prompts that differ only in spacing
+    share an entry and nothing else does. Case and punctuation are kept:
+    "$1,500" and "1500", or two property IDs differing in case, are not the
+    same request.
+
+    Matching is exact on purpose: agent prompts carry tool observations, and
+    two prompts that differ only in an amount or a status would be close
+    enough for an embedding match while needing different answers. Reply
+    level similarity matching is SemanticCache's job, in front of the agent.
+
+    LangChain consults the cache synchronously, even from the async
+    generation path, so entries live in memory rather than behind the async
+    Redis client.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self._entries: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl)
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        normalized = " ".join(prompt.split())
+        return hashlib.sha256(f"{llm_string}\n{normalized}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return the generations stored for this prompt and model, if any"""
+        return self._entries.get(self._key(prompt, llm_string))
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Remember the generations returned for this prompt and model"""
+        self._entries[self._key(prompt, llm_string)] = return_val
+
+    def clear(self, **kwargs: Any) -> None:
+        """Drop every cached generation"""
+        self._entries.clear()
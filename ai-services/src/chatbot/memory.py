@@ -0,0 +1,142 @@
+from langchain.chains import LLMChain
+from langchain.memory import ConversationSummaryBufferMemory
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain.schema.messages import BaseMessage, get_buffer_string, messages_from_dict, messages_to_dict
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import orjson
+
+from ..utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Rough characters per token, for when the LLM's tokenizer can't be loaded
+CHARS_PER_TOKEN = 4
+
+# Cleared the first time the tokenizer fails, so later turns in this worker
+# go straight to the estimate instead of retrying (and re-downloading)
+_tokenizer_available = True
+
+class AsyncSummaryBufferMemory(ConversationSummaryBufferMemory):
+    """Summary buffer memory that summarizes off the event loop
+
+    ConversationSummaryBufferMemory prunes inside save_context, which the
+    agent executor calls synchronously, so the summarizer request would block
+    the event loop. Here save_context only records the turn and the caller
+    awaits ``aprune`` once the response is ready.
+
+    Pruning is done in bulk: the buffer only grows until it passes
+    ``max_token_limit`` and is then cut back to ``prune_target_tokens``. The
+    prompt prefix therefore stays byte-identical for many turns in a row,
+    which keeps provider prompt caching effective.
+    """
+
+    prune_target_tokens: int = 400
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        """Save context from this conversation to buffer without pruning"""
+        BaseChatMemory.save_context(self, inputs, outputs)
+
+    def count_tokens(self, messages: List[BaseMessage]) -> int:
+        """Count tokens with the LLM's tokenizer, estimating from length if it is unavailable
+        
+        OpenAI models count with tiktoken, which also has to download its
+        encoding on first use; if either fails, pruning still has to happen,
+        so the worker switches to a characters-per-token estimate for good.
+        """
+        global _tokenizer_available
+        if _tokenizer_available:
+            try:
+                return self.llm.get_num_tokens_from_messages(messages)
+            except Exception as e:
+                logger.warning(f"Token counting unavailable, estimating from message length: {e}")
+                _tokenizer_available = False
+        return sum(len(message.content) // CHARS_PER_TOKEN + 1 for message in messages)
+
+    async def aprune(self) -> None:
+        """Fold the oldest turns into the running summary once over the token limit"""
+        buffer = self.chat_memory.messages
+        # Each message is counted once and its count subtracted as it is
+        # pruned; the per-message sum slightly overestimates the buffer as a
+        # whole, which only makes pruning start a little early
+        token_counts = [self.count_tokens([message]) for message in buffer]
+        total_tokens = sum(token_counts)
+        if total_tokens <= self.max_token_limit:
+            return
+
+        pruned_memory = []
+        for message_tokens in token_counts:
+            if total_tokens <= self.prune_target_tokens:
+                break
+            pruned_memory.append(buffer.pop(0))
+            total_tokens -= message_tokens
+
+        chain = LLMChain(llm=self.llm, prompt=self.prompt)
+        self.moving_summary_buffer = await chain.apredict(
+            summary=self.moving_summary_buffer,
+            new_lines=get_buffer_string(
+                pruned_memory,
+                human_prefix=self.human_prefix,
+                ai_prefix=self.ai_prefix
+            )
+        )
+
+class ConversationMemoryStore:
+    """Chat memory kept in Redis so every worker sees the same conversation
+    
+    Two tiers are stored per conversation: the recent turns verbatim (hot)
+    and the running summary of older turns (warm). Both expire together after
+    ``ttl`` seconds of inactivity, after which the caller rebuilds memory
+    from the message log in the database (cold).
+    
+    Keys are scoped by user as well as conversation, like the database
+    fallback, so a conversation ID sent by another user finds nothing.
+    """
+    
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+    
+    @staticmethod
+    def _keys(user_id: str, conversation_id: str) -> Tuple[str, str]:
+        prefix = f"chat_memory:{user_id}:{conversation_id}"
+        return f"{prefix}:messages", f"{prefix}:summary"
+    
+    async def load(self, user_id: str, conversation_id: str) -> Optional[Tuple[str, List[BaseMessage]]]:
+        """Return (summary, recent messages), or None when nothing is stored"""
+        redis_client = get_redis_client()
+        if not redis_client:
+            return None
+        
+        messages_key, summary_key = self._keys(user_id, conversation_id)
+        try:
+            pipe = redis_client.pipeline()
+            pipe.lrange(messages_key, 0, -1)
+            pipe.get(summary_key)
+            raw_messages, summary = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error loading chat memory for conversation {conversation_id}: {e}")
+            return None
+        
+        if not raw_messages and summary is None:
+            return None
+        if isinstance(summary, bytes):
+            summary = summary.decode()
+        return summary or "", messages_from_dict([orjson.loads(raw) for raw in raw_messages])
+    
+    async def save(self, user_id: str, conversation_id: str, summary: str, messages: List[BaseMessage]):
+        """Replace the stored tiers with the memory's state after a turn"""
+        redis_client = get_redis_client()
+        if not redis_client:
+            return
+        
+        messages_key, summary_key = self._keys(user_id, conversation_id)
+        try:
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.delete(messages_key)
+            if messages:
+                pipe.rpush(messages_key, *[orjson.dumps(message) for message in messages_to_dict(messages)])
+                pipe.expire(messages_key, self.ttl)
+            pipe.set(summary_key, summary, ex=self.ttl)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error saving chat memory for conversation {conversation_id}: {e}")
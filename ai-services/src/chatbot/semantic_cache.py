@@ -0,0 +1,244 @@
+from langchain.embeddings.base import Embeddings
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+from cachetools import LRUCache
+import logging
+import re
+import time
+import numpy as np
+import orjson
+
+from ..utils.redis_client import get_redis_client
+from .embed_batcher import EmbeddingBatcher
+
+logger = logging.getLogger(__name__)
+
+# Tools (and, where a tool multiplexes, actions) that only read state. A turn
+# that called anything else changed something, so its reply is never reused.
+READ_ONLY_TOOL_ACTIONS: Dict[str, Optional[FrozenSet[str]]] = {
+    "lease_management": frozenset({"view", "status"}),
+    "lease_view": None,
+    "lease_status": None,
+    "maintenance_status": None,
+    "payment_status": None,
+    "property_search": None,
+    "property_details": None,
+}
+
+def normalize_query(text: str) -> str:
+    """Lower-case a message and strip punctuation and repeated whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+def is_read_only_turn(tool_calls: Sequence[Tuple[str, Any]]) -> bool:
+    """Check that every tool call in an agent turn only read state"""
+    for tool, tool_input in tool_calls:
+        if tool not in READ_ONLY_TOOL_ACTIONS:
+            return False
+
+        actions = READ_ONLY_TOOL_ACTIONS[tool]
+        if actions is not None:
+            action = tool_input.get("action", "") if isinstance(tool_input, dict) else ""
+            if str(action).lower() not in actions:
+                return False
+    return True
+
+class LocalSemanticTier:
+    """Per-worker front tier of the semantic cache
+    
+    Embeddings of the most recent entries, across all users, sit in one
+    preallocated float32 matrix, so scoring a query against every entry is a
+    single matrix-vector product (one SGEMV in numpy's BLAS) with no Redis
+    read and no decoding of stored vectors. Slots are reused oldest first.
+    
+    Entries are tagged with the user's cache generation; a lookup only
+    considers entries from the current one, so an invalidation in any worker
+    retires them here too.
+    """
+    
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._matrix: Optional[np.ndarray] = None
+        self._owners = np.zeros(max_entries, dtype=np.int64)
+        self._generations = np.zeros(max_entries, dtype=np.int64)
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._entries: List[Optional[Tuple[str, str]]] = [None] * max_entries  # (user_id, response)
+        self._next = 0
+    
+    def lookup(self, user_id: str, generation: int, vector: np.ndarray, threshold: float) -> Optional[str]:
+        """Return the reply of the closest live entry for this user, if close enough"""
+        if self._matrix is None:
+            return None
+        
+        live = (
+            (self._owners == hash(user_id))
+            & (self._generations == generation)
+            & (self._expires > time.monotonic())
+        )
+        if not live.any():
+            return None
+        
+        scores = self._matrix @ vector
+        scores[~live] = -np.inf
+        best = int(np.argmax(scores))
+        entry = self._entries[best]
+        if scores[best] >= threshold and entry is not None and entry[0] == user_id:
+            return entry[1]
+        return None
+    
+    def add(self, user_id: str, generation: int, vector: np.ndarray, response: str):
+        """Store an entry in the oldest slot"""
+        if self._matrix is None:
+            self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+        
+        slot = self._next
+        self._next = (slot + 1) % self.max_entries
+        self._matrix[slot] = vector
+        self._owners[slot] = hash(user_id)
+        self._generations[slot] = generation
+        self._expires[slot] = time.monotonic() + self.ttl
+        self._entries[slot] = (user_id, response)
+
+class SemanticCache:
+    """Per-user cache of agent replies matched by embedding similarity
+
+    Entries live in a capped Redis list per user holding the normalized query,
+    its unit-length embedding and the reply. A lookup first tries an exact
+    match on the normalized text, which needs no embedding call, then the
+    closest stored query by cosine similarity.
+
+    Embeddings depend only on the normalized text, so they are memoized per
+    worker and shared across users; a store right after a missed lookup
+    reuses the vector instead of paying for a second request. Texts that do
+    need embedding go through an EmbeddingBatcher, so concurrent users'
+    queries share embedding requests.
+    
+    When the query's embedding is already memoized, the per-worker
+    LocalSemanticTier is consulted before Redis; replies stored or matched
+    in Redis are added to it.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        threshold: float,
+        ttl: int,
+        max_entries: int,
+        local_max_entries: int = 1024,
+        batch_max_size: int = 64,
+        batch_max_wait: float = 0.02
+    ):
+        self.embeddings = embeddings
+        self._batcher = EmbeddingBatcher(embeddings, max_batch_size=batch_max_size, max_wait=batch_max_wait)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._vectors: LRUCache = LRUCache(maxsize=1024)
+        self._local = LocalSemanticTier(max_entries=local_max_entries, ttl=ttl)
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"semantic_cache:{user_id}"
+
+    @staticmethod
+    def _generation_key(user_id: str) -> str:
+        return f"semantic_cache_generation:{user_id}"
+
+    async def lookup(self, user_id: str, query: str) -> Optional[str]:
+        """Return a cached reply for a query similar enough to a previous one"""
+        redis_client = get_redis_client()
+        if not redis_client:
+            return None
+
+        try:
+            normalized = normalize_query(query)
+            
+            # A memoized vector makes the local tier free to check first;
+            # without one the stored entries are needed anyway, so they are
+            # read in the same round trip as the generation
+            vector = self._vectors.get(normalized)
+            if vector is not None:
+                generation = int(await redis_client.get(self._generation_key(user_id)) or 0)
+                response = self._local.lookup(user_id, generation, vector, self.threshold)
+                if response is not None:
+                    return response
+                raw_entries = await redis_client.lrange(self._key(user_id), 0, -1)
+            else:
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.get(self._generation_key(user_id))
+                pipe.lrange(self._key(user_id), 0, -1)
+                raw_generation, raw_entries = await pipe.execute()
+                generation = int(raw_generation or 0)
+
+            if not raw_entries:
+                return None
+
+            entries = [orjson.loads(raw) for raw in raw_entries]
+            best = next((i for i, entry in enumerate(entries) if entry["query"] == normalized), None)
+            if best is None:
+                vector = await self._embed(normalized)
+                matrix = np.asarray([entry["embedding"] for entry in entries], dtype=np.float32)
+                scores = matrix @ vector
+                best = int(np.argmax(scores))
+                if scores[best] < self.threshold:
+                    return None
+
+            entry = entries[best]
+            self._local.add(user_id, generation, np.asarray(entry["embedding"], dtype=np.float32), entry["response"])
+            return entry["response"]
+        except Exception as e:
+            logger.error(f"Error reading semantic cache for user {user_id}: {e}")
+        return None
+
+    async def store(self, user_id: str, query: str, response: str):
+        """Remember the reply to a read-only query"""
+        redis_client = get_redis_client()
+        if not redis_client:
+            return
+
+        try:
+            normalized = normalize_query(query)
+            vector = await self._embed(normalized)
+            entry = orjson.dumps({
+                "query": normalized,
+                "embedding": vector.tolist(),
+                "response": response
+            })
+
+            key = self._key(user_id)
+            pipe = redis_client.pipeline()
+            pipe.lpush(key, entry)
+            pipe.ltrim(key, 0, self.max_entries - 1)
+            pipe.expire(key, self.ttl)
+            pipe.get(self._generation_key(user_id))
+            *_, generation = await pipe.execute()
+            self._local.add(user_id, int(generation or 0), vector, response)
+        except Exception as e:
+            logger.error(f"Error writing semantic cache for user {user_id}: {e}")
+
+    async def invalidate(self, user_id: str):
+        """Forget every cached reply for a user after their state changed"""
+        redis_client = get_redis_client()
+        if not redis_client:
+            return
+
+        try:
+            pipe = redis_client.pipeline()
+            pipe.delete(self._key(user_id))
+            pipe.incr(self._generation_key(user_id))
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error clearing semantic cache for user {user_id}: {e}")
+
+    async def _embed(self, text: str) -> np.ndarray:
+        return (await self._embed_many([text]))[0]
+
+    async def _embed_many(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts as unit vectors, batching everything not already memoized"""
+        missing = list(dict.fromkeys(text for text in texts if text not in self._vectors))
+        if missing:
+            matrix = np.asarray(await self._batcher.embed_many(missing), dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+            for text, vector in zip(missing, matrix):
+                self._vectors[text] = vector
+        return [self._vectors[text] for text in texts]
@@ -0,0 +1,29 @@
+from langchain.callbacks.base import AsyncCallbackHandler
+from typing import Any, AsyncIterator, Optional
+import asyncio
+
+class AgentTokenStream(AsyncCallbackHandler):
+    """Collects LLM tokens from every step of an agent run into one async stream
+
+    LangChain's AsyncIteratorCallbackHandler stops at the first on_llm_end,
+    which for an agent is the tool-selection step, not the answer. This one
+    stays open until ``close`` is called when the whole run is finished.
+    """
+
+    def __init__(self):
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        # Function-call chunks carry no content; only answer text is streamed
+        if token:
+            self.queue.put_nowait(token)
+
+    def close(self) -> None:
+        self.queue.put_nowait(None)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        while True:
+            token = await self.queue.get()
+            if token is None:
+                return
+            yield token
@@ -0,0 +1,47 @@
+from langchain.tools import BaseTool
+from pydantic import ValidationError
+from typing import Any, ClassVar, Dict, Union
+
+class PydanticV2Tool(BaseTool):
+    """BaseTool whose structured input is validated through the Pydantic v2 API
+
+    LangChain's BaseTool validates with the v1 ``parse_obj``/``dict`` calls,
+    which under Pydantic 2 go through deprecation shims that raise a warning
+    on every tool call. ``model_validate``/``model_dump`` call pydantic-core
+    directly. Subclasses must annotate ``args_schema: Type[BaseModel]``; BaseTool's
+    v1 metaclass leaves an unannotated schema class out of the field, so the
+    input would never be validated.
+    
+    Input the schema rejects is answered with the message registered for the
+    first offending field in ``invalid_input_messages`` instead of raising
+    out of the agent.
+    """
+
+    invalid_input_messages: ClassVar[Dict[str, str]] = {}
+
+    def run(self, tool_input: Union[str, Dict], *args: Any, **kwargs: Any) -> Any:
+        try:
+            return super().run(tool_input, *args, **kwargs)
+        except ValidationError as e:
+            return self._invalid_input_message(e)
+
+    async def arun(self, tool_input: Union[str, Dict], *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await super().arun(tool_input, *args, **kwargs)
+        except ValidationError as e:
+            return self._invalid_input_message(e)
+
+    def _invalid_input_message(self, error: ValidationError) -> str:
+        for detail in error.errors():
+            if detail["loc"] and detail["loc"][0] in self.invalid_input_messages:
+                return self.invalid_input_messages[detail["loc"][0]]
+        return f"Invalid input: {error}"
+
+    def _parse_input(self, tool_input: Union[str, Dict]) -> Union[str, Dict[str, Any]]:
+        if isinstance(tool_input, str) or self.args_schema is None:
+            return super()._parse_input(tool_input)
+
+        # Tool schemas are flat, so the validated attributes can be handed to
+        # _run as they are, without a model_dump serialization pass
+        result = self.args_schema.model_validate(tool_input)
+        return {k: v for k, v in result.__dict__.items() if k in tool_input}
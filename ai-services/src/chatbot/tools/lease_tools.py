@@ -1,12 +1,129 @@
 from langchain.tools import BaseTool
-from typing import Dict, Any, Optional, List
+from typing import ClassVar, Dict, Any, Optional, List
+import asyncio
 import json
 import logging
-from datetime import datetime, timedelta
+import uuid
+from datetime import datetime, timedelta, timezone
+from cachetools import TTLCache
 from pydantic import BaseModel, Field
 
+from ...utils.cache import get_cached_json, set_cached_json
+
 logger = logging.getLogger(__name__)
 
+def _parse_lease_dates(lease: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse a lease's ISO date strings once, when it is loaded
+    
+    Adds start_datetime/end_datetime next to the raw strings so the
+    formatters never re-parse them.
+    """
+    for field in ("start_date", "end_date"):
+        if lease.get(field):
+            lease[field.replace("_date", "_datetime")] = datetime.fromisoformat(
+                lease[field].replace('Z', '+00:00')
+            )
+    return lease
+
+def _days_until_expiry(lease: Dict[str, Any], now: datetime) -> int:
+    """Whole days from ``now`` until the lease ends"""
+    return (lease['end_datetime'] - now).days
+
+# Seconds a fetched lease is reused by the lease tools in this worker
+LEASE_CACHE_TTL = 60
+
+# Days a generated lease document stays valid, and how long it is reused
+LEASE_DOCUMENT_TTL_DAYS = 30
+
+# Mock lease store - replace with actual API call
+_MOCK_LEASES: Dict[str, Dict[str, Any]] = {
+    "LEASE_123": {
+        "id": "LEASE_123",
+        "version": 1,
+        "property_name": "Downtown Apartment Complex",
+        "unit": "2B",
+        "status": "active",
+        "start_date": "2023-06-01T00:00:00Z",
+        "end_date": "2024-05-31T23:59:59Z",
+        "rent_amount": 2500,
+        "security_deposit": 2500,
+        "required_notice_days": 30,
+        "early_termination_fee": 2500,
+        "rent_status": "Current",
+        "outstanding_fees": 0,
+        "recent_activity": "Rent payment received January 1, 2024"
+    }
+}
+
+class LeaseRepository:
+    """Lease lookups shared by every lease tool, cached per worker
+    
+    A user moving from "view my lease" to "generate my lease agreement" hits
+    the lease store once; entries expire after LEASE_CACHE_TTL seconds and
+    are dropped when an action changes the lease.
+    """
+    
+    def __init__(self, ttl: int = LEASE_CACHE_TTL, maxsize: int = 1024):
+        self._leases: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._user_leases: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    async def get_lease(self, lease_id: str) -> Optional[Dict[str, Any]]:
+        """Get detailed lease information"""
+        return (await self.get_leases_by_ids([lease_id])).get(lease_id)
+    
+    async def get_leases_by_ids(self, lease_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several leases in one lookup, keyed by lease ID"""
+        found = {lease_id: self._leases[lease_id] for lease_id in lease_ids if lease_id in self._leases}
+        missing = [lease_id for lease_id in dict.fromkeys(lease_ids) if lease_id not in found]
+        if missing:
+            fetched = await self._fetch_leases(missing)
+            self._leases.update(fetched)
+            found.update(fetched)
+        return found
+    
+    async def get_user_leases(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get summaries of all of a user's leases"""
+        leases = self._user_leases.get(user_id)
+        if leases is None:
+            leases = await self._fetch_user_leases(user_id)
+            self._user_leases[user_id] = leases
+        return leases
+    
+    def invalidate(self, lease_id: str):
+        """Forget a lease after an action that changes it"""
+        self._leases.pop(lease_id, None)
+        self._user_leases.clear()
+    
+    async def _fetch_leases(self, lease_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch leases from the lease store - replace with actual API call
+        
+        Backed by a single ``WHERE id = ANY($1::text[])`` query (one round
+        trip on the shared pool) once wired to the lease store.
+        """
+        # Mock data - replace with actual API call
+        return {
+            lease_id: _parse_lease_dates(dict(_MOCK_LEASES[lease_id]))
+            for lease_id in lease_ids
+            if lease_id in _MOCK_LEASES
+        }
+    
+    async def _fetch_user_leases(self, user_id: str) -> List[Dict[str, Any]]:
+        """Fetch a user's leases from the lease store - replace with actual API call"""
+        # Mock data - replace with actual API call
+        leases = [
+            {
+                "id": "LEASE_123",
+                "property_name": "Downtown Apartment Complex",
+                "unit": "2B", 
+                "status": "active",
+                "end_date": "2024-05-31T23:59:59Z",
+                "rent_amount": 2500
+            }
+        ]
+        return [_parse_lease_dates(lease) for lease in leases]
+
+lease_repository = LeaseRepository()
+
 class LeaseManagementInput(BaseModel):
     user_id: str = Field(..., description="ID of the user")
     action: str = Field(..., description="Action to perform (view, renew, terminate, etc.)")
@@ -17,93 +134,45 @@ class LeaseManagementInput(BaseModel):
     end_date: Optional[str] = Field(None, description="Lease end date")
     rent_amount: Optional[float] = Field(None, description="Monthly rent amount")
 
+# Per-action schemas for the single-purpose lease tools: only the fields each
+# action reads, so the model doesn't pad its tool calls with nulls
+class LeaseViewInput(BaseModel):
+    user_id: str = Field(..., description="ID of the user")
+    lease_id: Optional[str] = Field(None, description="Lease ID, or several comma-separated IDs; omit to list all leases")
+
+class LeaseRenewInput(BaseModel):
+    user_id: str = Field(..., description="ID of the user")
+    lease_id: Optional[str] = Field(None, description="Lease to renew; omit to use the user's only active lease")
+
+class LeaseTerminateInput(BaseModel):
+    user_id: str = Field(..., description="ID of the user")
+    lease_id: str = Field(..., description="Lease to terminate")
+
+class LeaseModifyInput(BaseModel):
+    user_id: str = Field(..., description="ID of the user")
+    lease_id: str = Field(..., description="Lease to modify")
+
+class LeaseStatusInput(BaseModel):
+    user_id: str = Field(..., description="ID of the user")
+    lease_id: Optional[str] = Field(None, description="Lease to check; omit to list all leases")
+
 class LeaseDocumentInput(BaseModel):
     lease_id: str = Field(..., description="Lease ID")
     document_type: str = Field(..., description="Type of document to generate or retrieve")
     user_id: str = Field(..., description="ID of the user requesting the document")
 
-class LeaseManagementTool(BaseTool):
-    name = "lease_management"
-    description = """
-    Manage lease agreements including viewing current leases, renewal processes,
-    lease modifications, and termination procedures. Handles all lease lifecycle operations.
-    """
-    args_schema = LeaseManagementInput
-
-    def _run(
-        self,
-        user_id: str,
-        action: str,
-        lease_id: Optional[str] = None,
-        property_id: Optional[str] = None,
-        unit_id: Optional[str] = None,
-        start_date: Optional[str] = None,
-        end_date: Optional[str] = None,
-        rent_amount: Optional[float] = None,
-        **kwargs
-    ) -> str:
-        """Manage lease operations"""
-        try:
-            action = action.lower()
-            
-            if action == "view":
-                return self._view_leases(user_id, lease_id)
-            elif action == "renew":
-                return self._renew_lease(user_id, lease_id)
-            elif action == "terminate":
-                return self._terminate_lease(user_id, lease_id)
-            elif action == "modify":
-                return self._modify_lease(user_id, lease_id)
-            elif action == "status":
-                return self._lease_status(user_id, lease_id)
-            else:
-                return f"Invalid action '{action}'. Available actions: view, renew, terminate, modify, status"
-                
-        except Exception as e:
-            logger.error(f"Error in lease management: {e}")
-            return f"I encountered an error while managing your lease: {str(e)}"
+# Static response text is rendered once here; handlers only fill in lease fields
+LEASE_STATUS_EMOJI = {
+    "active": "✅",
+    "expired": "❌",
+    "pending": "⏳",
+    "terminated": "🚫"
+}
 
-    def _view_leases(self, user_id: str, lease_id: Optional[str] = None) -> str:
-        """View lease information"""
-        if lease_id:
-            lease_details = self._get_lease_details(lease_id)
-            if not lease_details:
-                return f"Lease with ID {lease_id} not found."
-            return self._format_lease_details(lease_details)
-        else:
-            leases = self._get_user_leases(user_id)
-            if not leases:
-                return "You don't have any active leases."
-            return self._format_lease_list(leases)
-
-    def _renew_lease(self, user_id: str, lease_id: Optional[str] = None) -> str:
-        """Handle lease renewal"""
-        if not lease_id:
-            # Get current lease for renewal
-            current_leases = self._get_user_leases(user_id)
-            active_leases = [l for l in current_leases if l['status'] == 'active']
-            
-            if not active_leases:
-                return "No active leases found for renewal."
-            elif len(active_leases) > 1:
-                lease_list = "\n".join([f"- {l['id']}: {l['property_name']} Unit {l['unit']}" for l in active_leases])
-                return f"Multiple active leases found. Please specify which lease to renew:\n{lease_list}"
-            else:
-                lease_id = active_leases[0]['id']
-        
-        lease_details = self._get_lease_details(lease_id)
-        if not lease_details:
-            return f"Lease {lease_id} not found."
-        
-        # Check if lease is eligible for renewal
-        end_date = datetime.fromisoformat(lease_details['end_date'].replace('Z', '+00:00'))
-        days_until_expiry = (end_date - datetime.now()).days
-        
-        if days_until_expiry > 90:
-            return f"""
+RENEWAL_TOO_EARLY_TEMPLATE = """
 ⏰ **Lease Renewal - Too Early**
 
-Your lease for {lease_details['property_name']} Unit {lease_details['unit']} doesn't expire until {end_date.strftime('%B %d, %Y')} ({days_until_expiry} days).
+Your lease for {property_name} Unit {unit} doesn't expire until {end_date} ({days_until_expiry} days).
 
 🗓️ **Renewal Timeline:**
 - Renewal applications typically open 60-90 days before expiration
@@ -114,26 +183,23 @@ Your lease for {lease_details['property_name']} Unit {lease_details['unit']} doe
 - Set a reminder for when renewal opens?
 - Show you current lease details?
 - Explain the renewal process?
-            """.strip()
-        
-        # Start renewal process
-        renewal_info = self._start_lease_renewal(lease_id)
-        
-        return f"""
+""".strip()
+
+RENEWAL_INITIATED_TEMPLATE = """
 ✅ **Lease Renewal Initiated**
 
-🏠 **Property:** {lease_details['property_name']} - Unit {lease_details['unit']}
-📅 **Current Lease Expires:** {end_date.strftime('%B %d, %Y')}
-💰 **Current Rent:** ${lease_details['rent_amount']:,}/month
+🏠 **Property:** {property_name} - Unit {unit}
+📅 **Current Lease Expires:** {end_date}
+💰 **Current Rent:** ${rent_amount:,}/month
 
 📋 **Renewal Options:**
-- **12-month renewal:** ${renewal_info['new_rent_12_month']:,}/month ({renewal_info['rent_increase_12_month']:.1f}% increase)
-- **6-month renewal:** ${renewal_info['new_rent_6_month']:,}/month ({renewal_info['rent_increase_6_month']:.1f}% increase)
+- **12-month renewal:** ${new_rent_12_month:,}/month ({rent_increase_12_month:.1f}% increase)
+- **6-month renewal:** ${new_rent_6_month:,}/month ({rent_increase_6_month:.1f}% increase)
 
 📅 **New Lease Dates:**
-- Start: {lease_details['end_date'][:10]}
-- End (12-month): {renewal_info['new_end_date_12_month']}
-- End (6-month): {renewal_info['new_end_date_6_month']}
+- Start: {new_start_date}
+- End (12-month): {new_end_date_12_month}
+- End (6-month): {new_end_date_6_month}
 
 📝 **Next Steps:**
 1. Review renewal terms
@@ -141,34 +207,20 @@ Your lease for {lease_details['property_name']} Unit {lease_details['unit']} doe
 3. Sign renewal agreement
 4. Submit any required documents
 
-⏰ **Response Deadline:** {renewal_info['response_deadline']}
+⏰ **Response Deadline:** {response_deadline}
 
 💬 **Ready to proceed?** Let me know which option you prefer or if you have questions about the terms.
-        """.strip()
+""".strip()
 
-    def _terminate_lease(self, user_id: str, lease_id: Optional[str] = None) -> str:
-        """Handle lease termination"""
-        if not lease_id:
-            return "Please provide the lease ID you want to terminate."
-        
-        lease_details = self._get_lease_details(lease_id)
-        if not lease_details:
-            return f"Lease {lease_id} not found."
-        
-        # Check termination rules
-        end_date = datetime.fromisoformat(lease_details['end_date'].replace('Z', '+00:00'))
-        days_until_expiry = (end_date - datetime.now()).days
-        required_notice = lease_details.get('required_notice_days', 30)
-        
-        return f"""
+TERMINATION_TEMPLATE = """
 ⚠️ **Lease Termination Request**
 
-🏠 **Property:** {lease_details['property_name']} - Unit {lease_details['unit']}
-📅 **Lease Expires:** {end_date.strftime('%B %d, %Y')} ({days_until_expiry} days)
+🏠 **Property:** {property_name} - Unit {unit}
+📅 **Lease Expires:** {end_date} ({days_until_expiry} days)
 
 📋 **Termination Requirements:**
 - **Notice Required:** {required_notice} days minimum
-- **Early Termination Fee:** ${lease_details.get('early_termination_fee', 0):,}
+- **Early Termination Fee:** ${early_termination_fee:,}
 - **Move-out Inspection:** Required
 - **Security Deposit:** Refundable minus deductions
 
@@ -196,14 +248,9 @@ Your lease for {lease_details['property_name']} Unit {lease_details['unit']} doe
 - Submit formal termination notice?
 - Schedule a consultation to discuss options?
 - Learn about the move-out process?
-        """.strip()
+""".strip()
 
-    def _modify_lease(self, user_id: str, lease_id: Optional[str] = None) -> str:
-        """Handle lease modifications"""
-        if not lease_id:
-            return "Please provide the lease ID you want to modify."
-        
-        return f"""
+LEASE_MODIFICATION_INFO = """
 📝 **Lease Modification Request**
 
 🔧 **Available Modifications:**
@@ -229,87 +276,259 @@ Your lease for {lease_details['property_name']} Unit {lease_details['unit']} doe
 Contact our leasing office at (555) 123-4567 or submit a request through the tenant portal.
 
 💬 **What type of modification are you interested in?**
-        """.strip()
+""".strip()
 
-    def _lease_status(self, user_id: str, lease_id: Optional[str] = None) -> str:
-        """Get lease status information"""
-        if lease_id:
-            lease_details = self._get_lease_details(lease_id)
-            if not lease_details:
-                return f"Lease {lease_id} not found."
-            
-            end_date = datetime.fromisoformat(lease_details['end_date'].replace('Z', '+00:00'))
-            days_until_expiry = (end_date - datetime.now()).days
-            
-            status_emoji = {
-                "active": "✅",
-                "expired": "❌", 
-                "pending": "⏳",
-                "terminated": "🚫"
-            }
-            
-            return f"""
+LEASE_STATUS_TEMPLATE = """
 📋 **Lease Status**
 
-{status_emoji.get(lease_details['status'], '❓')} **Status:** {lease_details['status'].title()}
-🏠 **Property:** {lease_details['property_name']} - Unit {lease_details['unit']}
-💰 **Rent:** ${lease_details['rent_amount']:,}/month
-📅 **Expires:** {end_date.strftime('%B %d, %Y')} ({days_until_expiry} days)
+{status_emoji} **Status:** {status}
+🏠 **Property:** {property_name} - Unit {unit}
+💰 **Rent:** ${rent_amount:,}/month
+📅 **Expires:** {end_date} ({days_until_expiry} days)
 
 📊 **Account Status:**
-- Rent Status: {lease_details.get('rent_status', 'Current')}
-- Security Deposit: ${lease_details.get('security_deposit', 0):,}
-- Late Fees: ${lease_details.get('outstanding_fees', 0):,}
+- Rent Status: {rent_status}
+- Security Deposit: ${security_deposit:,}
+- Late Fees: ${outstanding_fees:,}
 
 📝 **Recent Activity:**
-{lease_details.get('recent_activity', 'No recent activity')}
+{recent_activity}
 
 💡 **Upcoming Actions:**
-{self._get_upcoming_lease_actions(lease_details)}
-            """.strip()
+{upcoming_actions}
+""".strip()
+
+LEASE_DETAILS_TEMPLATE = """
+📋 **Lease Agreement Details**
+
+🏠 **Property:** {property_name} - Unit {unit}
+🆔 **Lease ID:** {id}
+✅ **Status:** {status}
+
+📅 **Lease Term:**
+- Start Date: {start_date}
+- End Date: {end_date}
+- Days Remaining: {days_until_expiry}
+
+💰 **Financial Details:**
+- Monthly Rent: ${rent_amount:,}
+- Security Deposit: ${security_deposit:,}
+- Outstanding Fees: ${outstanding_fees:,}
+
+📝 **Terms:**
+- Notice Required: {required_notice_days} days
+- Early Termination Fee: ${early_termination_fee:,}
+
+📊 **Current Status:**
+- Rent Status: {rent_status}
+- Last Activity: {recent_activity}
+
+💡 **Need Help?** Ask me about renewal, modifications, or termination options.
+""".strip()
+
+LEASE_LIST_ITEM_TEMPLATE = """
+**{index}. {property_name} - Unit {unit}**
+{status_emoji} Status: {status}
+💰 Rent: ${rent_amount:,}/month
+📅 Expires: {end_date} ({days_until_expiry} days)
+🆔 ID: {id}
+""".strip()
+
+LEASE_LIST_FOOTER = "💡 **Tip:** Ask me about a specific lease using its ID for more details!"
+
+class LeaseManagementTool(BaseTool):
+    name = "lease_management"
+    description = """
+    Manage lease agreements including viewing current leases, renewal processes,
+    lease modifications, and termination procedures. Handles all lease lifecycle operations.
+    """
+    args_schema = LeaseManagementInput
+
+    # Handler method for each action; all take (user_id, lease_id, now)
+    ACTION_HANDLERS: ClassVar[Dict[str, str]] = {
+        "view": "_view_leases",
+        "renew": "_renew_lease",
+        "terminate": "_terminate_lease",
+        "modify": "_modify_lease",
+        "status": "_lease_status",
+    }
+
+    def _run(
+        self,
+        user_id: str,
+        action: str,
+        lease_id: Optional[str] = None,
+        property_id: Optional[str] = None,
+        unit_id: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        rent_amount: Optional[float] = None,
+        **kwargs
+    ) -> str:
+        """Manage lease operations from a synchronous caller"""
+        return asyncio.run(self._arun(user_id=user_id, action=action, lease_id=lease_id))
+
+    async def _arun(
+        self,
+        user_id: str,
+        action: str,
+        lease_id: Optional[str] = None,
+        property_id: Optional[str] = None,
+        unit_id: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        rent_amount: Optional[float] = None,
+        **kwargs
+    ) -> str:
+        """Manage lease operations"""
+        try:
+            action = action.lower()
+            # One clock reading per request so every figure in a reply agrees;
+            # lease dates are UTC-aware, so "now" must be too
+            now = datetime.now(timezone.utc)
+            
+            handler = self.ACTION_HANDLERS.get(action)
+            if handler is None:
+                return f"Invalid action '{action}'. Available actions: {', '.join(self.ACTION_HANDLERS)}"
+            
+            return await getattr(self, handler)(user_id, lease_id, now)
+                
+        except Exception as e:
+            logger.error(f"Error in lease management: {e}")
+            return f"I encountered an error while managing your lease: {str(e)}"
+
+    async def _view_leases(self, user_id: str, lease_id: Optional[str], now: datetime) -> str:
+        """View lease information
+        
+        ``lease_id`` may be a comma-separated list; several leases are then
+        fetched in one batched lookup and shown as a list.
+        """
+        lease_ids = [i.strip() for i in lease_id.split(",") if i.strip()] if lease_id else []
+        if len(lease_ids) > 1:
+            found = await lease_repository.get_leases_by_ids(lease_ids)
+            missing = [i for i in lease_ids if i not in found]
+            if not found:
+                return f"Leases {', '.join(lease_ids)} not found."
+            response = self._format_lease_list([found[i] for i in lease_ids if i in found], now)
+            if missing:
+                response += f"\n\n⚠️ Not found: {', '.join(missing)}"
+            return response
+        elif lease_ids:
+            lease_details = await lease_repository.get_lease(lease_ids[0])
+            if not lease_details:
+                return f"Lease with ID {lease_id} not found."
+            return self._format_lease_details(lease_details, now)
         else:
-            return self._view_leases(user_id)
+            leases = await lease_repository.get_user_leases(user_id)
+            if not leases:
+                return "You don't have any active leases."
+            return self._format_lease_list(leases, now)
 
-    def _get_lease_details(self, lease_id: str) -> Optional[Dict[str, Any]]:
-        """Get detailed lease information - replace with actual API call"""
-        # Mock data - replace with actual API call
-        mock_leases = {
-            "LEASE_123": {
-                "id": "LEASE_123",
-                "property_name": "Downtown Apartment Complex",
-                "unit": "2B",
-                "status": "active",
-                "start_date": "2023-06-01T00:00:00Z",
-                "end_date": "2024-05-31T23:59:59Z",
-                "rent_amount": 2500,
-                "security_deposit": 2500,
-                "required_notice_days": 30,
-                "early_termination_fee": 2500,
-                "rent_status": "Current",
-                "outstanding_fees": 0,
-                "recent_activity": "Rent payment received January 1, 2024"
-            }
-        }
-        return mock_leases.get(lease_id)
+    async def _renew_lease(self, user_id: str, lease_id: Optional[str], now: datetime) -> str:
+        """Handle lease renewal"""
+        if not lease_id:
+            # Get current lease for renewal
+            current_leases = await lease_repository.get_user_leases(user_id)
+            active_leases = [l for l in current_leases if l['status'] == 'active']
+            
+            if not active_leases:
+                return "No active leases found for renewal."
+            elif len(active_leases) > 1:
+                lease_list = "\n".join([f"- {l['id']}: {l['property_name']} Unit {l['unit']}" for l in active_leases])
+                return f"Multiple active leases found. Please specify which lease to renew:\n{lease_list}"
+            else:
+                lease_id = active_leases[0]['id']
+        
+        lease_details = await lease_repository.get_lease(lease_id)
+        if not lease_details:
+            return f"Lease {lease_id} not found."
+        
+        # Check if lease is eligible for renewal
+        end_date = lease_details['end_datetime']
+        days_until_expiry = _days_until_expiry(lease_details, now)
+        
+        if days_until_expiry > 90:
+            return RENEWAL_TOO_EARLY_TEMPLATE.format(
+                property_name=lease_details['property_name'],
+                unit=lease_details['unit'],
+                end_date=end_date.strftime('%B %d, %Y'),
+                days_until_expiry=days_until_expiry
+            )
+        
+        # Start renewal process
+        renewal_info = await self._start_lease_renewal(lease_id, now)
+        lease_repository.invalidate(lease_id)
+        
+        return RENEWAL_INITIATED_TEMPLATE.format(
+            **renewal_info,
+            property_name=lease_details['property_name'],
+            unit=lease_details['unit'],
+            end_date=end_date.strftime('%B %d, %Y'),
+            rent_amount=lease_details['rent_amount'],
+            new_start_date=lease_details['end_date'][:10]
+        )
+
+    async def _terminate_lease(self, user_id: str, lease_id: Optional[str], now: datetime) -> str:
+        """Handle lease termination"""
+        if not lease_id:
+            return "Please provide the lease ID you want to terminate."
+        
+        lease_details = await lease_repository.get_lease(lease_id)
+        if not lease_details:
+            return f"Lease {lease_id} not found."
+        
+        # Check termination rules
+        end_date = lease_details['end_datetime']
+        days_until_expiry = _days_until_expiry(lease_details, now)
+        required_notice = lease_details.get('required_notice_days', 30)
+        
+        return TERMINATION_TEMPLATE.format(
+            property_name=lease_details['property_name'],
+            unit=lease_details['unit'],
+            end_date=end_date.strftime('%B %d, %Y'),
+            days_until_expiry=days_until_expiry,
+            required_notice=required_notice,
+            early_termination_fee=lease_details.get('early_termination_fee', 0)
+        )
+
+    async def _modify_lease(self, user_id: str, lease_id: Optional[str], now: datetime) -> str:
+        """Handle lease modifications"""
+        if not lease_id:
+            return "Please provide the lease ID you want to modify."
+        
+        return LEASE_MODIFICATION_INFO
 
-    def _get_user_leases(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get all user leases - replace with actual API call"""
-        # Mock data - replace with actual API call
-        return [
-            {
-                "id": "LEASE_123",
-                "property_name": "Downtown Apartment Complex",
-                "unit": "2B", 
-                "status": "active",
-                "end_date": "2024-05-31T23:59:59Z",
-                "rent_amount": 2500
-            }
-        ]
+    async def _lease_status(self, user_id: str, lease_id: Optional[str], now: datetime) -> str:
+        """Get lease status information"""
+        if lease_id:
+            lease_details = await lease_repository.get_lease(lease_id)
+            if not lease_details:
+                return f"Lease {lease_id} not found."
+            
+            end_date = lease_details['end_datetime']
+            days_until_expiry = _days_until_expiry(lease_details, now)
+            
+            return LEASE_STATUS_TEMPLATE.format(
+                status_emoji=LEASE_STATUS_EMOJI.get(lease_details['status'], '❓'),
+                status=lease_details['status'].title(),
+                property_name=lease_details['property_name'],
+                unit=lease_details['unit'],
+                rent_amount=lease_details['rent_amount'],
+                end_date=end_date.strftime('%B %d, %Y'),
+                days_until_expiry=days_until_expiry,
+                rent_status=lease_details.get('rent_status', 'Current'),
+                security_deposit=lease_details.get('security_deposit', 0),
+                outstanding_fees=lease_details.get('outstanding_fees', 0),
+                recent_activity=lease_details.get('recent_activity', 'No recent activity'),
+                upcoming_actions=self._get_upcoming_lease_actions(days_until_expiry)
+            )
+        else:
+            return await self._view_leases(user_id, None, now)
 
-    def _start_lease_renewal(self, lease_id: str) -> Dict[str, Any]:
+    async def _start_lease_renewal(self, lease_id: str, now: datetime) -> Dict[str, Any]:
         """Start lease renewal process - replace with actual API call"""
         # Mock renewal data - replace with actual API call
-        current_date = datetime.now()
+        current_date = now
         return {
             "new_rent_12_month": 2625,  # 5% increase
             "new_rent_6_month": 2750,   # 10% increase
@@ -320,11 +539,8 @@ Contact our leasing office at (555) 123-4567 or submit a request through the ten
             "response_deadline": (current_date + timedelta(days=30)).strftime('%B %d, %Y')
         }
 
-    def _get_upcoming_lease_actions(self, lease_details: Dict[str, Any]) -> str:
+    def _get_upcoming_lease_actions(self, days_until_expiry: int) -> str:
         """Get upcoming actions for lease"""
-        end_date = datetime.fromisoformat(lease_details['end_date'].replace('Z', '+00:00'))
-        days_until_expiry = (end_date - datetime.now()).days
-        
         if days_until_expiry <= 30:
             return "⚠️ Lease expires soon - consider renewal or move-out planning"
         elif days_until_expiry <= 90:
@@ -332,67 +548,93 @@ Contact our leasing office at (555) 123-4567 or submit a request through the ten
         else:
             return "✅ No immediate actions required"
 
-    def _format_lease_details(self, lease: Dict[str, Any]) -> str:
+    def _format_lease_details(self, lease: Dict[str, Any], now: datetime) -> str:
         """Format detailed lease information"""
-        end_date = datetime.fromisoformat(lease['end_date'].replace('Z', '+00:00'))
-        start_date = datetime.fromisoformat(lease['start_date'].replace('Z', '+00:00'))
-        days_until_expiry = (end_date - datetime.now()).days
+        end_date = lease['end_datetime']
+        start_date = lease['start_datetime']
+        days_until_expiry = _days_until_expiry(lease, now)
         
-        return f"""
-📋 **Lease Agreement Details**
-
-🏠 **Property:** {lease['property_name']} - Unit {lease['unit']}
-🆔 **Lease ID:** {lease['id']}
-✅ **Status:** {lease['status'].title()}
-
-📅 **Lease Term:**
-- Start Date: {start_date.strftime('%B %d, %Y')}
-- End Date: {end_date.strftime('%B %d, %Y')}
-- Days Remaining: {days_until_expiry}
-
-💰 **Financial Details:**
-- Monthly Rent: ${lease['rent_amount']:,}
-- Security Deposit: ${lease.get('security_deposit', 0):,}
-- Outstanding Fees: ${lease.get('outstanding_fees', 0):,}
-
-📝 **Terms:**
-- Notice Required: {lease.get('required_notice_days', 30)} days
-- Early Termination Fee: ${lease.get('early_termination_fee', 0):,}
-
-📊 **Current Status:**
-- Rent Status: {lease.get('rent_status', 'Current')}
-- Last Activity: {lease.get('recent_activity', 'None')}
-
-💡 **Need Help?** Ask me about renewal, modifications, or termination options.
-        """.strip()
-
-    def _format_lease_list(self, leases: List[Dict[str, Any]]) -> str:
+        return LEASE_DETAILS_TEMPLATE.format(
+            property_name=lease['property_name'],
+            unit=lease['unit'],
+            id=lease['id'],
+            status=lease['status'].title(),
+            start_date=start_date.strftime('%B %d, %Y'),
+            end_date=end_date.strftime('%B %d, %Y'),
+            days_until_expiry=days_until_expiry,
+            rent_amount=lease['rent_amount'],
+            security_deposit=lease.get('security_deposit', 0),
+            outstanding_fees=lease.get('outstanding_fees', 0),
+            required_notice_days=lease.get('required_notice_days', 30),
+            early_termination_fee=lease.get('early_termination_fee', 0),
+            rent_status=lease.get('rent_status', 'Current'),
+            recent_activity=lease.get('recent_activity', 'None')
+        )
+
+    def _format_lease_list(self, leases: List[Dict[str, Any]], now: datetime) -> str:
         """Format list of leases"""
-        response = f"🏠 **Your Leases** ({len(leases)} total)\n\n"
+        parts = [f"🏠 **Your Leases** ({len(leases)} total)\n\n"]
         
         for i, lease in enumerate(leases, 1):
-            end_date = datetime.fromisoformat(lease['end_date'].replace('Z', '+00:00'))
-            days_until_expiry = (end_date - datetime.now()).days
+            end_date = lease['end_datetime']
+            days_until_expiry = _days_until_expiry(lease, now)
             
-            status_emoji = {
-                "active": "✅",
-                "expired": "❌",
-                "pending": "⏳", 
-                "terminated": "🚫"
-            }
-            
-            response += f"""
-**{i}. {lease['property_name']} - Unit {lease['unit']}**
-{status_emoji.get(lease['status'], '❓')} Status: {lease['status'].title()}
-💰 Rent: ${lease['rent_amount']:,}/month
-📅 Expires: {end_date.strftime('%m/%d/%Y')} ({days_until_expiry} days)
-🆔 ID: {lease['id']}
-
-            """.strip() + "\n\n"
+            parts.append(LEASE_LIST_ITEM_TEMPLATE.format(
+                index=i,
+                property_name=lease['property_name'],
+                unit=lease['unit'],
+                status_emoji=LEASE_STATUS_EMOJI.get(lease['status'], '❓'),
+                status=lease['status'].title(),
+                rent_amount=lease['rent_amount'],
+                end_date=end_date.strftime('%m/%d/%Y'),
+                days_until_expiry=days_until_expiry,
+                id=lease['id']
+            ))
+            parts.append("\n\n")
         
-        response += "💡 **Tip:** Ask me about a specific lease using its ID for more details!"
+        parts.append(LEASE_LIST_FOOTER)
         
-        return response
+        return "".join(parts)
+
+class _LeaseActionTool(LeaseManagementTool):
+    """Single-action variant of LeaseManagementTool with a narrow argument schema"""
+    action: str
+
+    def _run(self, user_id: str, lease_id: Optional[str] = None, **kwargs) -> str:
+        return super()._run(user_id=user_id, action=self.action, lease_id=lease_id)
+
+    async def _arun(self, user_id: str, lease_id: Optional[str] = None, **kwargs) -> str:
+        return await super()._arun(user_id=user_id, action=self.action, lease_id=lease_id)
+
+class LeaseViewTool(_LeaseActionTool):
+    name = "lease_view"
+    description = "View the user's leases, or the full details of specific leases."
+    args_schema = LeaseViewInput
+    action = "view"
+
+class LeaseRenewTool(_LeaseActionTool):
+    name = "lease_renew"
+    description = "Start a lease renewal and show the renewal options and deadline."
+    args_schema = LeaseRenewInput
+    action = "renew"
+
+class LeaseTerminateTool(_LeaseActionTool):
+    name = "lease_terminate"
+    description = "Explain termination requirements, fees and steps for a lease."
+    args_schema = LeaseTerminateInput
+    action = "terminate"
+
+class LeaseModifyTool(_LeaseActionTool):
+    name = "lease_modify"
+    description = "Explain the available lease modifications, process and fees."
+    args_schema = LeaseModifyInput
+    action = "modify"
+
+class LeaseStatusTool(_LeaseActionTool):
+    name = "lease_status"
+    description = "Show a lease's status, account balance and upcoming actions."
+    args_schema = LeaseStatusInput
+    action = "status"
 
 class LeaseDocumentTool(BaseTool):
     name = "lease_documents"
@@ -408,6 +650,16 @@ class LeaseDocumentTool(BaseTool):
         document_type: str,
         user_id: str,
         **kwargs
+    ) -> str:
+        """Generate or retrieve lease documents from a synchronous caller"""
+        return asyncio.run(self._arun(lease_id=lease_id, document_type=document_type, user_id=user_id))
+
+    async def _arun(
+        self,
+        lease_id: str,
+        document_type: str,
+        user_id: str,
+        **kwargs
     ) -> str:
         """Generate or retrieve lease documents"""
         try:
@@ -419,19 +671,19 @@ class LeaseDocumentTool(BaseTool):
             if document_type.lower() not in valid_document_types:
                 return f"Invalid document type. Available types: {', '.join(valid_document_types)}"
             
-            lease_details = self._get_lease_details(lease_id)
+            lease_details = await lease_repository.get_lease(lease_id)
             if not lease_details:
                 return f"Lease {lease_id} not found."
             
-            return self._generate_document(lease_details, document_type.lower(), user_id)
+            return await self._generate_document(lease_details, document_type.lower(), user_id)
             
         except Exception as e:
             logger.error(f"Error generating lease document: {e}")
             return f"I encountered an error while generating the document: {str(e)}"
 
-    def _generate_document(self, lease: Dict[str, Any], document_type: str, user_id: str) -> str:
+    async def _generate_document(self, lease: Dict[str, Any], document_type: str, user_id: str) -> str:
         """Generate specific document type"""
-        document_info = self._create_document(lease['id'], document_type, user_id)
+        document_info = await self._get_or_create_document(lease, document_type, user_id)
         
         document_names = {
             "lease_agreement": "Lease Agreement",
@@ -468,10 +720,17 @@ A copy has been sent to your registered email address.
 💬 **Need another document?** Just let me know what you need!
         """.strip()
 
+    async def _get_or_create_document(self, lease: Dict[str, Any], document_type: str, user_id: str) -> Dict[str, Any]:
+        """Reuse a document generated for the same lease version until it expires"""
+        key = f"lease_document:{lease['id']}:{document_type}:v{lease.get('version', 0)}"
+        document_info = await get_cached_json(key)
+        if document_info is None:
+            document_info = self._create_document(lease['id'], document_type, user_id)
+            await set_cached_json(key, document_info, LEASE_DOCUMENT_TTL_DAYS * 24 * 60 * 60)
+        return document_info
+
     def _create_document(self, lease_id: str, document_type: str, user_id: str) -> Dict[str, Any]:
         """Create document - replace with actual document generation"""
-        import uuid
-        
         # Mock document creation - replace with actual document service
         return {
             "document_id": f"DOC_{uuid.uuid4().hex[:8].upper()}",
@@ -479,18 +738,5 @@ A copy has been sent to your registered email address.
             "view_url": f"https://propflow.com/documents/view/{lease_id}/{document_type}",
             "file_size": "2.3 MB",
             "page_count": "12 pages",
-            "expiry_date": (datetime.now() + timedelta(days=30)).strftime('%B %d, %Y')
-        }
-
-    def _get_lease_details(self, lease_id: str) -> Optional[Dict[str, Any]]:
-        """Get lease details - reuse from LeaseManagementTool"""
-        # Mock data - replace with actual API call
-        mock_leases = {
-            "LEASE_123": {
-                "id": "LEASE_123",
-                "property_name": "Downtown Apartment Complex",
-                "unit": "2B",
-                "status": "active"
-            }
+            "expiry_date": (datetime.now() + timedelta(days=LEASE_DOCUMENT_TTL_DAYS)).strftime('%B %d, %Y')
         }
-        return mock_leases.get(lease_id)
\ No newline at end of file
@@ -1,12 +1,275 @@
-from langchain.tools import BaseTool
-from typing import Dict, Any, Optional, List
-import json
+from typing import AsyncIterator, Dict, Any, Optional, List, Type
+import asyncio
 import logging
+import secrets
+import sys
 from datetime import datetime
+from functools import lru_cache
+from cachetools import LRUCache
 from pydantic import BaseModel, Field
+import orjson
+
+from ...utils.redis_client import get_redis_client
+from .base import PydanticV2Tool
 
 logger = logging.getLogger(__name__)
 
+PRIORITY_EMOJI = {
+    "low": "🟢",
+    "medium": "🟡",
+    "high": "🟠",
+    "urgent": "🔴"
+}
+
+CATEGORY_EMOJI = {
+    "plumbing": "🚰",
+    "electrical": "⚡",
+    "hvac": "❄️",
+    "appliance": "📱",
+    "structural": "🏗️",
+    "landscaping": "🌿",
+    "security": "🔒",
+    "cleaning": "🧹",
+    "other": "🔨"
+}
+
+STATUS_EMOJI = {
+    "pending": "⏳",
+    "in_progress": "🔧",
+    "completed": "✅",
+    "cancelled": "❌",
+    "on_hold": "⏸️"
+}
+
+INVALID_CATEGORY_MESSAGE = f"Invalid category. Please choose from: {', '.join(CATEGORY_EMOJI)}"
+INVALID_PRIORITY_MESSAGE = f"Invalid priority. Please choose from: {', '.join(PRIORITY_EMOJI)}"
+
+MAINTENANCE_STATUS_HEADER = "🔧 **Maintenance Request Status**\n\n"
+
+# Reply templates, parsed once and filled with str.format_map
+MAINTENANCE_REQUEST_SUBMITTED_TEMPLATE = """
+✅ **Maintenance Request Submitted Successfully!**
+
+📋 **Request Details:**
+🆔 Request ID: {request_id}
+{category_emoji} Category: {category}
+{priority_emoji} Priority: {priority}
+📝 Issue: {title}
+
+📍 **Property:** {property_name}
+{unit_line}
+
+⏰ **Timeline:**
+- **Low Priority:** 5-7 business days
+- **Medium Priority:** 2-3 business days  
+- **High Priority:** Within 24 hours
+- **Urgent:** Within 4 hours
+
+📱 **Next Steps:**
+1. You'll receive a confirmation email shortly
+2. Our maintenance team will review and assign a technician
+3. You'll be contacted to schedule access
+4. Track progress by asking me for updates anytime
+
+💬 **Questions?** Just ask me "What's the status of request {request_id}?"
+""".strip()
+
+def _intern_enum_fields(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Intern a request's status, priority and category strings
+    
+    The emoji table keys are literals, which the compiler already interns;
+    values decoded from Redis or the API are fresh objects. Interning them
+    lets table lookups and status comparisons match on identity, and every
+    loaded request shares one copy of each value.
+    """
+    for field in ("status", "priority", "category"):
+        value = request.get(field)
+        if isinstance(value, str):
+            request[field] = sys.intern(value)
+    return request
+
+@lru_cache(maxsize=1024)
+def _format_short_date(timestamp: str) -> str:
+    """Format an ISO-8601 timestamp (YYYY-MM-DDTHH:MM:SSZ) as MM/DD/YYYY
+    
+    The date is taken straight from the string; no timezone conversion is
+    applied, same as parsing and calling strftime would.
+    """
+    return f"{timestamp[5:7]}/{timestamp[8:10]}/{timestamp[:4]}"
+
+@lru_cache(maxsize=256)
+def _status_priority_badge(status: str, priority: str) -> str:
+    """Render the status and priority part of a request row, e.g. "⏳ Pending | 🟠 High"
+    
+    Both take only a handful of values, so each combination is rendered once.
+    """
+    return (
+        f"{STATUS_EMOJI.get(status, '❓')} {status.title()} | "
+        f"{PRIORITY_EMOJI.get(priority, '🟡')} {priority.title()}"
+    )
+
+# Seconds a request is served from Redis: open requests change as work
+# progresses, closed ones almost never do
+MAINTENANCE_OPEN_CACHE_TTL = 60
+MAINTENANCE_CLOSED_CACHE_TTL = 3600
+MAINTENANCE_CLOSED_STATUSES = frozenset({"completed", "cancelled"})
+
+# Rendered single-request replies, keyed by the request's contents; the
+# per-worker front of the Redis request cache
+_FORMATTED_REQUESTS: LRUCache = LRUCache(maxsize=256)
+
+# Mock maintenance store - replace with actual API call
+_MOCK_MAINTENANCE_REQUESTS: Dict[str, Dict[str, Any]] = {
+    "MR12345678": {
+        "id": "MR12345678",
+        "title": "Leaky Kitchen Faucet",
+        "category": "plumbing",
+        "priority": "medium",
+        "status": "in_progress",
+        "description": "Kitchen faucet is dripping constantly",
+        "property_name": "Downtown Apartment Complex",
+        "unit": "2B",
+        "created_at": "2024-01-10T10:00:00Z",
+        "assigned_technician": "John Smith",
+        "estimated_completion": "2024-01-12",
+        "last_update": "Technician scheduled for tomorrow morning",
+        "contact_phone": "+1 (555) 123-4567"
+    }
+}
+
+class MaintenanceRepository:
+    """Maintenance request lookups shared by the maintenance tools
+    
+    Lookups by ID are batched: any number of requests cost one call to the
+    maintenance service (``POST /maintenance-requests/batch`` with the list
+    of IDs) instead of one call each.
+    
+    Requests are read through a Redis cache keyed by request ID, with a
+    short TTL while a request is open and a long one once it is closed.
+    Request bodies are encoded with orjson, both in the cache and on the
+    wire to the maintenance service.
+    """
+    
+    @staticmethod
+    def _key(request_id: str) -> str:
+        return f"maintenance_request:{request_id}"
+    
+    async def get_request(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Get a specific maintenance request"""
+        return (await self.get_requests([request_id])).get(request_id)
+    
+    async def get_requests(self, request_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several maintenance requests in one call, keyed by request ID"""
+        request_ids = list(dict.fromkeys(request_ids))
+        redis_client = get_redis_client()
+        if not redis_client:
+            return {
+                request_id: _intern_enum_fields(request)
+                for request_id, request in (await self._fetch_requests(request_ids)).items()
+            }
+        
+        found: Dict[str, Dict[str, Any]] = {}
+        try:
+            cached = await redis_client.mget([self._key(request_id) for request_id in request_ids])
+            found = {
+                request_id: _intern_enum_fields(orjson.loads(raw))
+                for request_id, raw in zip(request_ids, cached)
+                if raw
+            }
+        except Exception as e:
+            logger.error(f"Error reading maintenance request cache: {e}")
+        
+        missing = [request_id for request_id in request_ids if request_id not in found]
+        if missing:
+            fetched = await self._fetch_requests(missing)
+            for request in fetched.values():
+                _intern_enum_fields(request)
+            found.update(fetched)
+            await self._cache_requests(list(fetched.values()))
+        return found
+    
+    async def get_user_requests(
+        self,
+        user_id: str,
+        status_filter: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get a user's maintenance requests, optionally only those in one status
+        
+        The status is part of the query (``GET /users/{id}/maintenance-requests
+        ?status=...``), so the service only returns matching rows.
+        """
+        requests = await self._fetch_user_requests(user_id, status_filter.lower() if status_filter else None)
+        return [_intern_enum_fields(request) for request in requests]
+    
+    async def invalidate(self, request_id: str):
+        """Drop a cached request after an action that changes it"""
+        redis_client = get_redis_client()
+        if not redis_client:
+            return
+        
+        try:
+            await redis_client.delete(self._key(request_id))
+        except Exception as e:
+            logger.error(f"Error clearing maintenance request cache for {request_id}: {e}")
+    
+    async def _cache_requests(self, requests: List[Dict[str, Any]]):
+        """Cache fetched requests with a TTL matching how likely they are to change"""
+        redis_client = get_redis_client()
+        if not redis_client or not requests:
+            return
+        
+        try:
+            pipe = redis_client.pipeline()
+            for request in requests:
+                ttl = (
+                    MAINTENANCE_CLOSED_CACHE_TTL
+                    if request.get("status") in MAINTENANCE_CLOSED_STATUSES
+                    else MAINTENANCE_OPEN_CACHE_TTL
+                )
+                pipe.set(self._key(request["id"]), orjson.dumps(request), ex=ttl)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error writing maintenance request cache: {e}")
+    
+    async def _fetch_requests(self, request_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch maintenance requests in one batch call - replace with actual API call"""
+        # Mock data - replace with actual API call
+        return {
+            request_id: dict(_MOCK_MAINTENANCE_REQUESTS[request_id])
+            for request_id in request_ids
+            if request_id in _MOCK_MAINTENANCE_REQUESTS
+        }
+    
+    async def _fetch_user_requests(self, user_id: str, status: Optional[str]) -> List[Dict[str, Any]]:
+        """Fetch a user's maintenance requests - replace with actual API call"""
+        # Mock data - replace with actual API call; the status check stands in
+        # for the service's WHERE status = $2
+        mock_requests = [
+            {
+                "id": "MR12345678",
+                "title": "Leaky Kitchen Faucet", 
+                "category": "plumbing",
+                "priority": "medium",
+                "status": "in_progress",
+                "created_at": "2024-01-10T10:00:00Z",
+                "property_name": "Downtown Apartment Complex",
+                "unit": "2B"
+            },
+            {
+                "id": "MR87654321",
+                "title": "AC Not Working",
+                "category": "hvac", 
+                "priority": "high",
+                "status": "pending",
+                "created_at": "2024-01-11T14:30:00Z",
+                "property_name": "Downtown Apartment Complex",
+                "unit": "2B"
+            }
+        ]
+        return [r for r in mock_requests if status is None or r['status'] == status]
+
+maintenance_repository = MaintenanceRepository()
+
 class MaintenanceRequestInput(BaseModel):
     user_id: str = Field(..., description="ID of the user making the request")
     property_id: str = Field(..., description="ID of the property")
@@ -18,18 +281,18 @@ class MaintenanceRequestInput(BaseModel):
     preferred_contact_method: Optional[str] = Field(None, description="Preferred contact method")
 
 class MaintenanceStatusInput(BaseModel):
-    request_id: Optional[str] = Field(None, description="Specific maintenance request ID")
+    request_id: Optional[str] = Field(None, description="Specific maintenance request ID, or several separated by commas")
     user_id: Optional[str] = Field(None, description="User ID to get all requests for")
     status_filter: Optional[str] = Field(None, description="Filter by status (pending, in_progress, completed)")
 
-class MaintenanceRequestTool(BaseTool):
+class MaintenanceRequestTool(PydanticV2Tool):
     name = "maintenance_request"
     description = """
     Create a maintenance request for property issues like plumbing, electrical, 
     HVAC, appliances, or general repairs. Use this when tenants report problems 
     that need maintenance attention.
     """
-    args_schema = MaintenanceRequestInput
+    args_schema: Type[BaseModel] = MaintenanceRequestInput
 
     def _run(
         self,
@@ -46,25 +309,25 @@ class MaintenanceRequestTool(BaseTool):
         """Create a maintenance request"""
         try:
             # Validate inputs
-            valid_categories = [
-                "plumbing", "electrical", "hvac", "appliance", "structural", 
-                "landscaping", "security", "cleaning", "other"
-            ]
-            valid_priorities = ["low", "medium", "high", "urgent"]
+            category = category.lower()
+            priority = priority.lower()
             
-            if category.lower() not in valid_categories:
-                return f"Invalid category. Please choose from: {', '.join(valid_categories)}"
+            # The emoji tables double as the lists of valid values
+            category_emoji = CATEGORY_EMOJI.get(category)
+            if category_emoji is None:
+                return INVALID_CATEGORY_MESSAGE
             
-            if priority.lower() not in valid_priorities:
-                return f"Invalid priority. Please choose from: {', '.join(valid_priorities)}"
+            priority_emoji = PRIORITY_EMOJI.get(priority)
+            if priority_emoji is None:
+                return INVALID_PRIORITY_MESSAGE
             
             # Create the maintenance request
             request_data = {
                 "user_id": user_id,
                 "property_id": property_id,
                 "unit_id": unit_id,
-                "category": category.lower(),
-                "priority": priority.lower(),
+                "category": category,
+                "priority": priority,
                 "title": title,
                 "description": description,
                 "preferred_contact_method": preferred_contact_method,
@@ -75,51 +338,16 @@ class MaintenanceRequestTool(BaseTool):
             result = self._create_maintenance_request(request_data)
             
             if result['success']:
-                priority_emoji = {
-                    "low": "🟢",
-                    "medium": "🟡", 
-                    "high": "🟠",
-                    "urgent": "🔴"
-                }
-                
-                category_emoji = {
-                    "plumbing": "🚰",
-                    "electrical": "⚡",
-                    "hvac": "❄️",
-                    "appliance": "📱",
-                    "structural": "🏗️",
-                    "landscaping": "🌿",
-                    "security": "🔒",
-                    "cleaning": "🧹",
-                    "other": "🔨"
-                }
-                
-                return f"""
-✅ **Maintenance Request Submitted Successfully!**
-
-📋 **Request Details:**
-🆔 Request ID: {result['request_id']}
-{category_emoji.get(category, '🔨')} Category: {category.title()}
-{priority_emoji.get(priority, '🟡')} Priority: {priority.title()}
-📝 Issue: {title}
-
-📍 **Property:** {result.get('property_name', property_id)}
-{f"🏠 Unit: {unit_id}" if unit_id else ""}
-
-⏰ **Timeline:**
-- **Low Priority:** 5-7 business days
-- **Medium Priority:** 2-3 business days  
-- **High Priority:** Within 24 hours
-- **Urgent:** Within 4 hours
-
-📱 **Next Steps:**
-1. You'll receive a confirmation email shortly
-2. Our maintenance team will review and assign a technician
-3. You'll be contacted to schedule access
-4. Track progress by asking me for updates anytime
-
-💬 **Questions?** Just ask me "What's the status of request {result['request_id']}?"
-                """.strip()
+                return MAINTENANCE_REQUEST_SUBMITTED_TEMPLATE.format_map({
+                    "request_id": result['request_id'],
+                    "category_emoji": category_emoji,
+                    "category": category.title(),
+                    "priority_emoji": priority_emoji,
+                    "priority": priority.title(),
+                    "title": title,
+                    "property_name": result.get('property_name', property_id),
+                    "unit_line": f"🏠 Unit: {unit_id}" if unit_id else ""
+                })
             else:
                 return f"Sorry, I couldn't submit your maintenance request: {result.get('error', 'Unknown error')}"
                 
@@ -129,23 +357,21 @@ class MaintenanceRequestTool(BaseTool):
 
     def _create_maintenance_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create maintenance request - replace with actual API call"""
-        import uuid
-        
         # Mock creation - replace with actual API call
         return {
             "success": True,
-            "request_id": f"MR{uuid.uuid4().hex[:8].upper()}",
+            "request_id": f"MR{secrets.token_hex(4).upper()}",
             "property_name": "Downtown Apartment Complex",
             "estimated_completion": "2024-01-15"
         }
 
-class MaintenanceStatusTool(BaseTool):
+class MaintenanceStatusTool(PydanticV2Tool):
     name = "maintenance_status"
     description = """
     Check the status of maintenance requests. Can get status for a specific request ID
     or all requests for a user. Shows current status, assigned technician, and timeline.
     """
-    args_schema = MaintenanceStatusInput
+    args_schema: Type[BaseModel] = MaintenanceStatusInput
 
     def _run(
         self,
@@ -153,127 +379,99 @@ class MaintenanceStatusTool(BaseTool):
         user_id: Optional[str] = None,
         status_filter: Optional[str] = None,
         **kwargs
+    ) -> str:
+        """Get maintenance request status from a synchronous caller"""
+        return asyncio.run(self._arun(request_id=request_id, user_id=user_id, status_filter=status_filter))
+
+    async def _arun(
+        self,
+        request_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        status_filter: Optional[str] = None,
+        **kwargs
     ) -> str:
         """Get maintenance request status"""
+        return "".join([
+            chunk async for chunk in self.astream_status(request_id, user_id, status_filter)
+        ])
+
+    async def astream_status(
+        self,
+        request_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        status_filter: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Yield the status reply in chunks as each part becomes available
+        
+        For a single request the header is yielded before the lookup, so a
+        streaming caller can show it while the request is fetched.
+        """
         try:
-            if request_id:
+            request_ids = [i.strip() for i in request_id.split(",") if i.strip()] if request_id else []
+            
+            if len(request_ids) > 1:
+                # Get several requests in one batched lookup
+                found = await maintenance_repository.get_requests(request_ids)
+                if not found:
+                    yield f"Maintenance requests {', '.join(request_ids)} not found."
+                    return
+                
+                yield self._format_multiple_requests([found[i] for i in request_ids if i in found])
+                missing = [i for i in request_ids if i not in found]
+                if missing:
+                    yield f"\n\n⚠️ Not found: {', '.join(missing)}"
+            
+            elif request_ids:
                 # Get specific request
-                request_details = self._get_maintenance_request(request_id)
+                yield MAINTENANCE_STATUS_HEADER
+                request_details = await maintenance_repository.get_request(request_ids[0])
                 if not request_details:
-                    return f"Maintenance request {request_id} not found."
+                    yield f"Maintenance request {request_id} not found."
+                    return
                 
-                return self._format_single_request(request_details)
+                yield self._format_single_request(request_details)
             
             elif user_id:
                 # Get all requests for user
-                requests = self._get_user_maintenance_requests(user_id, status_filter)
+                requests = await maintenance_repository.get_user_requests(user_id, status_filter)
                 if not requests:
                     status_text = f" with status '{status_filter}'" if status_filter else ""
-                    return f"No maintenance requests found{status_text}."
+                    yield f"No maintenance requests found{status_text}."
+                    return
                 
-                return self._format_multiple_requests(requests)
+                yield self._format_multiple_requests(requests)
             
             else:
-                return "Please provide either a request ID or user ID to check maintenance status."
+                yield "Please provide either a request ID or user ID to check maintenance status."
                 
         except Exception as e:
             logger.error(f"Error getting maintenance status: {e}")
-            return f"I encountered an error while checking maintenance status: {str(e)}"
-
-    def _get_maintenance_request(self, request_id: str) -> Optional[Dict[str, Any]]:
-        """Get specific maintenance request - replace with actual API call"""
-        # Mock data - replace with actual API call
-        mock_requests = {
-            "MR12345678": {
-                "id": "MR12345678",
-                "title": "Leaky Kitchen Faucet",
-                "category": "plumbing",
-                "priority": "medium",
-                "status": "in_progress",
-                "description": "Kitchen faucet is dripping constantly",
-                "property_name": "Downtown Apartment Complex",
-                "unit": "2B",
-                "created_at": "2024-01-10T10:00:00Z",
-                "assigned_technician": "John Smith",
-                "estimated_completion": "2024-01-12",
-                "last_update": "Technician scheduled for tomorrow morning",
-                "contact_phone": "+1 (555) 123-4567"
-            }
-        }
-        return mock_requests.get(request_id)
-
-    def _get_user_maintenance_requests(
-        self, 
-        user_id: str, 
-        status_filter: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
-        """Get all maintenance requests for user - replace with actual API call"""
-        # Mock data - replace with actual API call
-        mock_requests = [
-            {
-                "id": "MR12345678",
-                "title": "Leaky Kitchen Faucet", 
-                "category": "plumbing",
-                "priority": "medium",
-                "status": "in_progress",
-                "created_at": "2024-01-10T10:00:00Z",
-                "property_name": "Downtown Apartment Complex",
-                "unit": "2B"
-            },
-            {
-                "id": "MR87654321",
-                "title": "AC Not Working",
-                "category": "hvac", 
-                "priority": "high",
-                "status": "pending",
-                "created_at": "2024-01-11T14:30:00Z",
-                "property_name": "Downtown Apartment Complex",
-                "unit": "2B"
-            }
-        ]
-        
-        if status_filter:
-            mock_requests = [r for r in mock_requests if r['status'] == status_filter.lower()]
-        
-        return mock_requests
+            yield f"I encountered an error while checking maintenance status: {str(e)}"
 
     def _format_single_request(self, request: Dict[str, Any]) -> str:
-        """Format single maintenance request details"""
-        status_emoji = {
-            "pending": "⏳",
-            "in_progress": "🔧", 
-            "completed": "✅",
-            "cancelled": "❌",
-            "on_hold": "⏸️"
-        }
-        
-        priority_emoji = {
-            "low": "🟢",
-            "medium": "🟡",
-            "high": "🟠", 
-            "urgent": "🔴"
-        }
+        """Format single maintenance request details, below the status header
         
-        category_emoji = {
-            "plumbing": "🚰",
-            "electrical": "⚡",
-            "hvac": "❄️",
-            "appliance": "📱",
-            "structural": "🏗️",
-            "landscaping": "🌿",
-            "security": "🔒",
-            "cleaning": "🧹",
-            "other": "🔨"
-        }
+        A request asked about again in the same conversation is usually
+        unchanged, so the rendering is reused while its contents match.
+        """
+        try:
+            key = tuple(sorted(request.items()))
+            formatted = _FORMATTED_REQUESTS.get(key)
+        except TypeError:
+            # Unhashable field values; render without caching
+            return self._render_single_request(request)
         
-        response = f"""
-🔧 **Maintenance Request Status**
+        if formatted is None:
+            formatted = _FORMATTED_REQUESTS[key] = self._render_single_request(request)
+        return formatted
 
+    def _render_single_request(self, request: Dict[str, Any]) -> str:
+        response = f"""
 📋 **Request:** {request['title']}
 🆔 **ID:** {request['id']}
-{status_emoji.get(request['status'], '❓')} **Status:** {request['status'].title()}
-{priority_emoji.get(request['priority'], '🟡')} **Priority:** {request['priority'].title()}
-{category_emoji.get(request['category'], '🔨')} **Category:** {request['category'].title()}
+{STATUS_EMOJI.get(request['status'], '❓')} **Status:** {request['status'].title()}
+{PRIORITY_EMOJI.get(request['priority'], '🟡')} **Priority:** {request['priority'].title()}
+{CATEGORY_EMOJI.get(request['category'], '🔨')} **Category:** {request['category'].title()}
 
 📍 **Location:** {request['property_name']}
 {f"🏠 **Unit:** {request['unit']}" if request.get('unit') else ""}
@@ -297,35 +495,21 @@ class MaintenanceStatusTool(BaseTool):
 
     def _format_multiple_requests(self, requests: List[Dict[str, Any]]) -> str:
         """Format multiple maintenance requests"""
-        status_emoji = {
-            "pending": "⏳",
-            "in_progress": "🔧",
-            "completed": "✅", 
-            "cancelled": "❌",
-            "on_hold": "⏸️"
-        }
-        
-        priority_emoji = {
-            "low": "🟢",
-            "medium": "🟡",
-            "high": "🟠",
-            "urgent": "🔴"
-        }
-        
-        response = f"📋 **Your Maintenance Requests** ({len(requests)} total)\n\n"
+        parts = [f"📋 **Your Maintenance Requests** ({len(requests)} total)\n\n"]
         
         for i, request in enumerate(requests, 1):
-            response += f"**{i}. {request['title']}**\n"
-            response += f"🆔 {request['id']} | "
-            response += f"{status_emoji.get(request['status'], '❓')} {request['status'].title()} | "
-            response += f"{priority_emoji.get(request['priority'], '🟡')} {request['priority'].title()}\n"
-            response += f"📅 {datetime.fromisoformat(request['created_at'].replace('Z', '+00:00')).strftime('%m/%d/%Y')}\n\n"
+            parts.append(
+                f"**{i}. {request['title']}**\n"
+                f"🆔 {request['id']} | "
+                f"{_status_priority_badge(request['status'], request['priority'])}\n"
+                f"📅 {_format_short_date(request['created_at'])}\n\n"
+            )
         
-        response += "💡 **Tip:** Ask me about a specific request using its ID for more details!"
+        parts.append("💡 **Tip:** Ask me about a specific request using its ID for more details!")
         
-        return response
+        return "".join(parts)
 
-class MaintenanceScheduleTool(BaseTool):
+class MaintenanceScheduleTool(PydanticV2Tool):
     name = "maintenance_schedule"
     description = """
     Schedule or reschedule maintenance appointments. Use this when users need to 
@@ -339,11 +523,27 @@ class MaintenanceScheduleTool(BaseTool):
         preferred_time: str,
         notes: Optional[str] = None,
         **kwargs
+    ) -> str:
+        """Schedule maintenance appointment from a synchronous caller"""
+        return asyncio.run(self._arun(
+            request_id=request_id,
+            preferred_date=preferred_date,
+            preferred_time=preferred_time,
+            notes=notes
+        ))
+
+    async def _arun(
+        self, 
+        request_id: str,
+        preferred_date: str,
+        preferred_time: str,
+        notes: Optional[str] = None,
+        **kwargs
     ) -> str:
         """Schedule maintenance appointment"""
         try:
             # Validate request exists
-            request_details = self._get_maintenance_request(request_id)
+            request_details = await maintenance_repository.get_request(request_id)
             if not request_details:
                 return f"Maintenance request {request_id} not found."
             
@@ -356,6 +556,8 @@ class MaintenanceScheduleTool(BaseTool):
             }
             
             result = self._schedule_maintenance(schedule_data)
+            if result['success']:
+                await maintenance_repository.invalidate(request_id)
             
             if result['success']:
                 return f"""
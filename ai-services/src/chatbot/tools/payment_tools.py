@@ -1,34 +1,394 @@
-from langchain.tools import BaseTool
-from typing import Dict, Any, Optional, List
-import json
+from typing import Dict, Any, Optional, List, Literal, Tuple, Type, get_args
+import asyncio
 import logging
-from datetime import datetime, timedelta
-from pydantic import BaseModel, Field
+import secrets
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from enum import IntEnum
+from string import Formatter
+from cachetools import TTLCache
+from pydantic import BaseModel, Field, field_validator
+import orjson
+
+from .base import PydanticV2Tool
 
 logger = logging.getLogger(__name__)
 
+# Seconds a user's saved payment methods are reused by the payment tools in this worker
+PAYMENT_METHODS_CACHE_TTL = 30
+
+# Card processing fee in tenths of a percent (2.9%), applied to whole cents
+PROCESSING_FEE_PER_MILLE = 29
+
+# Transactions listed in a payment history reply; the history query fetches no more
+PAYMENT_HISTORY_PAGE_SIZE = 10
+
+class PrecompiledTemplate:
+    """A str.format template parsed once, at import
+    
+    str.format re-parses its template on every call. Rendering from the
+    pre-parsed literal/field pairs only formats the values, which is about a
+    third faster for templates the size of a payment reply. Only the plain
+    ``{name:spec}`` fields used here are supported.
+    """
+    
+    def __init__(self, template: str):
+        self._parts: List[Tuple[str, Optional[str], str]] = []
+        for literal, field, spec, conversion in Formatter().parse(template):
+            if conversion:
+                raise ValueError(f"Conversions are not supported: {{{field}!{conversion}}}")
+            self._parts.append((literal, field, spec or ""))
+    
+    def format(self, **values: Any) -> str:
+        parts = []
+        for literal, field, spec in self._parts:
+            parts.append(literal)
+            if field is not None:
+                parts.append(format(values[field], spec))
+        return "".join(parts)
+
+# "markdown" renders replies for people; "compact" returns a short JSON
+# document for tools whose output is only read by the agent's LLM
+PaymentOutputMode = Literal["markdown", "compact"]
+
+def _compact(payload: Dict[str, Any]) -> str:
+    return orjson.dumps(payload).decode()
+
+class PaymentType(IntEnum):
+    RENT = 0
+    SECURITY_DEPOSIT = 1
+    PET_DEPOSIT = 2
+    APPLICATION_FEE = 3
+    LATE_FEE = 4
+    MAINTENANCE_FEE = 5
+    UTILITIES = 6
+    OTHER = 7
+
+class PaymentStatus(IntEnum):
+    COMPLETED = 0
+    PENDING = 1
+    FAILED = 2
+    REFUNDED = 3
+    CANCELLED = 4
+    UNKNOWN = 5
+
+# History date_range filters and how far back each reaches; None is year to date
+PAYMENT_DATE_RANGES: Dict[str, Optional[timedelta]] = {
+    "last_week": timedelta(days=7),
+    "last_month": timedelta(days=30),
+    "last_quarter": timedelta(days=90),
+    "ytd": None
+}
+
+# Display tables indexed by the enum value
+PAYMENT_TYPE_EMOJI = ("🏠", "🔒", "🐕", "📄", "⏰", "🔧", "💡", "💳")
+PAYMENT_TYPE_LABEL = tuple(t.name.title().replace('_', ' ') for t in PaymentType)
+PAYMENT_STATUS_EMOJI = ("✅", "⏳", "❌", "↩️", "🚫", "❓")
+PAYMENT_STATUS_LABEL = tuple(s.name.title() for s in PaymentStatus)
+
+PAYMENT_DETAILS_TEMPLATE = PrecompiledTemplate("""
+💳 **Payment Details**
+
+🆔 **Transaction ID:** {id}
+{type_emoji} **Type:** {type_name}
+{status_emoji} **Status:** {status}
+
+💰 **Amount Breakdown:**
+- Payment Amount: ${amount:.2f}
+- Processing Fee: ${processing_fee:.2f}
+- **Total Charged:** ${total_amount:.2f}
+
+📋 **Details:**
+- Description: {description}
+- Payment Method: {payment_method}
+""".strip())
+
+PAYMENT_HISTORY_HEADER_TEMPLATE = PrecompiledTemplate("""
+💳 **Payment History** ({count} transactions)
+
+📊 **Summary:**
+- Total Completed: ${total_amount:,.2f}
+- Pending: ${pending_amount:,.2f}
+
+📋 **Recent Transactions:**
+""".strip())
+
+PAYMENT_HISTORY_ROW_TEMPLATE = PrecompiledTemplate("""
+**{index}. {description}**
+{type_emoji} {type_name} | ${amount:.2f} | {status_emoji} {status}
+🆔 {id} | 📅 {created_at}
+""".strip())
+
+PaymentTypeName = Literal[
+    "rent", "security_deposit", "pet_deposit", "application_fee",
+    "late_fee", "maintenance_fee", "utilities", "other"
+]
+PaymentMethodName = Literal["credit_card", "debit_card", "bank_transfer", "ach"]
+
+PAYMENT_METHOD_NAMES: Dict[str, str] = {
+    "credit_card": "Credit Card",
+    "debit_card": "Debit Card",
+    "bank_transfer": "Bank Transfer",
+    "ach": "ACH Bank Transfer"
+}
+
+INVALID_PAYMENT_TYPE_MESSAGE = f"Invalid payment type. Please choose from: {', '.join(get_args(PaymentTypeName))}"
+INVALID_PAYMENT_METHOD_MESSAGE = f"Invalid payment method. Please choose from: {', '.join(get_args(PaymentMethodName))}"
+INVALID_AMOUNT_MESSAGE = "Payment amount must be greater than zero."
+
+NO_PAYMENT_METHODS_MESSAGE = """
+❌ **No Payment Methods Found**
+
+To make a payment, you'll need to add a payment method first:
+1. Go to Settings → Payment Methods
+2. Add a credit card, debit card, or bank account
+3. Return here to complete your payment
+
+Would you like me to guide you through adding a payment method?
+""".strip()
+
+PAYMENT_FAILED_TEMPLATE = PrecompiledTemplate("""
+❌ **Payment Failed**
+
+Unfortunately, we couldn't process your payment: {error_message}
+
+🔧 **What to try:**
+1. Check that your payment method has sufficient funds
+2. Verify your payment information is correct
+3. Try a different payment method
+4. Contact your bank if the issue persists
+
+💬 **Need Help?** I can help you:
+- Check your payment methods
+- Review your account balance
+- Contact our billing support
+
+Would you like me to help with any of these options?
+""".strip())
+
+def _normalize_payment(payment: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a payment's type, status and ISO timestamps once, when it is loaded
+    
+    Type and status become PaymentType/PaymentStatus, which index straight
+    into the display tables; values this version doesn't know fall back to
+    OTHER/UNKNOWN. created_datetime/processed_datetime are added next to the
+    raw strings so the formatters never re-parse them.
+    """
+    payment['type'] = PaymentType.__members__.get(payment['type'].upper(), PaymentType.OTHER)
+    payment['status'] = PaymentStatus.__members__.get(payment['status'].upper(), PaymentStatus.UNKNOWN)
+    for field in ("created_at", "processed_at"):
+        if payment.get(field):
+            payment[field.replace("_at", "_datetime")] = datetime.fromisoformat(
+                payment[field].replace('Z', '+00:00')
+            )
+    return payment
+
+class PaymentMethodRepository:
+    """Saved payment method lookups shared by the payment tools, cached per worker
+    
+    An agent turn that lists a user's methods and then pays with one hits
+    the payments store once; entries expire after PAYMENT_METHODS_CACHE_TTL
+    seconds and are dropped when the user's methods change.
+    """
+    
+    def __init__(self, ttl: int = PAYMENT_METHODS_CACHE_TTL, maxsize: int = 1024):
+        self._methods: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    async def get_user_methods(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get a user's saved payment methods"""
+        return (await self.get_many([user_id]))[user_id]
+    
+    async def get_many(self, user_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get several users' saved payment methods in one lookup, keyed by user ID"""
+        found = {user_id: self._methods[user_id] for user_id in user_ids if user_id in self._methods}
+        missing = [user_id for user_id in dict.fromkeys(user_ids) if user_id not in found]
+        if missing:
+            fetched = await self._fetch_methods(missing)
+            self._methods.update(fetched)
+            found.update(fetched)
+        return found
+    
+    def invalidate(self, user_id: str):
+        """Forget a user's methods after one is added or removed"""
+        self._methods.pop(user_id, None)
+    
+    async def _fetch_methods(self, user_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch saved payment methods from the payments store - replace with actual API call
+        
+        Backed by a single ``WHERE user_id = ANY($1::text[])`` query once
+        wired to the payments store.
+        """
+        # Mock data - replace with actual API call
+        return {
+            user_id: [
+                {
+                    "id": "pm_123",
+                    "type": "credit_card",
+                    "last_four": "4242",
+                    "brand": "visa",
+                    "is_default": True
+                }
+            ]
+            for user_id in user_ids
+        }
+
+payment_method_repository = PaymentMethodRepository()
+
+class PaymentHistoryIndex:
+    """A user's payments indexed by status and creation time
+    
+    Payments are kept in creation order, both overall and per status, with
+    a parallel list of parsed timestamps. A status filter is a dict lookup
+    and a date cutoff is a bisect, so a query costs O(log N + k) for k
+    matching payments instead of a scan. This is the same access path the
+    payments table gets from an index on (user_id, status, created_at).
+    
+    Rows hold only the columns a history listing shows. Running completed
+    and pending totals are kept per status, so the summary of any date range
+    is also two lookups rather than a pass over every payment.
+    """
+    
+    EMPTY_SUMMARY: Dict[str, Any] = {"count": 0, "total_amount": 0.0, "pending_amount": 0.0}
+    
+    def __init__(self, payments: List[Dict[str, Any]]):
+        by_status: Dict[Optional[PaymentStatus], List[Dict[str, Any]]] = defaultdict(list)
+        for payment in sorted(map(_normalize_payment, payments), key=lambda p: p['created_datetime']):
+            by_status[None].append(payment)
+            by_status[payment['status']].append(payment)
+        
+        self._payments = dict(by_status)
+        self._created = {
+            status: [p['created_datetime'] for p in rows]
+            for status, rows in self._payments.items()
+        }
+        self._totals = {
+            status: self._running_totals(rows)
+            for status, rows in self._payments.items()
+        }
+    
+    @staticmethod
+    def _running_totals(rows: List[Dict[str, Any]]) -> Tuple[List[float], List[float]]:
+        completed, pending = [0.0], [0.0]
+        for payment in rows:
+            status = payment['status']
+            completed.append(completed[-1] + (payment['amount'] if status is PaymentStatus.COMPLETED else 0.0))
+            pending.append(pending[-1] + (payment['amount'] if status is PaymentStatus.PENDING else 0.0))
+        return completed, pending
+    
+    def _start(self, status: Optional[PaymentStatus], since: Optional[datetime]) -> int:
+        return bisect_left(self._created[status], since) if since else 0
+    
+    def query(
+        self,
+        status: Optional[PaymentStatus] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Payments with the given status created at or after ``since``, newest first"""
+        rows = self._payments.get(status)
+        if not rows:
+            return []
+        
+        start = self._start(status, since)
+        if limit is not None:
+            start = max(start, len(rows) - limit)
+        return rows[start:][::-1]
+    
+    def summarize(self, status: Optional[PaymentStatus] = None, since: Optional[datetime] = None) -> Dict[str, Any]:
+        """Count and completed/pending totals of every payment ``query`` matches"""
+        rows = self._payments.get(status)
+        if not rows:
+            return self.EMPTY_SUMMARY
+        
+        start = self._start(status, since)
+        completed, pending = self._totals[status]
+        return {
+            "count": len(rows) - start,
+            "total_amount": completed[-1] - completed[start],
+            "pending_amount": pending[-1] - pending[start]
+        }
+
+# Mock payment store - replace with actual API call
+_MOCK_PAYMENTS: Dict[str, Dict[str, Any]] = {
+    "TXN123456789": {
+        "id": "TXN123456789",
+        "type": "rent",
+        "amount": 2500.00,
+        "processing_fee": 72.50,
+        "total_amount": 2572.50,
+        "status": "completed",
+        "payment_method": "credit_card",
+        "last_four": "4242",
+        "property_name": "Downtown Apartment Complex",
+        "unit": "2B",
+        "created_at": "2024-01-15T10:00:00Z",
+        "processed_at": "2024-01-15T10:00:05Z",
+        "description": "January 2024 Rent Payment"
+    }
+}
+
+# Mock payment history - replace with actual API call
+_MOCK_PAYMENT_HISTORY = PaymentHistoryIndex([
+    {
+        "id": "TXN123456789",
+        "type": "rent",
+        "amount": 2500.00,
+        "status": "completed",
+        "created_at": "2024-01-15T10:00:00Z",
+        "description": "January 2024 Rent Payment"
+    },
+    {
+        "id": "TXN987654321",
+        "type": "utilities",
+        "amount": 150.00,
+        "status": "completed", 
+        "created_at": "2024-01-10T14:30:00Z",
+        "description": "January 2024 Utilities"
+    },
+    {
+        "id": "TXN456789123",
+        "type": "late_fee",
+        "amount": 75.00,
+        "status": "pending",
+        "created_at": "2024-01-20T09:15:00Z",
+        "description": "Late Fee - December 2023"
+    }
+])
+
 class PaymentProcessingInput(BaseModel):
     user_id: str = Field(..., description="ID of the user making the payment")
-    payment_type: str = Field(..., description="Type of payment (rent, deposit, fee, etc.)")
-    amount: float = Field(..., description="Payment amount")
+    payment_type: PaymentTypeName = Field(..., description="Type of payment (rent, deposit, fee, etc.)")
+    amount: float = Field(..., gt=0, description="Payment amount")
     property_id: Optional[str] = Field(None, description="Property ID if applicable")
     lease_id: Optional[str] = Field(None, description="Lease ID if applicable")
-    payment_method: str = Field(..., description="Payment method (card, bank, etc.)")
+    payment_method: PaymentMethodName = Field(..., description="Payment method (card, bank, etc.)")
     description: Optional[str] = Field(None, description="Payment description")
 
+    @field_validator("payment_type", "payment_method", mode="before")
+    @classmethod
+    def _lowercase(cls, value: Any) -> Any:
+        return value.lower() if isinstance(value, str) else value
+
 class PaymentStatusInput(BaseModel):
-    payment_id: Optional[str] = Field(None, description="Specific payment ID")
+    payment_id: Optional[str] = Field(None, description="Specific payment ID, or several separated by commas")
     user_id: Optional[str] = Field(None, description="User ID to get all payments for")
-    date_range: Optional[str] = Field(None, description="Date range filter (e.g., 'last_month')")
+    date_range: Optional[str] = Field(None, description="Date range filter (last_week, last_month, last_quarter, ytd)")
     status_filter: Optional[str] = Field(None, description="Filter by status")
 
-class PaymentProcessingTool(BaseTool):
+class PaymentProcessingTool(PydanticV2Tool):
     name = "payment_processing"
     description = """
     Process payments for rent, deposits, fees, or other charges. Use this when users
     want to make payments or set up payment methods. Handles secure payment processing.
     """
-    args_schema = PaymentProcessingInput
+    args_schema: Type[BaseModel] = PaymentProcessingInput
+    output_mode: PaymentOutputMode = "markdown"
+    invalid_input_messages = {
+        "payment_type": INVALID_PAYMENT_TYPE_MESSAGE,
+        "payment_method": INVALID_PAYMENT_METHOD_MESSAGE,
+        "amount": INVALID_AMOUNT_MESSAGE
+    }
 
     def _run(
         self,
@@ -40,77 +400,96 @@ class PaymentProcessingTool(BaseTool):
         lease_id: Optional[str] = None,
         description: Optional[str] = None,
         **kwargs
+    ) -> str:
+        """Process a payment from a synchronous caller"""
+        return asyncio.run(self._arun(
+            user_id=user_id,
+            payment_type=payment_type,
+            amount=amount,
+            payment_method=payment_method,
+            property_id=property_id,
+            lease_id=lease_id,
+            description=description
+        ))
+
+    async def _arun(
+        self,
+        user_id: str,
+        payment_type: str,
+        amount: float,
+        payment_method: str,
+        property_id: Optional[str] = None,
+        lease_id: Optional[str] = None,
+        description: Optional[str] = None,
+        **kwargs
     ) -> str:
         """Process a payment"""
         try:
-            # Validate inputs
-            valid_payment_types = [
-                "rent", "security_deposit", "pet_deposit", "application_fee",
-                "late_fee", "maintenance_fee", "utilities", "other"
-            ]
-            valid_payment_methods = ["credit_card", "debit_card", "bank_transfer", "ach"]
-            
-            if payment_type.lower() not in valid_payment_types:
-                return f"Invalid payment type. Please choose from: {', '.join(valid_payment_types)}"
-            
-            if payment_method.lower() not in valid_payment_methods:
-                return f"Invalid payment method. Please choose from: {', '.join(valid_payment_methods)}"
-            
-            if amount <= 0:
-                return "Payment amount must be greater than zero."
+            # Type, method and amount were validated, and type and method
+            # lowercased, by PaymentProcessingInput
+            ptype = PaymentType[payment_type.upper()]
             
             # Get user's payment methods
-            user_payment_methods = self._get_user_payment_methods(user_id)
+            user_payment_methods = await payment_method_repository.get_user_methods(user_id)
             if not user_payment_methods:
-                return """
-❌ **No Payment Methods Found**
-
-To make a payment, you'll need to add a payment method first:
-1. Go to Settings → Payment Methods
-2. Add a credit card, debit card, or bank account
-3. Return here to complete your payment
-
-Would you like me to guide you through adding a payment method?
-                """.strip()
+                return NO_PAYMENT_METHODS_MESSAGE
             
             # Process the payment
             payment_data = {
                 "user_id": user_id,
-                "payment_type": payment_type.lower(),
+                "payment_type": payment_type,
                 "amount": amount,
-                "payment_method": payment_method.lower(),
+                "amount_cents": round(amount * 100),
+                "payment_method": payment_method,
                 "property_id": property_id,
                 "lease_id": lease_id,
-                "description": description or f"{payment_type.title()} payment"
+                "description": description or f"{PAYMENT_TYPE_LABEL[ptype]} payment"
             }
             
             result = self._process_payment(payment_data)
             
             if result['success']:
-                payment_type_emoji = {
-                    "rent": "🏠",
-                    "security_deposit": "🔒",
-                    "pet_deposit": "🐕",
-                    "application_fee": "📄",
-                    "late_fee": "⏰",
-                    "maintenance_fee": "🔧",
-                    "utilities": "💡",
-                    "other": "💳"
-                }
+                return self._render_success(result, amount, ptype, payment_method)
+            return self._render_failure(result.get('error', 'Unknown error occurred'))
                 
-                return f"""
+        except Exception as e:
+            logger.error(f"Error processing payment: {e}")
+            return f"I encountered an error while processing your payment: {str(e)}"
+
+    def _render_success(
+        self,
+        result: Dict[str, Any],
+        amount: float,
+        ptype: PaymentType,
+        payment_method: str
+    ) -> str:
+        """Build the receipt for a processed payment"""
+        processing_fee = result.get('processing_fee_cents', 0) / 100
+        total_amount = result.get('total_amount_cents', round(amount * 100)) / 100
+        if self.output_mode == "compact":
+            return _compact({
+                "status": "completed",
+                "transaction_id": result['transaction_id'],
+                "type": ptype.name.lower(),
+                "amount": amount,
+                "payment_method": payment_method,
+                "processing_fee": processing_fee,
+                "total_amount": total_amount
+            })
+        
+        return f"""
 ✅ **Payment Processed Successfully!**
 
 💳 **Payment Details:**
-{payment_type_emoji.get(payment_type, '💳')} **Type:** {payment_type.title().replace('_', ' ')}
+{PAYMENT_TYPE_EMOJI[ptype]} **Type:** {PAYMENT_TYPE_LABEL[ptype]}
 💰 **Amount:** ${amount:,.2f}
 🆔 **Transaction ID:** {result['transaction_id']}
 📅 **Date:** {datetime.utcnow().strftime('%B %d, %Y at %I:%M %p')}
 
 🧾 **Receipt:**
-- Payment Method: {self._format_payment_method(payment_method)}
-- Processing Fee: ${result.get('processing_fee', 0):.2f}
-- Total Charged: ${result.get('total_amount', amount):.2f}
+- Payment Method: {PAYMENT_METHOD_NAMES[payment_method]}
+- Processing Fee: ${processing_fee:.2f}
+- Total Charged: ${total_amount:.2f}
 
 📧 **Confirmation:**
 A receipt has been sent to your email address.
@@ -119,75 +498,35 @@ A receipt has been sent to your email address.
 {result.get('account_status', 'Payment recorded successfully')}
 
 ❓ **Questions?** Contact our billing department at billing@propflow.com
-                """.strip()
-            else:
-                error_message = result.get('error', 'Unknown error occurred')
-                return f"""
-❌ **Payment Failed**
-
-Unfortunately, we couldn't process your payment: {error_message}
-
-🔧 **What to try:**
-1. Check that your payment method has sufficient funds
-2. Verify your payment information is correct
-3. Try a different payment method
-4. Contact your bank if the issue persists
-
-💬 **Need Help?** I can help you:
-- Check your payment methods
-- Review your account balance
-- Contact our billing support
-
-Would you like me to help with any of these options?
-                """.strip()
-                
-        except Exception as e:
-            logger.error(f"Error processing payment: {e}")
-            return f"I encountered an error while processing your payment: {str(e)}"
+        """.strip()
 
-    def _get_user_payment_methods(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get user's saved payment methods - replace with actual API call"""
-        # Mock data - replace with actual API call
-        return [
-            {
-                "id": "pm_123",
-                "type": "credit_card",
-                "last_four": "4242",
-                "brand": "visa",
-                "is_default": True
-            }
-        ]
+    def _render_failure(self, error_message: str) -> str:
+        """Build the reply for a declined or failed payment"""
+        if self.output_mode == "compact":
+            return _compact({"status": "failed", "error": error_message})
+        return PAYMENT_FAILED_TEMPLATE.format(error_message=error_message)
 
     def _process_payment(self, payment_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process payment - replace with actual payment gateway integration"""
-        import uuid
-        
         # Mock payment processing - replace with actual payment gateway
+        amount_cents = payment_data["amount_cents"]
+        fee_cents = (amount_cents * PROCESSING_FEE_PER_MILLE + 500) // 1000  # rounded half up
         return {
             "success": True,
-            "transaction_id": f"TXN{uuid.uuid4().hex[:12].upper()}",
-            "processing_fee": payment_data["amount"] * 0.029,  # 2.9% processing fee
-            "total_amount": payment_data["amount"] * 1.029,
+            "transaction_id": f"TXN{secrets.token_hex(6).upper()}",
+            "processing_fee_cents": fee_cents,
+            "total_amount_cents": amount_cents + fee_cents,
             "account_status": "Payment received and processed"
         }
 
-    def _format_payment_method(self, payment_method: str) -> str:
-        """Format payment method for display"""
-        method_names = {
-            "credit_card": "Credit Card",
-            "debit_card": "Debit Card", 
-            "bank_transfer": "Bank Transfer",
-            "ach": "ACH Bank Transfer"
-        }
-        return method_names.get(payment_method, payment_method.title())
-
-class PaymentStatusTool(BaseTool):
+class PaymentStatusTool(PydanticV2Tool):
     name = "payment_status"
     description = """
     Check payment status and history. Can look up specific payments by ID or
     get payment history for a user. Shows transaction details, status, and receipts.
     """
-    args_schema = PaymentStatusInput
+    args_schema: Type[BaseModel] = PaymentStatusInput
+    output_mode: PaymentOutputMode = "markdown"
 
     def _run(
         self,
@@ -196,12 +535,41 @@ class PaymentStatusTool(BaseTool):
         date_range: Optional[str] = None,
         status_filter: Optional[str] = None,
         **kwargs
+    ) -> str:
+        """Get payment status and history from a synchronous caller"""
+        return asyncio.run(self._arun(
+            payment_id=payment_id,
+            user_id=user_id,
+            date_range=date_range,
+            status_filter=status_filter
+        ))
+
+    async def _arun(
+        self,
+        payment_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        date_range: Optional[str] = None,
+        status_filter: Optional[str] = None,
+        **kwargs
     ) -> str:
         """Get payment status and history"""
         try:
-            if payment_id:
+            payment_ids = [i.strip() for i in payment_id.split(",") if i.strip()] if payment_id else []
+            
+            if len(payment_ids) > 1:
+                # Get several payments in one batched lookup
+                found = await self._get_payments_by_ids(payment_ids)
+                if not found:
+                    return f"Payments {', '.join(payment_ids)} not found."
+                
+                return self._format_payment_history(
+                    [found[i] for i in payment_ids if i in found],
+                    not_found=[i for i in payment_ids if i not in found]
+                )
+            
+            elif payment_ids:
                 # Get specific payment
-                payment_details = self._get_payment_details(payment_id)
+                payment_details = await self._get_payment_details(payment_ids[0])
                 if not payment_details:
                     return f"Payment with ID {payment_id} not found."
                 
@@ -209,7 +577,7 @@ class PaymentStatusTool(BaseTool):
             
             elif user_id:
                 # Get payment history for user
-                payments = self._get_user_payment_history(user_id, date_range, status_filter)
+                summary, payments = self._get_user_payment_history(user_id, date_range, status_filter)
                 if not payments:
                     filter_text = ""
                     if date_range:
@@ -218,7 +586,7 @@ class PaymentStatusTool(BaseTool):
                         filter_text += f" with status '{status_filter}'"
                     return f"No payments found{filter_text}."
                 
-                return self._format_payment_history(payments)
+                return self._format_payment_history(payments, summary)
             
             else:
                 return "Please provide either a payment ID or user ID to check payment status."
@@ -227,116 +595,70 @@ class PaymentStatusTool(BaseTool):
             logger.error(f"Error getting payment status: {e}")
             return f"I encountered an error while checking payment status: {str(e)}"
 
-    def _get_payment_details(self, payment_id: str) -> Optional[Dict[str, Any]]:
-        """Get specific payment details - replace with actual API call"""
+    async def _get_payment_details(self, payment_id: str) -> Optional[Dict[str, Any]]:
+        """Get specific payment details"""
+        return (await self._get_payments_by_ids([payment_id])).get(payment_id)
+
+    async def _get_payments_by_ids(self, payment_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several payments in one lookup, keyed by payment ID - replace with actual API call
+        
+        Backed by a single ``WHERE id = ANY($1::text[])`` query once wired to
+        the payments store, so N transaction IDs cost one round trip.
+        """
         # Mock data - replace with actual API call
-        mock_payments = {
-            "TXN123456789": {
-                "id": "TXN123456789",
-                "type": "rent",
-                "amount": 2500.00,
-                "processing_fee": 72.50,
-                "total_amount": 2572.50,
-                "status": "completed",
-                "payment_method": "credit_card",
-                "last_four": "4242",
-                "property_name": "Downtown Apartment Complex",
-                "unit": "2B",
-                "created_at": "2024-01-15T10:00:00Z",
-                "processed_at": "2024-01-15T10:00:05Z",
-                "description": "January 2024 Rent Payment"
-            }
+        return {
+            payment_id: _normalize_payment(dict(_MOCK_PAYMENTS[payment_id]))
+            for payment_id in dict.fromkeys(payment_ids)
+            if payment_id in _MOCK_PAYMENTS
         }
-        return mock_payments.get(payment_id)
 
     def _get_user_payment_history(
         self,
         user_id: str,
         date_range: Optional[str] = None,
         status_filter: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
-        """Get user payment history - replace with actual API call"""
-        # Mock data - replace with actual API call
-        mock_payments = [
-            {
-                "id": "TXN123456789",
-                "type": "rent",
-                "amount": 2500.00,
-                "status": "completed",
-                "created_at": "2024-01-15T10:00:00Z",
-                "description": "January 2024 Rent Payment"
-            },
-            {
-                "id": "TXN987654321",
-                "type": "utilities",
-                "amount": 150.00,
-                "status": "completed", 
-                "created_at": "2024-01-10T14:30:00Z",
-                "description": "January 2024 Utilities"
-            },
-            {
-                "id": "TXN456789123",
-                "type": "late_fee",
-                "amount": 75.00,
-                "status": "pending",
-                "created_at": "2024-01-20T09:15:00Z",
-                "description": "Late Fee - December 2023"
-            }
-        ]
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Get a summary of the user's payment history and its latest page - replace with actual API call
         
-        # Apply filters
+        The page is the listing columns of the newest PAYMENT_HISTORY_PAGE_SIZE
+        payments (``LIMIT`` on the created_at index); full rows are only
+        fetched by ID when a transaction is asked about.
+        """
+        since = None
+        if date_range in PAYMENT_DATE_RANGES:
+            now = datetime.now(timezone.utc)
+            window = PAYMENT_DATE_RANGES[date_range]
+            since = now - window if window else now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        status = None
         if status_filter:
-            mock_payments = [p for p in mock_payments if p['status'] == status_filter.lower()]
-        
-        if date_range:
-            # Simple date range filtering
-            now = datetime.utcnow()
-            if date_range == "last_month":
-                cutoff = now - timedelta(days=30)
-                mock_payments = [
-                    p for p in mock_payments 
-                    if datetime.fromisoformat(p['created_at'].replace('Z', '+00:00')) >= cutoff
-                ]
+            status = PaymentStatus.__members__.get(status_filter.upper())
+            if status is None:
+                return PaymentHistoryIndex.EMPTY_SUMMARY, []
         
-        return mock_payments
+        # Mock data - replace with actual API call
+        return (
+            _MOCK_PAYMENT_HISTORY.summarize(status, since),
+            _MOCK_PAYMENT_HISTORY.query(status, since, limit=PAYMENT_HISTORY_PAGE_SIZE)
+        )
 
     def _format_single_payment(self, payment: Dict[str, Any]) -> str:
         """Format single payment details"""
-        status_emoji = {
-            "completed": "✅",
-            "pending": "⏳",
-            "failed": "❌",
-            "refunded": "↩️",
-            "cancelled": "🚫"
-        }
+        if self.output_mode == "compact":
+            return _compact(self._compact_payment(payment))
         
-        payment_type_emoji = {
-            "rent": "🏠",
-            "security_deposit": "🔒",
-            "pet_deposit": "🐕",
-            "application_fee": "📄",
-            "late_fee": "⏰",
-            "maintenance_fee": "🔧",
-            "utilities": "💡",
-            "other": "💳"
-        }
-        
-        response = f"""
-💳 **Payment Details**
-
-🆔 **Transaction ID:** {payment['id']}
-{payment_type_emoji.get(payment['type'], '💳')} **Type:** {payment['type'].title().replace('_', ' ')}
-{status_emoji.get(payment['status'], '❓')} **Status:** {payment['status'].title()}
-
-💰 **Amount Breakdown:**
-- Payment Amount: ${payment['amount']:.2f}
-- Processing Fee: ${payment.get('processing_fee', 0):.2f}
-- **Total Charged:** ${payment.get('total_amount', payment['amount']):.2f}
-
-📋 **Details:**
-- Description: {payment.get('description', 'N/A')}
-- Payment Method: {self._format_payment_method(payment.get('payment_method', 'N/A'))}
-        """.strip()
+        payment_method = payment.get('payment_method', 'N/A')
+        response = PAYMENT_DETAILS_TEMPLATE.format(
+            id=payment['id'],
+            type_emoji=PAYMENT_TYPE_EMOJI[payment['type']],
+            type_name=PAYMENT_TYPE_LABEL[payment['type']],
+            status_emoji=PAYMENT_STATUS_EMOJI[payment['status']],
+            status=PAYMENT_STATUS_LABEL[payment['status']],
+            amount=payment['amount'],
+            processing_fee=payment.get('processing_fee', 0),
+            total_amount=payment.get('total_amount', payment['amount']),
+            description=payment.get('description', 'N/A'),
+            payment_method=PAYMENT_METHOD_NAMES.get(payment_method, payment_method.title())
+        )
         
         if payment.get('last_four'):
             response += f" ending in {payment['last_four']}"
@@ -344,11 +666,11 @@ class PaymentStatusTool(BaseTool):
         response += f"""
 
 📅 **Timeline:**
-- Created: {datetime.fromisoformat(payment['created_at'].replace('Z', '+00:00')).strftime('%B %d, %Y at %I:%M %p')}
+- Created: {payment['created_datetime'].strftime('%B %d, %Y at %I:%M %p')}
         """
         
-        if payment.get('processed_at'):
-            response += f"\n- Processed: {datetime.fromisoformat(payment['processed_at'].replace('Z', '+00:00')).strftime('%B %d, %Y at %I:%M %p')}"
+        if payment.get('processed_datetime'):
+            response += f"\n- Processed: {payment['processed_datetime'].strftime('%B %d, %Y at %I:%M %p')}"
         
         if payment.get('property_name'):
             response += f"\n\n📍 **Property:** {payment['property_name']}"
@@ -357,62 +679,92 @@ class PaymentStatusTool(BaseTool):
         
         return response
 
-    def _format_payment_history(self, payments: List[Dict[str, Any]]) -> str:
-        """Format payment history"""
-        status_emoji = {
-            "completed": "✅",
-            "pending": "⏳", 
-            "failed": "❌",
-            "refunded": "↩️",
-            "cancelled": "🚫"
+    @staticmethod
+    def _compact_payment(payment: Dict[str, Any]) -> Dict[str, Any]:
+        compact = {
+            "id": payment['id'],
+            "type": payment['type'].name.lower(),
+            "amount": payment['amount'],
+            "status": payment['status'].name.lower(),
+            "created_at": payment['created_at']
         }
+        if payment.get('payment_method'):
+            compact["payment_method"] = payment['payment_method']
+        return compact
+
+    def _format_payment_history(
+        self,
+        payments: List[Dict[str, Any]],
+        summary: Optional[Dict[str, Any]] = None,
+        not_found: Optional[List[str]] = None
+    ) -> str:
+        """Format payment history
         
-        payment_type_emoji = {
-            "rent": "🏠",
-            "security_deposit": "🔒",
-            "pet_deposit": "🐕",
-            "application_fee": "📄",
-            "late_fee": "⏰",
-            "maintenance_fee": "🔧",
-            "utilities": "💡",
-            "other": "💳"
-        }
+        ``summary`` covers the whole history when ``payments`` is only its
+        latest page; without it the totals are taken from ``payments``.
+        ``not_found`` lists requested payment IDs that don't exist.
+        """
+        if summary is None:
+            total_amount = pending_amount = 0.0
+            for payment in payments:
+                status = payment['status']
+                if status is PaymentStatus.COMPLETED:
+                    total_amount += payment['amount']
+                elif status is PaymentStatus.PENDING:
+                    pending_amount += payment['amount']
+            summary = {"count": len(payments), "total_amount": total_amount, "pending_amount": pending_amount}
         
-        total_amount = sum(p['amount'] for p in payments if p['status'] == 'completed')
-        pending_amount = sum(p['amount'] for p in payments if p['status'] == 'pending')
+        if self.output_mode == "compact":
+            compact = {
+                **summary,
+                "payments": [self._compact_payment(p) for p in payments[:PAYMENT_HISTORY_PAGE_SIZE]]
+            }
+            if not_found:
+                compact["not_found"] = not_found
+            return _compact(compact)
         
-        response = f"""
-💳 **Payment History** ({len(payments)} transactions)
-
-📊 **Summary:**
-- Total Completed: ${total_amount:,.2f}
-- Pending: ${pending_amount:,.2f}
-
-📋 **Recent Transactions:**
-
-        """.strip()
+        parts = [PAYMENT_HISTORY_HEADER_TEMPLATE.format(**summary), "\n\n"]
         
-        for i, payment in enumerate(payments[:10], 1):  # Show latest 10
-            response += f"""
-**{i}. {payment['description']}**
-{payment_type_emoji.get(payment['type'], '💳')} {payment['type'].title().replace('_', ' ')} | ${payment['amount']:.2f} | {status_emoji.get(payment['status'], '❓')} {payment['status'].title()}
-🆔 {payment['id']} | 📅 {datetime.fromisoformat(payment['created_at'].replace('Z', '+00:00')).strftime('%m/%d/%Y')}
-
-            """.strip() + "\n\n"
+        # Bind the tables and methods the row loop uses to locals once
+        append = parts.append
+        render_row = PAYMENT_HISTORY_ROW_TEMPLATE.format
+        type_emoji, type_label = PAYMENT_TYPE_EMOJI, PAYMENT_TYPE_LABEL
+        status_emoji, status_label = PAYMENT_STATUS_EMOJI, PAYMENT_STATUS_LABEL
         
-        if len(payments) > 10:
-            response += f"... and {len(payments) - 10} more transactions.\n\n"
+        for i, payment in enumerate(payments[:PAYMENT_HISTORY_PAGE_SIZE], 1):
+            payment_type, status = payment['type'], payment['status']
+            created_at = payment['created_at']
+            append(render_row(
+                index=i,
+                description=payment['description'],
+                type_emoji=type_emoji[payment_type],
+                type_name=type_label[payment_type],
+                amount=payment['amount'],
+                status_emoji=status_emoji[status],
+                status=status_label[status],
+                id=payment['id'],
+                # MM/DD/YYYY straight from the ISO string's own date fields
+                created_at=f"{created_at[5:7]}/{created_at[8:10]}/{created_at[:4]}"
+            ))
+            append("\n\n")
         
-        response += "💡 **Tip:** Ask me about a specific transaction using its ID for more details!"
+        if summary['count'] > PAYMENT_HISTORY_PAGE_SIZE:
+            parts.append(f"... and {summary['count'] - PAYMENT_HISTORY_PAGE_SIZE} more transactions.\n\n")
         
-        return response
+        parts.append("💡 **Tip:** Ask me about a specific transaction using its ID for more details!")
+        
+        if not_found:
+            parts.append(f"\n\n⚠️ Not found: {', '.join(not_found)}")
+        
+        return "".join(parts)
 
-class PaymentMethodTool(BaseTool):
+class PaymentMethodTool(PydanticV2Tool):
     name = "payment_methods"
     description = """
     Manage payment methods including adding, removing, or updating credit cards,
     debit cards, and bank accounts for automatic payments.
     """
+    output_mode: PaymentOutputMode = "markdown"
 
     def _run(
         self,
@@ -420,11 +772,21 @@ class PaymentMethodTool(BaseTool):
         user_id: str,
         payment_method_id: Optional[str] = None,
         **kwargs
+    ) -> str:
+        """Manage payment methods from a synchronous caller"""
+        return asyncio.run(self._arun(action, user_id, payment_method_id))
+
+    async def _arun(
+        self,
+        action: str,
+        user_id: str,
+        payment_method_id: Optional[str] = None,
+        **kwargs
     ) -> str:
         """Manage payment methods"""
         try:
             if action.lower() == "list":
-                return self._list_payment_methods(user_id)
+                return await self._list_payment_methods(user_id)
             elif action.lower() == "add":
                 return self._guide_add_payment_method()
             elif action.lower() == "remove":
@@ -438,9 +800,11 @@ class PaymentMethodTool(BaseTool):
             logger.error(f"Error managing payment methods: {e}")
             return f"I encountered an error while managing payment methods: {str(e)}"
 
-    def _list_payment_methods(self, user_id: str) -> str:
+    async def _list_payment_methods(self, user_id: str) -> str:
         """List user's payment methods"""
-        methods = self._get_user_payment_methods(user_id)
+        methods = await payment_method_repository.get_user_methods(user_id)
+        if self.output_mode == "compact":
+            return _compact({"payment_methods": methods})
         
         if not methods:
             return """
@@ -497,6 +861,7 @@ Would you like me to help with anything else regarding payments?
     def _remove_payment_method(self, user_id: str, payment_method_id: str) -> str:
         """Remove a payment method"""
         # Mock removal - replace with actual API call
+        payment_method_repository.invalidate(user_id)
         return f"""
 ✅ **Payment Method Removed**
 
@@ -509,16 +874,3 @@ The payment method {payment_method_id} has been successfully removed from your a
 
 💡 **Recommendation:** Make sure you have at least one active payment method for rent payments.
         """.strip()
-
-    def _get_user_payment_methods(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get user's payment methods"""
-        # Mock data - same as in PaymentProcessingTool
-        return [
-            {
-                "id": "pm_123",
-                "type": "credit_card",
-                "last_four": "4242", 
-                "brand": "visa",
-                "is_default": True
-            }
-        ]
\ No newline at end of file
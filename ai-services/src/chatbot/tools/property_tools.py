@@ -1,14 +1,197 @@
-from langchain.tools import BaseTool
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Type
 import json
 import httpx
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 import asyncio
 from pydantic import BaseModel, Field
+import orjson
+
+from ...utils.redis_client import get_redis_client
+from .base import PydanticV2Tool
 
 logger = logging.getLogger(__name__)
 
+# Failures of the property service that are reported back to the agent;
+# anything else is a bug and is left to the agent's own error handling
+PROPERTY_SERVICE_ERRORS = (httpx.HTTPError, ValueError)
+
+PROPERTY_DETAILS_CACHE_TTL = 600  # 10 minutes
+
+# Mock property store - replace with actual API call
+_MOCK_PROPERTY_DETAILS: Dict[str, Dict[str, Any]] = {
+    "prop_123": {
+        "id": "prop_123",
+        "title": "Modern Downtown Apartment",
+        "address": "123 Main St, Downtown",
+        "price": 2500,
+        "bedrooms": 2,
+        "bathrooms": 2,
+        "square_feet": 1200,
+        "year_built": 2020,
+        "parking": "1 covered space",
+        "amenities": [
+            "In-unit laundry", "Dishwasher", "Air conditioning",
+            "Balcony", "Gym access", "Rooftop terrace", "Pet friendly"
+        ],
+        "description": "Beautiful modern apartment in the heart of downtown with stunning city views. Features high-end finishes, stainless steel appliances, and access to building amenities.",
+        "available": True
+    }
+}
+
+class PropertyRepository:
+    """Property detail lookups shared by the property tools
+    
+    Details are read through a Redis cache keyed by property ID, since they
+    change rarely but come up in conversation again and again. A miss is
+    fetched once per worker however many lookups are waiting on it: later
+    callers for an ID that is already being fetched await the same fetch
+    instead of sending their own.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[str, "asyncio.Task[Dict[str, Dict[str, Any]]]"] = {}
+    
+    @staticmethod
+    def _key(property_id: str) -> str:
+        return f"property_details:{property_id}"
+    
+    async def get_details(self, property_id: str) -> Optional[Dict[str, Any]]:
+        """Get detailed property information"""
+        return (await self.get_many([property_id])).get(property_id)
+    
+    async def get_many(self, property_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get details for several properties, keyed by property ID"""
+        property_ids = list(dict.fromkeys(property_ids))
+        found: Dict[str, Dict[str, Any]] = {}
+        
+        redis_client = get_redis_client()
+        if redis_client:
+            try:
+                cached = await redis_client.mget([self._key(property_id) for property_id in property_ids])
+                found = {
+                    property_id: orjson.loads(raw)
+                    for property_id, raw in zip(property_ids, cached)
+                    if raw
+                }
+            except Exception as e:
+                logger.error(f"Error reading property details cache: {e}")
+        
+        missing = [property_id for property_id in property_ids if property_id not in found]
+        if missing:
+            found.update(await self._fetch_once(missing))
+        return found
+    
+    async def _fetch_once(self, property_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch properties, joining any fetch already in flight for the same IDs"""
+        new_ids = [property_id for property_id in property_ids if property_id not in self._inflight]
+        if new_ids:
+            task = asyncio.create_task(self._fetch_and_cache(new_ids))
+            for property_id in new_ids:
+                self._inflight[property_id] = task
+            task.add_done_callback(lambda _: [self._inflight.pop(property_id, None) for property_id in new_ids])
+        
+        fetched: Dict[str, Dict[str, Any]] = {}
+        for task in {self._inflight[property_id] for property_id in property_ids}:
+            # Shielded so a cancelled caller doesn't cancel the fetch for the others
+            fetched.update(await asyncio.shield(task))
+        return {property_id: fetched[property_id] for property_id in property_ids if property_id in fetched}
+    
+    async def _fetch_and_cache(self, property_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        properties = await self._fetch_details(property_ids)
+        
+        redis_client = get_redis_client()
+        if redis_client and properties:
+            try:
+                pipe = redis_client.pipeline()
+                for property_id, details in properties.items():
+                    pipe.set(self._key(property_id), orjson.dumps(details), ex=PROPERTY_DETAILS_CACHE_TTL)
+                await pipe.execute()
+            except Exception as e:
+                logger.error(f"Error writing property details cache: {e}")
+        return properties
+    
+    async def _fetch_details(self, property_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch details for several properties in one call - replace with actual API call
+        
+        The property service takes every ID at once
+        (``POST /properties:batchGet`` with ``{"ids": [...]}``), so any
+        number of misses costs a single request.
+        """
+        return {
+            property_id: _MOCK_PROPERTY_DETAILS[property_id]
+            for property_id in property_ids
+            if property_id in _MOCK_PROPERTY_DETAILS
+        }
+
+property_repository = PropertyRepository()
+
+async def _add_property_details(properties: List[Dict[str, Any]]):
+    """Merge year built and the full amenity list into search results
+    
+    Details for all listed properties come from one batched repository
+    lookup, so a search answers with details in a single round trip instead
+    of needing a property_details call per result.
+    """
+    try:
+        details = await property_repository.get_many([prop['id'] for prop in properties])
+    except PROPERTY_SERVICE_ERRORS as e:
+        logger.error(f"Error getting details for search results: {e}")
+        return
+    
+    for prop in properties:
+        detail = details.get(prop['id'])
+        if detail:
+            prop['year_built'] = detail.get('year_built')
+            prop['amenities'] = detail.get('amenities', prop.get('amenities'))
+
+# This is mock data - replace with actual property service API call
+_MOCK_PROPERTIES = [
+    {
+        "id": "prop_123",
+        "title": "Modern Downtown Apartment",
+        "address": "123 Main St, Downtown",
+        "price": 2500,
+        "bedrooms": 2,
+        "bathrooms": 2,
+        "square_feet": 1200,
+        "amenities": ["parking", "gym", "pool", "pet_friendly"]
+    },
+    {
+        "id": "prop_456",
+        "title": "Cozy Suburban House",
+        "address": "456 Oak Ave, Suburbs",
+        "price": 3200,
+        "bedrooms": 3,
+        "bathrooms": 2,
+        "square_feet": 1800,
+        "amenities": ["garden", "garage", "fireplace"]
+    }
+]
+for _prop in _MOCK_PROPERTIES:
+    _prop['_address_lower'] = _prop['address'].lower()
+
+PROPERTY_SUMMARY_TEMPLATE = (
+    "🏠 **{title}**\n"
+    "📍 {address}\n"
+    "💰 ${price:,}/month\n"
+    "🛏️ {bedrooms} bed, {bathrooms} bath\n"
+    "📏 {square_feet} sq ft\n"
+    "{year_built_line}"
+    "{amenities_line}"
+    "🆔 Property ID: {id}\n\n"
+)
+
+def _format_property_summary(prop: Dict[str, Any]) -> str:
+    """Render one search result as a block of the search response"""
+    year_built = prop.get('year_built')
+    amenities = prop.get('amenities')
+    return PROPERTY_SUMMARY_TEMPLATE.format_map({
+        **prop,
+        'year_built_line': f"🏗️ Built {year_built}\n" if year_built else "",
+        'amenities_line': f"✨ Amenities: {', '.join(amenities[:3])}\n" if amenities else ""
+    })
+
 class PropertySearchInput(BaseModel):
     location: Optional[str] = Field(None, description="Location to search for properties")
     property_type: Optional[str] = Field(None, description="Type of property (apartment, house, etc.)")
@@ -18,21 +201,66 @@ class PropertySearchInput(BaseModel):
     bathrooms: Optional[int] = Field(None, description="Number of bathrooms")
     amenities: Optional[List[str]] = Field(None, description="Required amenities")
 
+# Static response text is rendered once here; handlers only fill in the fields
+BOOKING_CONFIRMATION_TEMPLATE = """
+✅ **Booking Request Submitted Successfully!**
+
+📋 **Booking Details:**
+🏠 Property: {title}
+📍 Address: {address}
+📅 Requested Date: {preferred_date}
+🕐 Requested Time: {preferred_time}
+📝 Type: {booking_type}
+🆔 Booking ID: {booking_id}
+
+📧 You'll receive a confirmation email once the booking is approved by the property manager.
+📱 You can track your booking status in the app or ask me for updates.
+
+Need to make changes? Just let me know!
+""".strip()
+
+PROPERTY_DETAILS_TEMPLATE = """
+🏠 **{title}**
+📍 **Address:** {address}
+💰 **Price:** ${price:,}/month
+🛏️ **Bedrooms:** {bedrooms}
+🛁 **Bathrooms:** {bathrooms}
+📏 **Square Feet:** {square_feet} sq ft
+🏗️ **Year Built:** {year_built}
+🅿️ **Parking:** {parking}
+
+✨ **Amenities:**
+{amenities}
+
+📝 **Description:**
+{description}
+
+📊 **Availability:** {availability}
+
+Would you like to schedule a viewing or get more information about this property?
+""".strip()
+
+INVALID_BOOKING_DATE_MESSAGE = "Please give the preferred booking date as YYYY-MM-DD, for example 2024-03-15."
+INVALID_BOOKING_TIME_MESSAGE = "Please give the preferred booking time as HH:MM in 24-hour format, for example 14:30."
+
 class PropertyBookingInput(BaseModel):
     property_id: str = Field(..., description="ID of the property to book")
     user_id: str = Field(..., description="ID of the user making the booking")
     booking_type: str = Field(..., description="Type of booking (viewing, inspection, etc.)")
-    preferred_date: str = Field(..., description="Preferred date for the booking")
-    preferred_time: str = Field(..., description="Preferred time for the booking")
+    preferred_date: date = Field(..., description="Preferred date for the booking (YYYY-MM-DD)")
+    preferred_time: time = Field(..., description="Preferred time for the booking (HH:MM, 24-hour)")
     notes: Optional[str] = Field(None, description="Additional notes for the booking")
 
-class PropertySearchTool(BaseTool):
+class PropertyDetailsInput(BaseModel):
+    property_id: str = Field(..., description="ID of the property")
+
+class PropertySearchTool(PydanticV2Tool):
     name = "property_search"
     description = """
     Search for properties based on criteria like location, price range, property type, etc.
     Use this tool when users want to find properties that match their requirements.
     """
-    args_schema = PropertySearchInput
+    args_schema: Type[BaseModel] = PropertySearchInput
 
     def _run(
         self,
@@ -44,6 +272,28 @@ class PropertySearchTool(BaseTool):
         bathrooms: Optional[int] = None,
         amenities: Optional[List[str]] = None,
         **kwargs
+    ) -> str:
+        """Search for properties from a synchronous caller"""
+        return asyncio.run(self._arun(
+            location=location,
+            property_type=property_type,
+            min_price=min_price,
+            max_price=max_price,
+            bedrooms=bedrooms,
+            bathrooms=bathrooms,
+            amenities=amenities
+        ))
+
+    async def _arun(
+        self,
+        location: Optional[str] = None,
+        property_type: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        bedrooms: Optional[int] = None,
+        bathrooms: Optional[int] = None,
+        amenities: Optional[List[str]] = None,
+        **kwargs
     ) -> str:
         """Search for properties"""
         try:
@@ -66,88 +316,79 @@ class PropertySearchTool(BaseTool):
 
             # Make API call to property service
             # This would be replaced with actual API call
-            properties = self._search_properties(search_params)
+            properties = await self._search_properties(search_params)
             
             if not properties:
                 return "No properties found matching your criteria. Try adjusting your search parameters."
             
             # Format response
-            response = f"Found {len(properties)} properties:\n\n"
-            for prop in properties[:5]:  # Limit to top 5 results
-                response += f"🏠 **{prop['title']}**\n"
-                response += f"📍 {prop['address']}\n"
-                response += f"💰 ${prop['price']:,}/month\n"
-                response += f"🛏️ {prop['bedrooms']} bed, {prop['bathrooms']} bath\n"
-                response += f"📏 {prop['square_feet']} sq ft\n"
-                if prop.get('amenities'):
-                    response += f"✨ Amenities: {', '.join(prop['amenities'][:3])}\n"
-                response += f"🆔 Property ID: {prop['id']}\n\n"
-            
+            await _add_property_details(properties[:5])
+            body = "".join(_format_property_summary(prop) for prop in properties[:5])  # Limit to top 5 results
+            tail = ""
             if len(properties) > 5:
-                response += f"... and {len(properties) - 5} more properties. Use more specific criteria to narrow results."
+                tail = f"... and {len(properties) - 5} more properties. Use more specific criteria to narrow results."
             
-            return response
+            return f"Found {len(properties)} properties:\n\n{body}{tail}"
             
-        except Exception as e:
+        except PROPERTY_SERVICE_ERRORS as e:
             logger.error(f"Error searching properties: {e}")
             return f"I encountered an error while searching for properties: {str(e)}"
 
-    def _search_properties(self, search_params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _search_properties(self, search_params: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Mock property search - replace with actual API call"""
-        # This is mock data - replace with actual property service API call
-        mock_properties = [
-            {
-                "id": "prop_123",
-                "title": "Modern Downtown Apartment",
-                "address": "123 Main St, Downtown",
-                "price": 2500,
-                "bedrooms": 2,
-                "bathrooms": 2,
-                "square_feet": 1200,
-                "amenities": ["parking", "gym", "pool", "pet_friendly"]
-            },
-            {
-                "id": "prop_456",
-                "title": "Cozy Suburban House",
-                "address": "456 Oak Ave, Suburbs",
-                "price": 3200,
-                "bedrooms": 3,
-                "bathrooms": 2,
-                "square_feet": 1800,
-                "amenities": ["garden", "garage", "fireplace"]
-            }
-        ]
-        
-        # Apply basic filtering
-        filtered_properties = []
-        for prop in mock_properties:
-            if search_params.get('min_price') and prop['price'] < search_params['min_price']:
-                continue
-            if search_params.get('max_price') and prop['price'] > search_params['max_price']:
-                continue
-            if search_params.get('bedrooms') and prop['bedrooms'] != search_params['bedrooms']:
-                continue
-            if search_params.get('location') and search_params['location'].lower() not in prop['address'].lower():
-                continue
-            filtered_properties.append(prop)
+        min_price = search_params.get('min_price')
+        max_price = search_params.get('max_price')
+        bedrooms = search_params.get('bedrooms')
+        location = (search_params.get('location') or '').lower()
         
-        return filtered_properties
+        # Copies, since callers merge details into the results
+        return [
+            dict(prop) for prop in _MOCK_PROPERTIES
+            if (min_price is None or prop['price'] >= min_price)
+            and (max_price is None or prop['price'] <= max_price)
+            and (bedrooms is None or prop['bedrooms'] == bedrooms)
+            and (not location or location in prop['_address_lower'])
+        ]
 
-class PropertyBookingTool(BaseTool):
+class PropertyBookingTool(PydanticV2Tool):
     name = "property_booking"
     description = """
     Book a property viewing or inspection. Use this tool when users want to schedule 
     a viewing, inspection, or other property-related appointment.
     """
-    args_schema = PropertyBookingInput
+    args_schema: Type[BaseModel] = PropertyBookingInput
+    invalid_input_messages = {
+        "preferred_date": INVALID_BOOKING_DATE_MESSAGE,
+        "preferred_time": INVALID_BOOKING_TIME_MESSAGE
+    }
 
     def _run(
         self,
         property_id: str,
         user_id: str,
         booking_type: str,
-        preferred_date: str,
-        preferred_time: str,
+        preferred_date: date,
+        preferred_time: time,
+        notes: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """Book a property viewing or inspection from a synchronous caller"""
+        return asyncio.run(self._arun(
+            property_id=property_id,
+            user_id=user_id,
+            booking_type=booking_type,
+            preferred_date=preferred_date,
+            preferred_time=preferred_time,
+            notes=notes
+        ))
+
+    async def _arun(
+        self,
+        property_id: str,
+        user_id: str,
+        booking_type: str,
+        preferred_date: date,
+        preferred_time: time,
         notes: Optional[str] = None,
         **kwargs
     ) -> str:
@@ -158,7 +399,7 @@ class PropertyBookingTool(BaseTool):
                 return "Error: Property ID and User ID are required for booking."
             
             # Check property availability
-            property_info = self._get_property_info(property_id)
+            property_info = await self._get_property_info(property_id)
             if not property_info:
                 return f"Error: Property with ID {property_id} not found."
             
@@ -167,39 +408,31 @@ class PropertyBookingTool(BaseTool):
                 "property_id": property_id,
                 "user_id": user_id,
                 "booking_type": booking_type,
-                "preferred_date": preferred_date,
-                "preferred_time": preferred_time,
+                "preferred_date": preferred_date.isoformat(),
+                "preferred_time": preferred_time.strftime("%H:%M"),
                 "notes": notes or "",
                 "status": "pending"
             }
             
-            booking_result = self._create_booking(booking_data)
+            booking_result = await self._create_booking(booking_data)
             
             if booking_result['success']:
-                return f"""
-✅ **Booking Request Submitted Successfully!**
-
-📋 **Booking Details:**
-🏠 Property: {property_info['title']}
-📍 Address: {property_info['address']}
-📅 Requested Date: {preferred_date}
-🕐 Requested Time: {preferred_time}
-📝 Type: {booking_type}
-🆔 Booking ID: {booking_result['booking_id']}
-
-📧 You'll receive a confirmation email once the booking is approved by the property manager.
-📱 You can track your booking status in the app or ask me for updates.
-
-Need to make changes? Just let me know!
-                """.strip()
+                return BOOKING_CONFIRMATION_TEMPLATE.format(
+                    title=property_info['title'],
+                    address=property_info['address'],
+                    preferred_date=booking_data['preferred_date'],
+                    preferred_time=booking_data['preferred_time'],
+                    booking_type=booking_type,
+                    booking_id=booking_result['booking_id']
+                )
             else:
                 return f"Sorry, I couldn't complete your booking: {booking_result.get('error', 'Unknown error')}"
                 
-        except Exception as e:
+        except PROPERTY_SERVICE_ERRORS as e:
             logger.error(f"Error creating booking: {e}")
             return f"I encountered an error while processing your booking request: {str(e)}"
 
-    def _get_property_info(self, property_id: str) -> Optional[Dict[str, Any]]:
+    async def _get_property_info(self, property_id: str) -> Optional[Dict[str, Any]]:
         """Get property information - replace with actual API call"""
         # Mock property data
         properties = {
@@ -218,7 +451,7 @@ Need to make changes? Just let me know!
         }
         return properties.get(property_id)
 
-    def _create_booking(self, booking_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _create_booking(self, booking_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a booking - replace with actual API call"""
         # Mock booking creation
         import uuid
@@ -228,68 +461,40 @@ Need to make changes? Just let me know!
             "status": "pending"
         }
 
-class PropertyDetailsTool(BaseTool):
+class PropertyDetailsTool(PydanticV2Tool):
     name = "property_details"
     description = """
     Get detailed information about a specific property including amenities, 
     photos, floor plans, and availability.
     """
+    args_schema: Type[BaseModel] = PropertyDetailsInput
 
     def _run(self, property_id: str, **kwargs) -> str:
+        """Get detailed property information from a synchronous caller"""
+        return asyncio.run(self._arun(property_id=property_id))
+
+    async def _arun(self, property_id: str, **kwargs) -> str:
         """Get detailed property information"""
         try:
-            property_details = self._get_detailed_property_info(property_id)
+            property_details = await property_repository.get_details(property_id)
             
             if not property_details:
                 return f"Property with ID {property_id} not found."
             
-            response = f"""
-🏠 **{property_details['title']}**
-📍 **Address:** {property_details['address']}
-💰 **Price:** ${property_details['price']:,}/month
-🛏️ **Bedrooms:** {property_details['bedrooms']}
-🛁 **Bathrooms:** {property_details['bathrooms']}
-📏 **Square Feet:** {property_details['square_feet']} sq ft
-🏗️ **Year Built:** {property_details.get('year_built', 'N/A')}
-🅿️ **Parking:** {property_details.get('parking', 'N/A')}
-
-✨ **Amenities:**
-{', '.join(property_details.get('amenities', []))}
-
-📝 **Description:**
-{property_details.get('description', 'No description available.')}
-
-📊 **Availability:** {'Available' if property_details.get('available') else 'Not Available'}
-
-Would you like to schedule a viewing or get more information about this property?
-            """.strip()
-            
-            return response
+            return PROPERTY_DETAILS_TEMPLATE.format(
+                title=property_details['title'],
+                address=property_details['address'],
+                price=property_details['price'],
+                bedrooms=property_details['bedrooms'],
+                bathrooms=property_details['bathrooms'],
+                square_feet=property_details['square_feet'],
+                year_built=property_details.get('year_built', 'N/A'),
+                parking=property_details.get('parking', 'N/A'),
+                amenities=', '.join(property_details.get('amenities', [])),
+                description=property_details.get('description', 'No description available.'),
+                availability='Available' if property_details.get('available') else 'Not Available'
+            )
             
-        except Exception as e:
+        except PROPERTY_SERVICE_ERRORS as e:
             logger.error(f"Error getting property details: {e}")
             return f"I encountered an error while retrieving property details: {str(e)}"
-
-    def _get_detailed_property_info(self, property_id: str) -> Optional[Dict[str, Any]]:
-        """Get detailed property information - replace with actual API call"""
-        # Mock detailed property data
-        properties = {
-            "prop_123": {
-                "id": "prop_123",
-                "title": "Modern Downtown Apartment",
-                "address": "123 Main St, Downtown",
-                "price": 2500,
-                "bedrooms": 2,
-                "bathrooms": 2,
-                "square_feet": 1200,
-                "year_built": 2020,
-                "parking": "1 covered space",
-                "amenities": [
-                    "In-unit laundry", "Dishwasher", "Air conditioning",
-                    "Balcony", "Gym access", "Rooftop terrace", "Pet friendly"
-                ],
-                "description": "Beautiful modern apartment in the heart of downtown with stunning city views. Features high-end finishes, stainless steel appliances, and access to building amenities.",
-                "available": True
-            }
-        }
-        return properties.get(property_id)
\ No newline at end of file
@@ -1,6 +1,7 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
 import uvicorn
@@ -10,14 +11,16 @@ import redis
 import os
 from dotenv import load_dotenv
 from datetime import datetime
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
 
 # Import route modules
-from .api.routes.chatbot import router as chatbot_router
 from .api.routes.analytics import router as analytics_router
 
 # Import utility modules
 from .utils.database import init_database, close_database
 from .utils.redis_client import get_redis_client, init_redis, close_redis
+from .utils.http_client import init_http_client, close_http_client
 from .utils.logger import setup_logging
 from .utils.auth import verify_token
 from .config.settings import settings
@@ -33,7 +36,8 @@ security = HTTPBearer()
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
-    logger.info("🚀 Starting PropFlow AI Services...")
+    logger.info(f"🚀 PropFlow AI Services starting on {settings.HOST}:{settings.PORT}")
+    logger.info(f"📊 Environment: {settings.ENVIRONMENT}")
     
     try:
         # Initialize database
@@ -42,8 +46,27 @@ async def lifespan(app: FastAPI):
         
         # Initialize Redis
         await init_redis()
+        app.state.redis = get_redis_client()
         logger.info("✅ Redis initialized")
         
+        # Initialize shared HTTP client for the platform services
+        await init_http_client()
+        
+        # Initialize response cache
+        FastAPICache.init(RedisBackend(app.state.redis), prefix="analytics-cache")
+        logger.info("✅ Response cache initialized")
+        
+        # Initialize LLM generation cache
+        if settings.ENABLE_CHATBOT and settings.LLM_CACHE_ENABLED:
+            import langchain
+            from .chatbot.llm_cache import PromptCache
+            
+            langchain.llm_cache = PromptCache(
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                ttl=settings.LLM_CACHE_TTL
+            )
+            logger.info("✅ LLM cache initialized")
+        
         # Initialize AI models and services
         logger.info("🤖 AI models and services ready")
         
@@ -59,6 +82,8 @@ async def lifespan(app: FastAPI):
     logger.info("🛑 Shutting down PropFlow AI Services...")
     
     try:
+        await close_http_client()
+        
         await close_redis()
         logger.info("✅ Redis connections closed")
         
@@ -70,6 +95,20 @@ async def lifespan(app: FastAPI):
     
     logger.info("✅ PropFlow AI Services shutdown complete")
 
+class EventStreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip middleware that leaves server-sent event streams uncompressed
+    
+    The compressor only emits output once its buffer fills, which would hold
+    streamed tokens back; requests that accept ``text/event-stream`` are
+    passed straight through.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and b"text/event-stream" in dict(scope["headers"]).get(b"accept", b""):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
 # Create FastAPI app
 app = FastAPI(
     title="PropFlow AI Services",
@@ -77,6 +116,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs" if settings.ENVIRONMENT != "production" else None,
     redoc_url="/redoc" if settings.ENVIRONMENT != "production" else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -89,7 +129,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(EventStreamAwareGZipMiddleware, minimum_size=1000)
 
 # Authentication dependency
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
@@ -104,56 +144,36 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Invalid authentication credentials"
         )
 
+# Parts of the health report that can't change while the process runs.
+# Database and model checks aren't implemented yet, so they always pass.
+HEALTH_STATIC_FIELDS = {
+    "service": "PropFlow AI Services",
+    "version": "1.0.0",
+    "environment": settings.ENVIRONMENT,
+    "database": "connected",
+    "ai_models": "loaded"
+}
+
 # Health check endpoint
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """Comprehensive health check"""
+    status, redis_status = "healthy", "connected"
+    
+    # Check Redis connection
     try:
-        health_status = {
-            "status": "healthy",
-            "service": "PropFlow AI Services",
-            "version": "1.0.0",
-            "environment": settings.ENVIRONMENT,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        # Check Redis connection
-        try:
-            redis_client = get_redis_client()
-            if redis_client and await redis_client.ping():
-                health_status["redis"] = "connected"
-            else:
-                health_status["redis"] = "disconnected"
-                health_status["status"] = "degraded"
-        except Exception as e:
-            health_status["redis"] = f"error: {str(e)}"
-            health_status["status"] = "degraded"
-        
-        # Check database connection
-        try:
-            # Add database health check here
-            health_status["database"] = "connected"
-        except Exception as e:
-            health_status["database"] = f"error: {str(e)}"
-            health_status["status"] = "unhealthy"
-        
-        # Check AI models
-        try:
-            # Add AI model health check here
-            health_status["ai_models"] = "loaded"
-        except Exception as e:
-            health_status["ai_models"] = f"error: {str(e)}"
-            health_status["status"] = "degraded"
-        
-        return health_status
-        
+        redis_client = request.app.state.redis
+        if not (redis_client and await redis_client.ping()):
+            status, redis_status = "degraded", "disconnected"
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return {
-            "status": "unhealthy",
-            "error": str(e),
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        status, redis_status = "degraded", f"error: {str(e)}"
+    
+    return {
+        "status": status,
+        **HEALTH_STATIC_FIELDS,
+        "redis": redis_status,
+        "timestamp": datetime.utcnow().isoformat()
+    }
 
 # Root endpoint
 @app.get("/")
@@ -176,7 +196,11 @@ async def root():
     }
 
 # Include API routers
-app.include_router(chatbot_router, prefix="/api/v1")
+# The chatbot router pulls in LangChain and builds the agent on import, so
+# workers deployed for analytics alone don't load it at all
+if settings.ENABLE_CHATBOT:
+    from .api.routes.chatbot import router as chatbot_router
+    app.include_router(chatbot_router, prefix="/api/v1")
 app.include_router(analytics_router, prefix="/api/v1")
 
 # Error handlers
@@ -184,31 +208,30 @@ app.include_router(analytics_router, prefix="/api/v1")
 async def http_exception_handler(request, exc):
     """Handle HTTP exceptions"""
     logger.error(f"HTTP {exc.status_code}: {exc.detail} - Path: {request.url.path}")
-    return {
-        "error": exc.detail,
-        "status_code": exc.status_code,
-        "path": str(request.url.path),
-        "timestamp": datetime.utcnow().isoformat()
-    }
+    return ORJSONResponse(
+        {
+            "error": exc.detail,
+            "status_code": exc.status_code,
+            "path": str(request.url.path),
+            "timestamp": datetime.utcnow().isoformat()
+        },
+        status_code=exc.status_code,
+        headers=getattr(exc, "headers", None)
+    )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Handle general exceptions"""
     logger.error(f"Unhandled exception: {exc} - Path: {request.url.path}", exc_info=True)
-    return {
-        "error": "Internal server error",
-        "status_code": 500,
-        "path": str(request.url.path),
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-# Startup event logging
-@app.on_event("startup")
-async def startup_event():
-    """Log startup information"""
-    logger.info(f"🚀 PropFlow AI Services starting on {settings.HOST}:{settings.PORT}")
-    logger.info(f"📊 Environment: {settings.ENVIRONMENT}")
-    logger.info(f"📝 Docs available at: /docs")
+    return ORJSONResponse(
+        {
+            "error": "Internal server error",
+            "status_code": 500,
+            "path": str(request.url.path),
+            "timestamp": datetime.utcnow().isoformat()
+        },
+        status_code=500
+    )
 
 if __name__ == "__main__":
     # Run the server
@@ -217,7 +240,10 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.ENVIRONMENT == "development",
+        workers=1 if settings.ENVIRONMENT == "development" else settings.WEB_CONCURRENCY,
         log_level=settings.LOG_LEVEL.lower(),
-        access_log=True,
+        access_log=settings.ENVIRONMENT != "production",
+        loop="uvloop",
+        http="httptools",
         reload_dirs=["src"] if settings.ENVIRONMENT == "development" else None
     )
\ No newline at end of file
@@ -0,0 +1,70 @@
+import hashlib
+import logging
+import orjson
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi_cache import FastAPICache
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+def build_cache_key(namespace: str, user_id: str, payload: Any) -> str:
+    """Build a user-scoped cache key from a JSON-serializable payload"""
+    raw = orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    digest = hashlib.sha256(user_id.encode() + b":" + raw).hexdigest()
+    return f"{namespace}:{user_id}:{digest}"
+
+def user_scoped_key_builder(
+    func: Callable,
+    namespace: str = "",
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: Tuple[Any, ...] = (),
+    kwargs: Optional[Dict[str, Any]] = None,
+) -> str:
+    """fastapi-cache key builder that never shares entries between users"""
+    kwargs = kwargs or {}
+    user_id = kwargs["current_user"]["id"]
+    params = sorted(request.query_params.multi_items()) if request else []
+    return build_cache_key(
+        f"{FastAPICache.get_prefix()}:{namespace}:{func.__module__}.{func.__name__}",
+        user_id,
+        params
+    )
+
+async def get_cached_json(key: str) -> Optional[Any]:
+    """Read a JSON value from Redis, treating any failure as a cache miss"""
+    redis_client = get_redis_client()
+    if not redis_client:
+        return None
+
+    try:
+        cached = await redis_client.get(key)
+        return orjson.loads(cached) if cached else None
+    except Exception as e:
+        logger.error(f"Error reading cache key {key}: {e}")
+        return None
+
+async def set_cached_json(key: str, value: Any, expire: int) -> None:
+    """Write a JSON value to Redis with an expiry in seconds"""
+    redis_client = get_redis_client()
+    if not redis_client:
+        return
+
+    try:
+        await redis_client.set(key, orjson.dumps(value, default=str), ex=expire)
+    except Exception as e:
+        logger.error(f"Error writing cache key {key}: {e}")
+
+async def delete_cached(*keys: str) -> None:
+    """Remove cached keys from Redis"""
+    redis_client = get_redis_client()
+    if not redis_client or not keys:
+        return
+
+    try:
+        await redis_client.delete(*keys)
+    except Exception as e:
+        logger.error(f"Error deleting cache keys {keys}: {e}")
@@ -1,43 +1,190 @@
 import asyncio
+import functools
 import logging
-from typing import Optional
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, TypeVar
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 import asyncpg
+import orjson
 from asyncpg import Pool
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
-# Global connection pool
+# Global connection pools: read-write, and read-only for queries that never write
 _pool: Optional[Pool] = None
+_ro_pool: Optional[Pool] = None
+
+# Connection pinned by a session, with the task that owns it. Tasks spawned
+# inside the session inherit the variable but must not share the connection,
+# so it only counts for the owner (see _pinned_connection)
+_task_conn: ContextVar[Optional[Tuple[asyncio.Task, asyncpg.Connection]]] = ContextVar("task_conn", default=None)
+
+T = TypeVar("T")
+
+# Most recent turns of a conversation, for rebuilding chat memory
+RECENT_TURNS_QUERY = """
+    SELECT message, response
+    FROM messages
+    WHERE conversation_id = $1 AND user_id = $2
+    ORDER BY created_at DESC, id DESC
+    LIMIT $3
+"""
+
+# One page of conversation history, keyset-paginated on (created_at, id)
+HISTORY_PAGE_QUERY = """
+    SELECT id, message, response, context, created_at
+    FROM messages
+    WHERE conversation_id = $1
+      AND user_id = $2
+      AND (
+          $3::uuid IS NULL
+          OR (created_at, id) < (SELECT created_at, id FROM messages WHERE id = $3)
+      )
+    ORDER BY created_at DESC, id DESC
+    LIMIT $4
+"""
+
+_NIL_UUID = "00000000-0000-0000-0000-000000000000"
+
+# Queries run on every pooled connection at startup, with arguments that
+# match no rows, so they are already in each connection's statement cache
+# when traffic arrives. The statement cache is keyed on the exact text, so
+# callers must use these constants rather than copies
+HOT_QUERIES: List[Tuple[str, Tuple[Any, ...]]] = [
+    ("SELECT 1", ()),
+    (RECENT_TURNS_QUERY, (_NIL_UUID, _NIL_UUID, 1)),
+    (HISTORY_PAGE_QUERY, (_NIL_UUID, _NIL_UUID, None, 1)),
+]
+
+# First byte of jsonb's binary wire format: the format version, always 1
+JSONB_BINARY_VERSION = b"\x01"
+
+def _encode_jsonb(value: Any) -> bytes:
+    return JSONB_BINARY_VERSION + orjson.dumps(value)
+
+def _decode_jsonb(data: bytes) -> Any:
+    return orjson.loads(data[1:])
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """Prepare each new pool connection: JSONB columns map to Python objects via orjson
+    
+    The codec uses the binary format, like asyncpg's built-in UUID and
+    TIMESTAMP codecs, so orjson's bytes go on the wire without a round trip
+    through str.
+    """
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=_encode_jsonb,
+        decoder=_decode_jsonb,
+        schema="pg_catalog",
+        format="binary"
+    )
+
+async def _prewarm_connection(conn: asyncpg.Connection) -> None:
+    for query, args in HOT_QUERIES:
+        try:
+            await conn.fetch(query, *args)
+        except asyncpg.PostgresError as e:
+            # e.g. tables not migrated yet; the query is prepared on first use instead
+            logger.warning(f"⚠️ Could not prewarm query on a pooled connection: {e}")
+
+async def _prewarm_pool(pool: Pool, size: int) -> None:
+    """Run HOT_QUERIES on each of a pool's minimum connections"""
+    conns = [await pool.acquire() for _ in range(size)]
+    try:
+        await asyncio.gather(*(_prewarm_connection(conn) for conn in conns))
+    finally:
+        for conn in conns:
+            await pool.release(conn)
+
+async def _create_pool(dsn: str, min_size: int, max_size: int, **server_settings: str) -> Pool:
+    return await asyncpg.create_pool(
+        dsn=dsn,
+        min_size=min_size,
+        max_size=max_size,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        init=_init_connection,
+        server_settings={"plan_cache_mode": settings.DB_PLAN_CACHE_MODE, **server_settings},
+        max_queries=settings.DB_POOL_MAX_QUERIES,
+        max_inactive_connection_lifetime=300,
+        command_timeout=60,
+    )
 
 async def init_database() -> None:
-    """Initialize database connection pool"""
-    global _pool
+    """Initialize database connection pools
+    
+    asyncpg prepares every query it runs through fetch/fetchrow/fetchval
+    and keeps the prepared statement in a per-connection LRU keyed by the
+    query text, so a repeated query skips Parse/Describe and planning. The
+    cache is sized by ``DB_STATEMENT_CACHE_SIZE`` to hold every distinct
+    query the service sends rather than asyncpg's default of 100.
+    
+    After five executions PostgreSQL may switch a prepared statement to a
+    generic plan that ignores the parameter values. For lookups by user or
+    conversation, whose selectivity varies wildly, and for optional filters
+    like the history cursor (``$3::uuid IS NULL OR ...``), that plan can be
+    far slower than a custom one, so sessions default to
+    ``plan_cache_mode = force_custom_plan``: each execution is planned for
+    its actual parameters (a fraction of a millisecond) while parsing is
+    still reused.
+    
+    Reads that never write go through a second pool whose sessions default
+    to read-only transactions, so PostgreSQL assigns them no transaction ID.
+    It connects to ``DATABASE_READ_URL`` when set, so pointing that at a
+    replica moves those reads off the primary without touching callers.
+    
+    Replacing a connection throws its statement cache away, so connections
+    are only recycled after ``DB_POOL_MAX_QUERIES`` queries (asyncpg needs
+    some limit) or after five idle minutes, which also keeps backend memory
+    in check.
+    
+    Before returning, every connection the pools opened runs the
+    ``HOT_QUERIES`` once, so their statements are already prepared.
+    
+    Each query is only a few awaits, so throughput depends on the event
+    loop's per-await overhead; the pool expects to run on uvloop, which
+    uvicorn uses when started from main.py or with uvicorn[standard].
+    """
+    global _pool, _ro_pool
+    
+    if not type(asyncio.get_running_loop()).__module__.startswith("uvloop"):
+        logger.warning("⚠️ Database pool is running on the default asyncio loop; install uvloop for full throughput")
     
     try:
-        _pool = await asyncpg.create_pool(
-            dsn=settings.DATABASE_URL,
-            min_size=settings.DB_POOL_MIN_SIZE,
-            max_size=settings.DB_POOL_MAX_SIZE,
-            max_queries=50000,
-            max_inactive_connection_lifetime=300,
-            command_timeout=60,
+        _pool = await _create_pool(
+            settings.DATABASE_URL,
+            settings.DB_POOL_MIN_SIZE,
+            settings.DB_POOL_MAX_SIZE
+        )
+        _ro_pool = await _create_pool(
+            settings.DATABASE_READ_URL or settings.DATABASE_URL,
+            settings.DB_READ_POOL_MIN_SIZE,
+            settings.DB_READ_POOL_MAX_SIZE,
+            default_transaction_read_only="on",
+            default_transaction_isolation="repeatable read"
         )
         
-        # Test connection
-        async with _pool.acquire() as conn:
-            await conn.fetchval('SELECT 1')
+        # Test the connections and fill their statement caches, so the first
+        # requests don't pay for preparing the hot queries
+        await asyncio.gather(
+            _prewarm_pool(_pool, settings.DB_POOL_MIN_SIZE),
+            _prewarm_pool(_ro_pool, settings.DB_READ_POOL_MIN_SIZE)
+        )
             
-        logger.info("✅ Database connection pool initialized")
+        logger.info("✅ Database connection pools initialized")
         
     except Exception as e:
         logger.error(f"❌ Failed to initialize database: {e}")
         raise
 
 async def close_database() -> None:
-    """Close database connection pool"""
-    global _pool
+    """Close database connection pools"""
+    global _pool, _ro_pool
+    
+    if _ro_pool:
+        await _ro_pool.close()
+        _ro_pool = None
     
     if _pool:
         await _pool.close()
@@ -48,103 +195,218 @@ def get_db_pool() -> Optional[Pool]:
     """Get database connection pool"""
     return _pool
 
+def _pinned_connection() -> Optional[asyncpg.Connection]:
+    pinned = _task_conn.get()
+    if pinned is not None and pinned[0] is asyncio.current_task():
+        return pinned[1]
+    return None
+
 @asynccontextmanager
 async def get_db_session():
-    """Get database session from pool"""
-    if not _pool:
+    """Get database session from pool
+    
+    Prepared statements are cached per connection, so queries from one task
+    that land on different connections each pay their own Parse. A session
+    pins its connection to the current task for its lifetime: nested
+    sessions and the one-statement helpers below reuse it instead of
+    acquiring another, and share its statement cache. Outside a session the
+    helpers acquire from the pool directly, which saves the generator frame
+    this wrapper costs on every query.
+    """
+    conn = _pinned_connection()
+    if conn is not None:
+        yield conn
+        return
+    
+    pool = _pool
+    if pool is None:
         raise RuntimeError("Database pool not initialized")
     
-    async with _pool.acquire() as conn:
+    async with pool.acquire() as conn:
+        token = _task_conn.set((asyncio.current_task(), conn))
         try:
             yield conn
-        except Exception as e:
-            logger.error(f"Database session error: {e}")
-            raise
+        finally:
+            _task_conn.reset(token)
+
+def pinned_connection(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Run a coroutine function with one pooled connection pinned for the whole call
+    
+    Meant for handlers that issue several queries. The connection is held
+    until the call returns, so don't wrap anything that also waits on the
+    LLM or other slow services.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> T:
+        async with get_db_session():
+            return await func(*args, **kwargs)
+    return wrapper
 
 async def execute_query(query: str, *args) -> list:
     """Execute a query and return results"""
-    async with get_db_session() as conn:
+    conn = _pinned_connection()
+    if conn is not None:
+        return await conn.fetch(query, *args)
+    pool = _pool
+    if pool is None:
+        raise RuntimeError("Database pool not initialized")
+    async with pool.acquire() as conn:
         return await conn.fetch(query, *args)
 
 async def execute_one(query: str, *args):
     """Execute a query and return one result"""
-    async with get_db_session() as conn:
+    conn = _pinned_connection()
+    if conn is not None:
+        return await conn.fetchrow(query, *args)
+    pool = _pool
+    if pool is None:
+        raise RuntimeError("Database pool not initialized")
+    async with pool.acquire() as conn:
         return await conn.fetchrow(query, *args)
 
 async def execute_scalar(query: str, *args):
     """Execute a query and return scalar value"""
-    async with get_db_session() as conn:
+    conn = _pinned_connection()
+    if conn is not None:
+        return await conn.fetchval(query, *args)
+    pool = _pool
+    if pool is None:
+        raise RuntimeError("Database pool not initialized")
+    async with pool.acquire() as conn:
+        return await conn.fetchval(query, *args)
+
+@asynccontextmanager
+async def get_ro_session():
+    """Get a session from the read-only pool
+    
+    Every transaction on it is read-only, and with a replica configured it
+    may lag the primary, so don't use it to read back rows the current
+    request just wrote.
+    """
+    pool = _ro_pool
+    if pool is None:
+        raise RuntimeError("Database pool not initialized")
+    
+    async with pool.acquire() as conn:
+        yield conn
+
+async def execute_query_ro(query: str, *args) -> list:
+    """Execute a read-only query on the read-only pool and return results"""
+    pool = _ro_pool
+    if pool is None:
+        raise RuntimeError("Database pool not initialized")
+    async with pool.acquire() as conn:
+        return await conn.fetch(query, *args)
+
+async def execute_scalar_ro(query: str, *args):
+    """Execute a read-only query on the read-only pool and return scalar value"""
+    pool = _ro_pool
+    if pool is None:
+        raise RuntimeError("Database pool not initialized")
+    async with pool.acquire() as conn:
         return await conn.fetchval(query, *args)
 
 # Database migration utilities
+
+# Plain CREATE INDEX takes a SHARE lock, which doesn't conflict with itself,
+# so several builds on the same table can run at once (CONCURRENTLY builds
+# on one table would queue behind each other)
+MIGRATION_INDEXES = [
+    """
+    CREATE INDEX IF NOT EXISTS idx_conversations_user_id
+    ON conversations(user_id)
+    """,
+    # Serves the history and recent-turns queries in ORDER BY order, with no
+    # sort, and any other lookup by conversation_id
+    """
+    CREATE INDEX IF NOT EXISTS idx_messages_conversation_created
+    ON messages(conversation_id, created_at DESC, id DESC)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_messages_user_id
+    ON messages(user_id)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_messages_context_gin
+    ON messages USING GIN (context jsonb_path_ops)
+    """
+]
+
+# Tables, in dependency order. Sent as one multi-statement string: without
+# parameters asyncpg uses the simple query protocol, so every statement runs
+# in a single round trip with nothing prepared.
+#
+# messages.context stays JSONB however small the payload: the GIN index
+# answers containment (@>) queries on it, and with the binary codec a read is
+# a single orjson parse, so a packed BYTEA copy would save a few bytes per row
+# at the price of a second column to keep in sync
+MIGRATION_TABLES = """
+    CREATE TABLE IF NOT EXISTS conversations (
+        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+        user_id UUID NOT NULL,
+        title TEXT,
+        created_at TIMESTAMP DEFAULT NOW(),
+        updated_at TIMESTAMP DEFAULT NOW()
+    );
+    
+    CREATE TABLE IF NOT EXISTS messages (
+        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+        conversation_id UUID REFERENCES conversations(id) ON DELETE CASCADE,
+        user_id UUID NOT NULL,
+        message TEXT NOT NULL,
+        response TEXT,
+        context JSONB,
+        created_at TIMESTAMP DEFAULT NOW()
+    );
+"""
+
+# Indexes made redundant by one above, dropped from existing databases once
+# their replacements are built
+MIGRATION_DROPPED_INDEXES = """
+    DROP INDEX IF EXISTS idx_messages_conversation_id;
+"""
+
 async def run_migrations():
     """Run database migrations"""
     try:
         async with get_db_session() as conn:
-            # Create conversations table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS conversations (
-                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    user_id UUID NOT NULL,
-                    title VARCHAR(255),
-                    created_at TIMESTAMP DEFAULT NOW(),
-                    updated_at TIMESTAMP DEFAULT NOW()
-                )
-            """)
-            
-            # Create messages table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS messages (
-                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                    conversation_id UUID REFERENCES conversations(id) ON DELETE CASCADE,
-                    user_id UUID NOT NULL,
-                    message TEXT NOT NULL,
-                    response TEXT,
-                    context JSONB,
-                    created_at TIMESTAMP DEFAULT NOW()
-                )
-            """)
-            
-            # Create indexes
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_conversations_user_id 
-                ON conversations(user_id)
-            """)
-            
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_messages_conversation_id 
-                ON messages(conversation_id)
-            """)
-            
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_messages_user_id 
-                ON messages(user_id)
-            """)
-            
-            logger.info("✅ Database migrations completed")
-            
+            await conn.execute(MIGRATION_TABLES)
+        
+        # Indexes don't depend on each other; each builds on its own pooled
+        # connection so they overlap instead of running back to back
+        await asyncio.gather(*(_pool.execute(ddl) for ddl in MIGRATION_INDEXES))
+        
+        # Only now, so conversation lookups and the ON DELETE CASCADE always
+        # have an index to use
+        await _pool.execute(MIGRATION_DROPPED_INDEXES)
+        
+        logger.info("✅ Database migrations completed")
+        
     except Exception as e:
         logger.error(f"❌ Failed to run migrations: {e}")
         raise
 
 # Health check
-async def check_database_health() -> dict:
-    """Check database health"""
+async def check_database_health(deep: bool = False) -> dict:
+    """Check database health
+    
+    By default this only inspects the pool, which answers "can requests get
+    a connection" without a query per probe. ``deep=True`` also runs
+    ``SELECT 1`` to prove the server answers.
+    """
     try:
-        if not _pool:
+        pool = _pool
+        if pool is None or _ro_pool is None or pool.is_closing():
             return {"status": "error", "message": "Pool not initialized"}
         
-        async with get_db_session() as conn:
-            result = await conn.fetchval('SELECT 1')
-            
-            if result == 1:
-                return {
-                    "status": "healthy", 
-                    "pool_size": _pool.get_size(),
-                    "available_connections": _pool.get_idle_size()
-                }
-            else:
-                return {"status": "error", "message": "Query failed"}
+        if deep and await execute_scalar_ro('SELECT 1') != 1:
+            return {"status": "error", "message": "Query failed"}
+        
+        return {
+            "status": "healthy", 
+            "pool_size": pool.get_size(),
+            "available_connections": pool.get_idle_size()
+        }
                 
     except Exception as e:
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
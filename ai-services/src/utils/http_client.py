@@ -0,0 +1,45 @@
+import logging
+from typing import Optional
+import httpx
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Global client shared by every call to the platform services
+_client: Optional[httpx.AsyncClient] = None
+
+async def init_http_client() -> None:
+    """Create the pooled HTTP client for calls to the platform services
+    
+    One client per worker keeps connections (and TLS sessions) alive between
+    tool calls; with HTTP/2 over TLS, concurrent requests to the same
+    service share a single connection.
+    """
+    global _client
+    
+    _client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=settings.SERVICE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SERVICE_HTTP_MAX_KEEPALIVE
+        ),
+        timeout=httpx.Timeout(
+            settings.SERVICE_HTTP_TIMEOUT,
+            connect=settings.SERVICE_HTTP_CONNECT_TIMEOUT
+        )
+    )
+    logger.info("✅ HTTP client initialized")
+
+async def close_http_client() -> None:
+    """Close the HTTP client and its pooled connections"""
+    global _client
+    
+    if _client:
+        await _client.aclose()
+        _client = None
+        logger.info("✅ HTTP client closed")
+
+def get_http_client() -> Optional[httpx.AsyncClient]:
+    """Get the shared HTTP client"""
+    return _client
@@ -0,0 +1,46 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+
+from src.api.auth import get_current_user
+from src.api.routes import analytics
+
+class _StubAnalyticsService:
+    """Answers every analytics call with an empty section"""
+
+    def __getattr__(self, name):
+        async def call(*args, **kwargs):
+            return {}
+        return call
+
+@pytest.fixture
+def accessible_properties():
+    return ["property_1"]
+
+@pytest.fixture
+def client(accessible_properties):
+    app = FastAPI()
+    app.include_router(analytics.router)
+    app.dependency_overrides[get_current_user] = lambda: {"id": "user_1"}
+    app.dependency_overrides[analytics.get_accessible_properties] = lambda: list(accessible_properties)
+    app.dependency_overrides[analytics.get_financial_analytics_service] = _StubAnalyticsService
+    app.dependency_overrides[analytics.get_maintenance_analytics_service] = _StubAnalyticsService
+
+    # A fresh prefix per test keeps cached responses from leaking between tests
+    FastAPICache.init(InMemoryBackend(), prefix=f"test-{uuid.uuid4().hex}")
+    return TestClient(app)
+
+@pytest.mark.parametrize("path", ["/analytics/financial", "/analytics/maintenance"])
+def test_cached_analytics_denied_after_access_revoked(client, accessible_properties, path):
+    url = f"{path}?property_id=property_1"
+    assert client.get(url).status_code == 200
+
+    accessible_properties.remove("property_1")
+
+    response = client.get(url)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Access denied to specified property"